@@ -1,4 +1,4 @@
-import os, sys, json, requests, requests_cache
+import os, sys, json, threading, requests, requests_cache
 from retry_requests import retry
 import pandas as pd, numpy as np
 from flask import Flask, request, jsonify
@@ -57,6 +57,65 @@ def get_crop_stage(crop, age_months):
         return "Late-season Stage"
 
 
+_tf = TimezoneFinder()
+_refreshing = set()  # plot ids with a background schedule refresh running
+_refreshed_for = {}  # plot id -> local date last refreshed for, so one stale row costs one regeneration a day
+_refresh_lock = threading.Lock()
+
+def plot_local_date(plot):
+    """Today in the plot's own timezone, the day the nightly precompute dates its schedule from (UTC when unknown)."""
+    lat, lon = plot.get("lat"), plot.get("lon")
+    zone = None
+    if lat is not None and lon is not None:
+        # Same ~1km rounding as the main backend's precompute
+        name = _tf.timezone_at(lat=round(float(lat), 2), lng=round(float(lon), 2))
+        zone = tz.gettz(name) if name else None
+    return datetime.now(zone or tz.UTC).date()
+
+def generate_and_save_schedule(plot, daily, hourly, logs, schedule_data):
+    from farmer_ai import generate_ai_schedule, generate_summary, generate_gem_summary
+
+    plot_id = plot["id"]
+    schedule    = generate_ai_schedule(plot, daily, hourly, logs)
+    summary     = generate_summary(plot["crop"], plot.get("lat"), plot.get("lon"), schedule)
+    gem_summary = generate_gem_summary(plot["crop"], plot.get("lat"), plot.get("lon"), schedule, plot.get("name",""), plot_id)
+
+    payload = {
+        "plot_id":    plot_id,
+        "schedule":   schedule,
+        "summary":    summary,
+        "gem_summary":gem_summary
+    }
+    # only set og_schedule once
+    if not schedule_data or not schedule_data.get("og_schedule"):
+        payload["og_schedule"] = schedule
+
+    supabase.table("plot_schedules") \
+            .upsert(payload, on_conflict=["plot_id"]) \
+            .execute()
+    return schedule, summary, gem_summary
+
+def refresh_schedule_in_background(plot, daily, hourly, logs, schedule_data, local_date):
+    """Regenerate a stale schedule off the request path (one run per plot and local day)."""
+    plot_id = plot["id"]
+    with _refresh_lock:
+        if plot_id in _refreshing or _refreshed_for.get(plot_id) == local_date:
+            return
+        _refreshing.add(plot_id)
+        _refreshed_for[plot_id] = local_date
+
+    def run():
+        try:
+            generate_and_save_schedule(plot, daily, hourly, logs, schedule_data)
+            print(f"✅ Background schedule refresh done for plot {plot_id}")
+        except Exception as e:
+            print(f"⚠️ Background schedule refresh failed for plot {plot_id}: {e}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(plot_id)
+
+    threading.Thread(target=run, name=f"refresh-{plot_id}", daemon=True).start()
+
 def get_lat_lon(zip_code):
     url = f"http://api.zippopotam.us/us/{zip_code}"
     res = requests.get(url)
@@ -124,7 +183,11 @@ def get_plan():
     cloud_vals = [h.get("clouds",{}).get("all") for h in hourly[:24] if "clouds" in h]
     sunlight = round(100 - np.mean(cloud_vals),0) if cloud_vals else 70.0
 
-    # ✅ Cached schedule path — skip if stale (first day already passed)
+    # ✅ Cached schedule path. The main backend's nightly precompute refreshes this row
+    # after each plot's local midnight; a row still dated before the plot's local
+    # day is served as is while a refresh runs in the background.
+    local_date = plot_local_date(plot)
+
     def _schedule_is_stale(sched: list) -> bool:
         if not sched:
             return True
@@ -134,47 +197,30 @@ def get_plan():
                 first_date = datetime.strptime(first_date_str, "%m/%d/%y").date()
             except ValueError:
                 first_date = datetime.fromisoformat(first_date_str[:10]).date()
-            return first_date < datetime.utcnow().date()
+            return first_date < local_date
         except Exception:
             return False
 
-    if schedule_data and not force_refresh:
-        cached = schedule_data.get("schedule") or []
-        if not _schedule_is_stale(cached):
-            base = schedule_data.get("og_schedule") if use_original else cached
-            return jsonify({
-                "plot_name":   plot.get("name", f"Plot {plot_id[:5]}"),
-                "schedule":    base or [],
-                "summary":     schedule_data.get("summary",""),
-                "gem_summary": schedule_data.get("gem_summary",""),
-                "current_temp_f": current_temp_f,
-                "moisture":       moisture,
-                "sunlight":       sunlight,
-                "total_crop_age": age,
-                "kc_used":        "AI-optimized",
-                "crop_stage":     get_crop_stage(plot["crop"], age)
-            })
-
-    # 🚀 Generate & save new schedule
-    from farmer_ai import generate_ai_schedule, generate_summary, generate_gem_summary
-
-    schedule    = generate_ai_schedule(plot, daily, hourly, logs)
-    summary     = generate_summary(plot["crop"], lat, lon, schedule)
-    gem_summary = generate_gem_summary(plot["crop"], lat, lon,schedule, plot.get("name",""), plot_id)
-
-    payload = {
-        "plot_id":    plot_id,
-        "schedule":   schedule,
-        "summary":    summary,
-        "gem_summary":gem_summary
-    }
-    # only set og_schedule once
-    if not schedule_data or not schedule_data.get("og_schedule"):
-        payload["og_schedule"] = schedule
-
-    supabase.table("plot_schedules") \
-            .upsert(payload, on_conflict=["plot_id"]) \
-            .execute()
+    if schedule_data and not force_refresh and schedule_data.get("schedule"):
+        cached = schedule_data["schedule"]
+        if _schedule_is_stale(cached):
+            refresh_schedule_in_background(plot, daily, hourly, logs, schedule_data, local_date)
+        base = schedule_data.get("og_schedule") if use_original else cached
+        return jsonify({
+            "plot_name":   plot.get("name", f"Plot {plot_id[:5]}"),
+            "schedule":    base or [],
+            "summary":     schedule_data.get("summary",""),
+            "gem_summary": schedule_data.get("gem_summary",""),
+            "current_temp_f": current_temp_f,
+            "moisture":       moisture,
+            "sunlight":       sunlight,
+            "total_crop_age": age,
+            "kc_used":        "AI-optimized",
+            "crop_stage":     get_crop_stage(plot["crop"], age)
+        })
+
+    # 🚀 Generate & save new schedule (no schedule yet, or a forced refresh)
+    schedule, summary, gem_summary = generate_and_save_schedule(plot, daily, hourly, logs, schedule_data)
 
     return jsonify({
         "plot_name":   plot.get("name", f"Plot {plot_id[:5]}"),
@@ -120,6 +120,23 @@ def find_optimal_time(hourly_day):
     hour_12 = best_hour % 12 or 12
     return f"{hour_12:02d}:00 {am_pm}"
 
+REFERENCE_ET0 = 5.0  # mm/day the base liters are sized for; liters scale by ET₀ / REFERENCE_ET0
+
+def hargreaves_et0(temps_f, lat, date_obj):
+    """FAO-56 Hargreaves ET₀ (mm/day) from a day's hourly °F temps and Ra for lat / day of year."""
+    if len(temps_f) < 8 or lat is None:
+        return REFERENCE_ET0
+    tmin = (min(temps_f) - 32) * 5 / 9
+    tmax = (max(temps_f) - 32) * 5 / 9
+    doy = date_obj.timetuple().tm_yday
+    phi = np.radians(lat)
+    dr = 1 + 0.033 * np.cos(2 * np.pi / 365 * doy)
+    decl = 0.409 * np.sin(2 * np.pi / 365 * doy - 1.39)
+    ws = np.arccos(np.clip(-np.tan(phi) * np.tan(decl), -1.0, 1.0))
+    ra = max(0.0, 24 * 60 / np.pi * 0.0820 * dr * (
+        ws * np.sin(phi) * np.sin(decl) + np.cos(phi) * np.cos(decl) * np.sin(ws)))
+    return max(0.0, 0.0023 * ((tmin + tmax) / 2 + 17.8) * np.sqrt(max(tmax - tmin, 0.0)) * 0.408 * ra)
+
 def calculate_schedule(crop, area, age, lat, lon, flex_type="daily", hourly_blocks=None, soil_forecast=None):
     if not hourly_blocks:
         hourly_blocks = [[] for _ in range(7)]
@@ -142,14 +159,10 @@ def calculate_schedule(crop, area, age, lat, lon, flex_type="daily", hourly_bloc
         avg_moisture = soil_forecast[day_index] if day_index < len(soil_forecast) else 0.25
         temps = [h.get("main", {}).get("temp", 20) for h in hourly_day]
 
-        avg_temp_c = sum(temps) / len(temps) if temps else 20.0
+        date_obj = today + timedelta(days=day_index)
 
-        if len(temps) >= 12:
-            et0 = 0.0023 * ((avg_temp_c + 17.8) * np.sqrt(avg_temp_c - 10)) * 0.408 if avg_temp_c > 10 else 0.15
-            print(f"[DEBUG] Day {day_index + 1}: avg_temp_c={avg_temp_c:.2f} ET₀={et0:.3f}, Moisture={avg_moisture:.3f}")
-        else:
-            et0 = 0.15
-            print(f"[DEBUG] Day {day_index + 1}: ET₀={et0:.3f}, Moisture={avg_moisture:.3f} (avg_temp_c not available)")
+        et0 = float(hargreaves_et0(temps, lat, date_obj))
+        print(f"[DEBUG] Day {day_index + 1}: ET₀={et0:.2f} mm, Moisture={avg_moisture:.3f}")
 
         if avg_moisture > moisture_threshold:
             liters = 0.0
@@ -157,11 +170,10 @@ def calculate_schedule(crop, area, age, lat, lon, flex_type="daily", hourly_bloc
         else:
             mm_needed = max(0, (target_moisture - avg_moisture) * root_depth_mm)
             base_liters = mm_needed * area * 0.1
-            liters = round(base_liters * kc * et0 / 0.15, 2)
+            liters = round(base_liters * kc * et0 / REFERENCE_ET0, 2)
             print(f"[DEBUG] Day {day_index + 1}: mm_needed={mm_needed:.2f}, Kc={kc:.2f}, base_liters={base_liters:.2f}, FINAL={liters}L")
             optimal_time = find_optimal_time(hourly_day)
 
-        date_obj = today + timedelta(days=day_index)
         schedule.append({
             "day": f"Day {day_index + 1}",
             "date": date_obj.strftime("%m/%d/%y"),
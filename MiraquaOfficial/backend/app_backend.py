@@ -1,8 +1,9 @@
-import os, sys, json, requests, requests_cache
+import os, sys, json, time, requests, requests_cache
 from retry_requests import retry
 import pandas as pd, numpy as np
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+from concurrent.futures import TimeoutError as SharedWaitTimeout
 from datetime import datetime, timedelta
 from uuid import uuid4
 from dotenv import load_dotenv
@@ -11,6 +12,17 @@ from dateutil import tz
 from timezonefinder import TimezoneFinder
 import resource
 from utils.forecast_utils import get_forecast, calculate_schedule, find_optimal_time, dynamic_kc
+from utils.schedule_utils import horizon_days
+from utils.schedule_history_utils import schedule_hash
+from utils.model_utils import Plot, dump_schedule, normalize_date, parse_schedule, validate_zones
+from utils import task_utils
+from utils.precompute_utils import NightlyPrecompute, plot_local_date
+from utils.et0_utils import forecast_et0
+from utils.water_balance_utils import plot_water_balance
+from utils.zone_utils import plan_zones, zone_rows
+from utils.schedule_state_utils import (
+    SCHEDULE_FIELDS, apply_to_schedule, day_inputs, pin_edits, recompute, recompute_metrics, seed_state
+)
 
 # Raise file/socket limits for Render
 soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
@@ -23,11 +35,21 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
 RENDER = os.getenv("RENDER", "false").lower() == "true"
+NIGHTLY_PRECOMPUTE = os.getenv("NIGHTLY_PRECOMPUTE", "true").lower() == "true"
+# Forecast re-plans per plot at most this often (seconds); the forecast cache refreshes hourly
+FORECAST_RECOMPUTE_EVERY = int(os.getenv("FORECAST_RECOMPUTE_EVERY", "3600"))
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "farmerAI")))
-from farmer_ai import generate_summary, generate_gem_summary, process_chat_command
+from farmer_ai import generate_summary, generate_gem_summary, process_chat_command, summarize_conversation, \
+    record_schedule_change, schedule_history
+from farmerAI import model_health
+from farmerAI.chat_memory import chat_memory
+from farmerAI.chat_summary import chat_summaries
+from farmerAI.answer_cache import answer_cache
+from farmerAI.llm_metrics import llm_metrics
+from farmerAI.rate_limiter import BULK, RateLimitTimeout, gemini_limiter, priority_scope
 
 app = Flask(__name__)
 CORS(app)
@@ -48,6 +70,23 @@ def health_check():
         "timestamp": datetime.utcnow().isoformat()
     }), 200
 
+# Runtime metrics (Gemini calls, rate limiter, model breakers, chat memory)
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return jsonify({
+        "llm": llm_metrics.snapshot(),
+        "gemini_rate_limit": gemini_limiter.snapshot(),
+        "gemini_models": model_health.snapshot(),
+        "chat_memory": chat_memory.snapshot(),
+        "chat_summaries": chat_summaries.snapshot(),
+        "answer_cache": answer_cache.snapshot(),
+        "background_tasks": task_utils.snapshot(),
+        "nightly_precompute": nightly_precompute.snapshot(),
+        "schedule_recompute": recompute_metrics.snapshot(),
+        "schedule_history": schedule_history.snapshot(),
+        "timestamp": datetime.utcnow().isoformat()
+    }), 200
+
 # Error handler for database connection issues
 @app.errorhandler(500)
 def handle_server_error(e):
@@ -69,11 +108,6 @@ def handle_exception(e):
         "message": str(e) if app.debug else "Please try again later."
     }), 500
 
-CROP_KC = {
-    "corn": 1.15, "wheat": 1.0, "alfalfa": 1.2, "lettuce": 0.85,
-    "tomato": 1.05, "almond": 1.05, "default": 0.95
-}
-
 def get_total_crop_age(planting_date: str, age_at_entry: float) -> float:
     try:
         planted = datetime.fromisoformat(planting_date)
@@ -124,6 +158,227 @@ def get_plot_by_id():
             "message": str(e)
         }), 500
 
+def backfill_gem_summary(plot, schedule):
+    plot_id = plot["id"]
+    gem_summary = generate_gem_summary(
+        plot["crop"], plot.get("lat"), plot.get("lon"), schedule or [],
+        plot.get("name", ""), plot_id
+    ) or ""
+    if gem_summary:
+        supabase.table("plot_schedules") \
+                .update({"gem_summary": gem_summary}) \
+                .eq("plot_id", plot_id) \
+                .execute()
+        print(f"✅ gem_summary backfilled for plot {plot_id}")
+    return gem_summary
+
+def save_day_state(plot_id, state):
+    # Per-day state lives beside the schedule (plot_schedules.day_state); serving never depends on it
+    try:
+        supabase.table("plot_schedules").update({"day_state": state}).eq("plot_id", plot_id).execute()
+    except Exception as e:
+        print(f"⚠️ Could not save schedule day state for plot {plot_id}: {e}")
+
+def settings_hash(plot):
+    """Hash of the plot fields that feed its schedule."""
+    return schedule_hash({f: plot.get(f) for f in sorted(SCHEDULE_FIELDS)})
+
+def settings_superseded(plot):
+    """True when the stored plot row's schedule settings no longer match plot's."""
+    try:
+        res = supabase.table("plots").select(",".join(sorted(SCHEDULE_FIELDS))).eq("id", plot["id"]).maybe_single().execute()
+    except Exception as e:
+        print(f"⚠️ Could not re-read settings for plot {plot['id']}: {e}")
+        return False
+    return bool(res and res.data) and settings_hash(res.data) != settings_hash(plot)
+
+def _regenerate_schedule(plot, daily, hourly, logs, with_gem_summary, today=None):
+    from farmer_ai import generate_ai_schedule
+
+    plot_id = plot["id"]
+    start = time.perf_counter()
+    try:
+        schedule = generate_ai_schedule(plot, daily, hourly, logs, today=today)
+    except RateLimitTimeout:
+        # Keep the saved schedule; callers answer 503 and the nightly job retries later
+        print(f"⏳ Gemini quota busy, schedule for plot {plot_id} not regenerated")
+        return {"error": "AI is busy, try again shortly", "busy": True}
+    if "error" in schedule:
+        return {"error": schedule["error"]}
+    summary = generate_summary(plot["crop"], plot.get("lat"), plot.get("lon"), schedule)
+    gem_summary = None
+    if with_gem_summary:
+        gem_summary = generate_gem_summary(plot["crop"], plot.get("lat"), plot.get("lon"), schedule, plot.get("name", ""), plot_id)
+
+    # The old day state belongs to the old schedule; it's re-seeded below
+    payload = {"plot_id": plot_id, "schedule": schedule, "summary": summary, "day_state": None}
+    if gem_summary is not None:
+        payload["gem_summary"] = gem_summary
+    # A run from settings that have since changed mustn't overwrite the newer run's schedule
+    if settings_superseded(plot):
+        print(f"⏭️ Settings for plot {plot_id} changed during regeneration, not saving")
+        return {"error": "Plot settings changed, schedule is being regenerated", "busy": True}
+    # only set og_schedule once
+    existing = supabase.table("plot_schedules").select("og_schedule").eq("plot_id", plot_id).maybe_single().execute()
+    if not (existing and existing.data and existing.data.get("og_schedule")):
+        payload["og_schedule"] = schedule
+    supabase.table("plot_schedules").upsert(payload, on_conflict=["plot_id"]).execute()
+
+    # Seed per-day state so later watering logs and forecast changes only touch the days they affect
+    try:
+        age = get_total_crop_age(plot.get("planting_date"), plot.get("age_at_entry", 0.0))
+        inputs = day_inputs(plot, daily, hourly, logs, age, days=len(schedule), today=today)
+        state = seed_state(plot, schedule, inputs, daily, logs, age)
+        if state:
+            save_day_state(plot_id, state)
+    except Exception as e:
+        print(f"⚠️ Could not seed schedule day state for plot {plot_id}: {e}")
+    recompute_metrics.record("full", "regenerate", len(schedule), len(schedule), time.perf_counter() - start)
+    return {"schedule": schedule, "summary": summary, "gem_summary": gem_summary}
+
+def regenerate_schedule(plot, daily, hourly, logs, with_gem_summary=False, today=None):
+    """Generate, summarise and save a fresh schedule for a plot.
+
+    Concurrent requests for the same plot and settings (double-tapped
+    refresh) share one run: later callers wait for the running one and get
+    its result instead of making their own LLM calls. A run started from
+    other settings (/get_plan racing /update_plot_settings) isn't joined.
+    Returns {"schedule", "summary", "gem_summary"}, or {"error"} ("busy" set
+    when the shared run outlasted SHARED_WAIT_TIMEOUT, the Gemini quota
+    queue gave up, or the plot's settings changed while the run was going;
+    nothing is saved then); gem_summary is None
+    unless the run that produced the result asked for it. today is
+    the schedule's first day (the plot's local date by default, as the
+    nightly job and incremental updates use).
+    """
+    # Settings that feed the schedule are part of the key, so a run from an older plot row isn't reused
+    settings = settings_hash(plot)
+    today = today or plot_local_date(plot)
+    try:
+        result, joined = task_utils.run_shared(
+            ("schedule", plot["id"], settings, str(today)), _regenerate_schedule,
+            plot, daily, hourly, logs, with_gem_summary, today
+        )
+    except SharedWaitTimeout:
+        print(f"⏳ Timed out waiting on in-flight schedule regeneration for plot {plot['id']}")
+        return {"error": "Schedule is still being generated, try again shortly", "busy": True}
+    if joined:
+        print(f"🔗 Joined in-flight schedule regeneration for plot {plot['id']}")
+    return result
+
+def preview_schedule(plot, daily, hourly, logs, days):
+    """A schedule for a horizon longer than the plot's own, not saved (the stored one keeps the plot's horizon)."""
+    from farmer_ai import generate_ai_schedule
+
+    try:
+        schedule = generate_ai_schedule(plot, daily, hourly, logs, days=days, today=plot_local_date(plot))
+    except RateLimitTimeout:
+        return {"error": "AI is busy, try again shortly", "busy": True}
+    if "error" in schedule:
+        return {"error": schedule["error"]}
+    summary = generate_summary(plot["crop"], plot.get("lat"), plot.get("lon"), schedule)
+    return {"schedule": schedule, "summary": summary, "gem_summary": ""}
+
+def schedule_for_request(plot, daily, hourly, logs, horizon, with_gem_summary=False):
+    """regenerate_schedule at the plot's horizon, cut to this request's; longer requests get preview_schedule.
+
+    Clients asking for different horizons then never overwrite each other's stored schedule.
+    """
+    if horizon > horizon_days(plot.get("horizon_days")):
+        return preview_schedule(plot, daily, hourly, logs, horizon)
+    result = regenerate_schedule(plot, daily, hourly, logs, with_gem_summary=with_gem_summary)
+    if "error" in result:
+        return result
+    return {**result, "schedule": result["schedule"][:horizon]}
+
+def update_schedule_incrementally(plot, schedule_row, daily, hourly, logs, trigger):
+    """Recompute only the days a watering log or forecast change affects; returns the schedule to serve.
+
+    Rows without day state (saved before it existed) get it seeded from their
+    current schedule, so the next change is incremental.
+    """
+    plot_id = plot["id"]
+    schedule = (schedule_row or {}).get("schedule") or []
+    start = time.perf_counter()
+    try:
+        age = get_total_crop_age(plot.get("planting_date"), plot.get("age_at_entry", 0.0))
+        # Schedules are dated from the plot's local day (see nightly_refresh_plot)
+        local_date = plot_local_date(plot)
+        inputs = day_inputs(plot, daily, hourly, logs, age, days=len(schedule), today=local_date)
+        state, recomputed = recompute(schedule_row.get("day_state"), inputs)
+        if state is None:
+            if inputs and schedule and not schedule_row.get("day_state") \
+                    and schedule[0].get("date") == local_date.strftime("%m/%d/%y"):
+                save_day_state(plot_id, seed_state(plot, schedule, inputs, daily, logs, age))
+            return schedule
+        if recomputed:
+            updated = apply_to_schedule(schedule, state, recomputed)
+            supabase.table("plot_schedules").update({"schedule": updated, "day_state": state}) \
+                    .eq("plot_id", plot_id).execute()
+            schedule = updated
+            print(f"♻️ Recomputed {len(recomputed)}/{len(inputs)} schedule days for plot {plot_id} ({trigger})")
+        recompute_metrics.record("incremental", trigger, len(recomputed), len(inputs), time.perf_counter() - start)
+    except Exception as e:
+        print(f"⚠️ Incremental schedule update failed for plot {plot_id}: {e}")
+    return schedule
+
+_forecast_recomputed_at = {}  # plot_id -> time.time() of the last forecast re-plan queued
+
+def queue_forecast_recompute(plot, schedule_row, daily, hourly, logs):
+    """Re-plan the days a forecast change affects, in the background and at most once per FORECAST_RECOMPUTE_EVERY."""
+    plot_id = plot["id"]
+    now = time.time()
+    if now - _forecast_recomputed_at.get(plot_id, 0) < FORECAST_RECOMPUTE_EVERY:
+        return
+    _forecast_recomputed_at[plot_id] = now
+    task_utils.submit_unique(("recompute", plot_id, "forecast"), update_schedule_incrementally,
+                             plot, schedule_row, daily, hourly, logs, "forecast")
+
+def recompute_after_watering(plot_id):
+    plot_res = supabase.table("plots").select("*").eq("id", plot_id).maybe_single().execute()
+    sched_res = supabase.table("plot_schedules").select("*").eq("plot_id", plot_id).maybe_single().execute()
+    plot = plot_res.data if plot_res else None
+    schedule_row = sched_res.data if sched_res else None
+    if not plot or not schedule_row:
+        return
+    forecast = get_forecast(plot.get("lat"), plot.get("lon"), days=horizon_days(plot.get("horizon_days")))
+    logs = supabase.table("watering_log").select("*").eq("plot_id", plot_id) \
+        .order("watered_at", desc=True).limit(7).execute().data or []
+    update_schedule_incrementally(plot, schedule_row, forecast.get("daily", []), forecast.get("hourly", []),
+                                  logs, "watering")
+
+def load_all_plots():
+    return supabase.table("plots").select("*").execute().data or []
+
+def nightly_refresh_plot(plot, local_date):
+    """Regenerate one plot's schedule for its new local day, unless it already starts today."""
+    plot_id = plot["id"]
+    existing = supabase.table("plot_schedules").select("schedule").eq("plot_id", plot_id).maybe_single().execute()
+    schedule = (existing.data or {}).get("schedule") if existing else None
+    if schedule and schedule[0].get("date") == local_date.strftime("%m/%d/%y"):
+        return "fresh"
+
+    forecast = get_forecast(plot.get("lat"), plot.get("lon"), days=horizon_days(plot.get("horizon_days")))
+    logs = supabase.table("watering_log").select("*").eq("plot_id", plot_id) \
+        .order("watered_at", desc=True).limit(7).execute().data or []
+    # Batch work yields the Gemini quota to live users
+    with priority_scope(BULK):
+        # Dated from the plot's local day, so the "fresh" check above matches tomorrow night
+        result = regenerate_schedule(plot, forecast.get("daily", []), forecast.get("hourly", []), logs,
+                                     with_gem_summary=True, today=local_date)
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    print(f"🌙 Nightly schedule refreshed for plot {plot_id} ({local_date})")
+    return "refreshed"
+
+nightly_precompute = NightlyPrecompute(load_all_plots, nightly_refresh_plot)
+
+# Started from the first request, so only the serving process runs it (not the reloader parent)
+@app.before_request
+def start_background_jobs():
+    if NIGHTLY_PRECOMPUTE:
+        nightly_precompute.start()
+
 @app.route("/get_plan", methods=["POST"])
 def get_plan():
     data = request.get_json()
@@ -144,9 +399,13 @@ def get_plan():
 
     lat = plot.get("lat"); lon = plot.get("lon")
     age = get_total_crop_age(plot.get("planting_date"), plot.get("age_at_entry", 0.0))
+    # Planning horizon: the stored schedule has the plot's; a request may ask for another
+    plot_horizon = horizon_days(plot.get("horizon_days"))
+    horizon = horizon_days(data.get("horizon_days") or plot_horizon)
+    plot = {**plot, "horizon_days": plot_horizon}
 
     # 🌦️ Get forecast & logs
-    forecast = get_forecast(lat, lon)
+    forecast = get_forecast(lat, lon, days=max(horizon, plot_horizon))
     daily    = forecast.get("daily", [])
     hourly   = forecast.get("hourly", [])
     current  = forecast.get("current", {})
@@ -174,31 +433,37 @@ def get_plan():
     current_temp_f = round(np.mean(temp_vals),1) if temp_vals else 72.0
 
     moist_vals = [d.get("soil_moisture") for d in daily[:1] if d.get("soil_moisture") is not None]
-    moisture = round(np.mean(moist_vals),2) if moist_vals else 28.0
+    if moist_vals:
+        moisture = round(np.mean(moist_vals),2)
+    else:
+        # No soil sensor data in the forecast: root-zone moisture from the water balance
+        balance = plot_water_balance(plot, daily, logs, forecast_et0(daily, hourly, lat), age)
+        moisture = round(balance["today"]["moisture"] * 100, 1) if balance else 28.0
 
     cloud_vals = [h.get("clouds",{}).get("all") for h in hourly[:24] if "clouds" in h]
     sunlight = round(100 - np.mean(cloud_vals),0) if cloud_vals else 70.0
 
-    # ✅ Cached schedule path
-    if schedule_data and not force_refresh:
-        base = schedule_data.get("og_schedule") if use_original else schedule_data.get("schedule")
+    # 🧩 Per-zone schedules for plots split into irrigation zones
+    zones = None
+    if plot.get("zones"):
+        try:
+            plan = plan_zones(plot, daily, hourly, logs, age, days=horizon)
+            zones = zone_rows(plan) if plan else None
+        except Exception as e:
+            print(f"⚠️ Zone plan failed for plot {plot_id}: {e}")
+
+    # ✅ Cached schedule path; a shorter horizon is a slice of the stored schedule
+    if schedule_data and not force_refresh and len(schedule_data.get("schedule") or []) >= horizon:
+        base = ((schedule_data.get("og_schedule") if use_original else schedule_data.get("schedule")) or [])[:horizon]
+        # Forecast changes are picked up off the request path, for just the days they affect;
+        # they show up on a later fetch
+        queue_forecast_recompute(plot, schedule_data, daily, hourly, logs)
         gem_summary = schedule_data.get("gem_summary") or ""
 
-        # If gem_summary is missing, generate it now and persist it
+        # If gem_summary is missing, backfill it off the request path (once per plot);
+        # it shows up on a later fetch
         if not gem_summary:
-            try:
-                from farmer_ai import generate_gem_summary
-                gem_summary = generate_gem_summary(
-                    plot["crop"], lat, lon, base or [],
-                    plot.get("name", ""), plot_id
-                ) or ""
-                if gem_summary:
-                    supabase.table("plot_schedules") \
-                            .update({"gem_summary": gem_summary}) \
-                            .eq("plot_id", plot_id) \
-                            .execute()
-            except Exception as e:
-                print(f"⚠️ gem_summary backfill failed: {e}")
+            task_utils.submit_unique(("gem_summary", plot_id), backfill_gem_summary, plot, schedule_data.get("schedule"))
 
         return jsonify({
             "plot_name":   plot.get("name", f"Plot {plot_id[:5]}"),
@@ -210,29 +475,19 @@ def get_plan():
             "sunlight":       sunlight,
             "total_crop_age": age,
             "kc_used":        "AI-optimized",
-            "crop_stage":     get_crop_stage(plot["crop"], age)
+            "crop_stage":     get_crop_stage(plot["crop"], age),
+            "zones":          zones
         })
 
-    # 🚀 Generate & save new schedule
-    from farmer_ai import generate_ai_schedule, generate_summary, generate_gem_summary
-
-    schedule    = generate_ai_schedule(plot, daily, hourly, logs)
-    summary     = generate_summary(plot["crop"], lat, lon, schedule)
-    gem_summary = generate_gem_summary(plot["crop"], lat, lon,schedule, plot.get("name",""), plot_id)
-
-    payload = {
-        "plot_id":    plot_id,
-        "schedule":   schedule,
-        "summary":    summary,
-        "gem_summary":gem_summary
-    }
-    # only set og_schedule once
-    if not schedule_data or not schedule_data.get("og_schedule"):
-        payload["og_schedule"] = schedule
-
-    supabase.table("plot_schedules") \
-            .upsert(payload, on_conflict=["plot_id"]) \
-            .execute()
+    # 🚀 Generate & save new schedule (shared with any regeneration already running)
+    result = schedule_for_request(plot, daily, hourly, logs, horizon, with_gem_summary=True)
+    if "error" in result:
+        return jsonify(result), 503 if result.get("busy") else 500
+    schedule, summary, gem_summary = result["schedule"], result["summary"], result["gem_summary"]
+    if gem_summary is None:
+        # Joined a run that didn't make one
+        task_utils.submit_unique(("gem_summary", plot_id), backfill_gem_summary, plot, schedule)
+        gem_summary = ""
 
     return jsonify({
         "plot_name":   plot.get("name", f"Plot {plot_id[:5]}"),
@@ -244,32 +499,51 @@ def get_plan():
         "sunlight":       sunlight,
         "total_crop_age": age,
         "kc_used":        "AI-optimized",
-        "crop_stage":     get_crop_stage(plot["crop"], age)
+        "crop_stage":     get_crop_stage(plot["crop"], age),
+        "zones":          zones
     })
 
 
 
+def warm_new_plot(plot):
+    """Backfill coordinates, fetch the forecast and generate the first schedule for a new plot.
+
+    Runs in the background after /add_plot, so the first /get_plan is a cache
+    hit (or joins this run if it's still going).
+    """
+    plot_id = plot["id"]
+    if plot.get("lat") is None or plot.get("lon") is None:
+        try:
+            lat, lon = get_lat_lon(plot.get("zip_code", "00000"))
+            supabase.table("plots").update({"lat": lat, "lon": lon}).eq("id", plot_id).execute()
+            plot = {**plot, "lat": lat, "lon": lon}
+            print(f"📍 Backfilled coordinates for new plot {plot_id}: lat={lat}, lon={lon}")
+        except Exception as e:
+            print(f"⚠️ Could not geocode new plot {plot_id}: {e}")
+            return
+
+    # Also warms the forecast cache for the first /get_plan
+    forecast = get_forecast(plot["lat"], plot["lon"], days=horizon_days(plot.get("horizon_days")))
+    result = regenerate_schedule(plot, forecast.get("daily", []), forecast.get("hourly", []), [], with_gem_summary=True)
+    if "error" not in result:
+        print(f"✅ First schedule ready for new plot {plot_id}")
+
 @app.route("/add_plot", methods=["POST"])
 def add_plot():
     data = request.get_json()
 
-    # ✅ Validation: planting_date
-    if "planting_date" in data:
-        try:
-            plant_date = datetime.strptime(data["planting_date"], "%Y-%m-%d")
-            if plant_date > datetime.utcnow():
-                return jsonify({"success": False, "error": "Planting date cannot be in the future"}), 400
-        except ValueError:
-            return jsonify({"success": False, "error": "Invalid planting_date format. Use YYYY-MM-DD."}), 400
-
-    # ✅ Validation: age_at_entry
-    if "age_at_entry" in data:
-        try:
-            float(data["age_at_entry"])
-        except:
-            return jsonify({"success": False, "error": "Age at entry must be a number"}), 400
+    # ✅ Validation: planting date and age (required), area, coordinates, horizon_days, kc_curve, zones
+    try:
+        Plot.from_row(data).validate(partial=False)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
 
     res = supabase.table("plots").insert(data).execute()
+
+    # 🚀 Get the first plan ready before the user opens it
+    if res.data:
+        task_utils.submit_unique(("new_plot", res.data[0]["id"]), warm_new_plot, res.data[0])
+
     return jsonify(res.data[0] if res.data else {"message": "Added"}), 200
 
 
@@ -293,13 +567,19 @@ def get_plots():
 def revert_schedule():
     data = request.get_json()
     plot_id = data.get("plot_id")
-    logs = supabase.table("farmerAI_chatlog").select("original_schedule") \
-        .eq("plot_id", plot_id).order("created_at", desc=True).limit(1).execute()
-    if not logs.data or not logs.data[0].get("original_schedule"):
+    # Undo the latest edit not already reverted (rebuilt from the delta history), so reverting again goes further back
+    target = schedule_history.undo_target(plot_id)
+    previous = schedule_history.load(plot_id, target["parent_hash"]) if target else None
+    if previous is None:
         return jsonify({"error": "No previous schedule found"}), 404
+    current = supabase.table("plot_schedules").select("schedule").eq("plot_id", plot_id).execute()
+    # Day state is re-seeded from the restored schedule on the next /get_plan
     supabase.table("plot_schedules").update({
-        "schedule": logs.data[0]["original_schedule"]
+        "schedule": previous,
+        "day_state": None
     }).eq("plot_id", plot_id).execute()
+    record_schedule_change(plot_id, current.data[0]["schedule"] if current.data else [], previous, "revert",
+                           undoes=target["version"])
     return jsonify({"success": True})
 
 @app.route('/update_plot_settings', methods=['POST'])
@@ -311,10 +591,20 @@ def update_plot_settings():
     if not plot_id:
         return jsonify({"success": False, "error": "Missing plot_id"}), 400
 
+    if updates.get("zones") is not None:
+        try:
+            validate_zones(updates["zones"])
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
     try:
         # Step 1: Update plot fields
         supabase.table("plots").update(updates).eq("id", plot_id).execute()
 
+        # Renames and other edits that don't feed the schedule keep it as is
+        if not SCHEDULE_FIELDS & set(updates):
+            return jsonify({ "success": True })
+
         # Step 2: Fetch updated plot
         result = supabase.table("plots").select("*").eq("id", plot_id).single().execute()
         plot = result.data
@@ -332,31 +622,16 @@ def update_plot_settings():
         plot_name = plot.get("name", f"Plot {plot_id[:5]}")
 
         # 📦 Get forecast and logs
-        forecast = get_forecast(lat, lon)
+        forecast = get_forecast(lat, lon, days=horizon_days(plot.get("horizon_days")))
         daily = forecast.get("daily", [])
         hourly = forecast.get("hourly", [])
         logs_res = supabase.table("watering_log").select("*").eq("plot_id", plot_id).order("watered_at", desc=True).limit(7).execute()
         logs = logs_res.data or []
 
-        # 🤖 AI Schedule
-        from farmer_ai import generate_ai_schedule
-        schedule = generate_ai_schedule(plot, daily, hourly, logs)
-        summary = generate_summary(crop, lat, lon, schedule)
-
-        # 💾 Save schedule to plot_schedules
-        existing = supabase.table("plot_schedules").select("*").eq("plot_id", plot_id).maybe_single().execute()
-        existing_data = existing.data or {}
-
-        payload = {
-            "plot_id": plot_id,
-            "schedule": schedule,
-            "summary": summary
-        }
-
-        if not existing_data.get("og_schedule"):
-            payload["og_schedule"] = schedule
-
-        supabase.table("plot_schedules").upsert(payload, on_conflict=["plot_id"]).execute()
+        # 🤖 AI Schedule, saved to plot_schedules
+        result = regenerate_schedule(plot, daily, hourly, logs)
+        if "error" in result:
+            return jsonify({ "success": False, "error": result["error"] }), 503 if result.get("busy") else 500
 
         return jsonify({ "success": True })
 
@@ -378,9 +653,13 @@ def generate_ai_schedule_route():
     if not plot:
         return jsonify({"error": "Plot not found"}), 404
 
+    plot_horizon = horizon_days(plot.get("horizon_days"))
+    horizon = horizon_days(data.get("horizon_days") or plot_horizon)
+    plot = {**plot, "horizon_days": plot_horizon}
+
     # 📦 Weather
     lat, lon = plot["lat"], plot["lon"]
-    forecast = get_forecast(lat, lon)
+    forecast = get_forecast(lat, lon, days=max(horizon, plot_horizon))
     daily = forecast.get("daily", [])
     hourly = forecast.get("hourly", [])
 
@@ -388,24 +667,12 @@ def generate_ai_schedule_route():
     logs_res = supabase.table("watering_log").select("*").eq("plot_id", plot_id).order("watered_at", desc=True).limit(7).execute()
     logs = logs_res.data or []
 
-    # 🤖 AI schedule
-    from farmer_ai import generate_ai_schedule, generate_summary
-    schedule = generate_ai_schedule(plot, daily, hourly, logs)
-
-    if "error" in schedule:
-        return jsonify(schedule), 500
-
-    # 📄 Save to Supabase
-    summary = generate_summary(plot["crop"], lat, lon, schedule)
-
-    supabase.table("plot_schedules").upsert({
-        "plot_id": plot_id,
-        "schedule": schedule,
-        
-        "summary": summary
-    }, on_conflict=["plot_id"]).execute()
+    # 🤖 AI schedule, saved to Supabase at the plot's horizon (longer requests aren't saved)
+    result = schedule_for_request(plot, daily, hourly, logs, horizon)
+    if "error" in result:
+        return jsonify(result), 503 if result.get("busy") else 500
 
-    return jsonify({ "success": True, "schedule": schedule, "summary": summary })
+    return jsonify({ "success": True, "schedule": result["schedule"], "summary": result["summary"] })
 
 
 
@@ -420,14 +687,17 @@ def water_now():
         return jsonify({"success": False, "error": "Missing data"}), 400
 
     try:
+        log_id = str(uuid4())
         supabase.table("watering_log").insert({
-            "id": str(uuid4()),
+            "id": log_id,
             "plot_id": plot_id,
             "duration_minutes": duration_minutes,
             "watered_at": datetime.utcnow().isoformat()
         }).execute()
 
         print(f"✅ Simulated watering plot {plot_id} for {duration_minutes} minutes.")
+        # Re-plan just the days this watering affects, off the request path
+        task_utils.submit_unique(("recompute", log_id), recompute_after_watering, plot_id)
         return jsonify({"success": True})
 
     except Exception as e:
@@ -435,66 +705,98 @@ def water_now():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-@app.route("/chat", methods=["POST"])
-def chat():
-    data = request.get_json()
-    print(f"📥 Chat request received from plot: {data.get('plotId')}")
-
-    prompt = data.get("prompt")
-    plot_id = data.get("plotId")
-    chat_session_id = data.get("chat_session_id")
-    user_id = data.get("userId")  # Get user_id from frontend
+GENERAL_CHAT_ARGS = {
+    "crop": "general",
+    "lat": 37.7749,
+    "lon": -122.4194,
+    "plot_name": "General Garden",
+    "plot_id": "general",
+    "weather": {},
+    "plot": {},
+    "daily": [],
+    "hourly": [],
+    "logs": [],
+    "age": 0
+}
 
+def resolve_chat_session_id(chat_session_id):
     # Ensure chat_session_id is a valid UUID
     if not chat_session_id:
-        chat_session_id = str(uuid4())
-    else:
-        # Try to validate/convert to UUID
-        try:
-            from uuid import UUID
-            # This will raise ValueError if not a valid UUID
-            UUID(chat_session_id)
-        except (ValueError, AttributeError):
-            # If invalid, generate a new one
-            print(f"⚠️ Invalid chat_session_id format, generating new UUID")
-            chat_session_id = str(uuid4())
-
-    if not prompt:
-        return jsonify({"success": False, "error": "Missing prompt"}), 400
-
+        return str(uuid4())
+    try:
+        from uuid import UUID
+        # This will raise ValueError if not a valid UUID
+        UUID(chat_session_id)
+        return chat_session_id
+    except (ValueError, AttributeError):
+        # If invalid, generate a new one
+        print(f"⚠️ Invalid chat_session_id format, generating new UUID")
+        return str(uuid4())
+
+def load_conversation_summary(history_key):
+    """Latest stored context_summary for a conversation ("session" or "plot" key)."""
+    kind, value = history_key
+    column = "chat_session_id" if kind == "session" else "plot_id"
+    try:
+        res = supabase.table("farmerAI_chatlog") \
+            .select("context_summary") \
+            .eq(column, value) \
+            .neq("context_summary", "") \
+            .order("created_at", desc=True) \
+            .limit(1) \
+            .execute()
+        return res.data[0]["context_summary"] if res.data else ""
+    except Exception as e:
+        print(f"⚠️ Could not fetch conversation summary: {e}")
+        return ""
+
+def refresh_conversation_summary(history_key, row_id):
+    summary = chat_summaries.refresh(history_key, summarize_conversation)
+    if summary is None:
+        return
+    # Stored on the newest row, which is where load_conversation_summary looks
+    supabase.table("farmerAI_chatlog").update({"context_summary": summary}).eq("id", row_id).execute()
+    print(f"🧾 Conversation summary refreshed for {history_key[0]} {history_key[1]}")
+
+def build_chat_context(prompt, plot_id, chat_session_id, user_id):
+    """Gather everything process_chat_command needs for one chat turn.
+
+    Returns (chat_args, log_row): the keyword arguments for process_chat_command
+    and the farmerAI_chatlog fields the turn should be saved under. log_row has
+    "with_schedule" set when the plot's refreshed schedule belongs in the log,
+    and "history_key" naming the conversation whose rolling summary it extends.
+    """
     # Handle general queries (no specific plot)
     if not plot_id or plot_id == "default" or plot_id == "general":
-        try:
-            # Fetch user's plots for context
-            user_plots = []
-            user_location = None
-            if user_id:
-                try:
-                    plots_res = supabase.table("plots").select("*").eq("user_id", user_id).execute()
-                    user_plots = plots_res.data or []
-                    print(f"📊 Found {len(user_plots)} plots for user {user_id}")
-
-                    # Get location from first plot that has coordinates
-                    for p in user_plots:
-                        if p.get('lat') and p.get('lon'):
-                            user_location = (p['lat'], p['lon'])
-                            break
-                except Exception as e:
-                    print(f"⚠️ Could not fetch user plots: {e}")
-
-            # Get weather for user's location
-            forecast = {}
-            hourly_data = []
-            if user_location:
-                try:
-                    forecast = get_forecast(user_location[0], user_location[1])
-                    hourly_data = forecast.get("hourly", [])
-                    print(f"🌦️ Fetched weather for location: {user_location}")
-                except Exception as e:
-                    print(f"⚠️ Could not fetch weather: {e}")
-
-            # Get recent chat history for context
-            recent_chats = []
+        # Fetch user's plots for context
+        user_plots = []
+        user_location = None
+        if user_id:
+            try:
+                plots_res = supabase.table("plots").select("*").eq("user_id", user_id).execute()
+                user_plots = plots_res.data or []
+                print(f"📊 Found {len(user_plots)} plots for user {user_id}")
+
+                # Get location from first plot that has coordinates
+                for p in user_plots:
+                    if p.get('lat') and p.get('lon'):
+                        user_location = (p['lat'], p['lon'])
+                        break
+            except Exception as e:
+                print(f"⚠️ Could not fetch user plots: {e}")
+
+        # Get weather for user's location
+        hourly_data = []
+        if user_location:
+            try:
+                forecast = get_forecast(user_location[0], user_location[1])
+                hourly_data = forecast.get("hourly", [])
+                print(f"🌦️ Fetched weather for location: {user_location}")
+            except Exception as e:
+                print(f"⚠️ Could not fetch weather: {e}")
+
+        # Get recent chat history for context
+        def load_session_chats():
             try:
                 chats_res = supabase.table("farmerAI_chatlog") \
                     .select("prompt, reply, created_at") \
@@ -502,169 +804,52 @@ def chat():
                     .order("created_at", desc=True) \
                     .limit(5) \
                     .execute()
-                recent_chats = list(reversed(chats_res.data or []))  # Oldest first
+                return list(reversed(chats_res.data or []))  # Oldest first
             except Exception as e:
                 print(f"⚠️ Could not fetch chat history: {e}")
-
-            result = process_chat_command(
-                prompt=prompt,
-                crop="general",
-                lat=user_location[0] if user_location else 37.7749,
-                lon=user_location[1] if user_location else -122.4194,
-                plot_name="General Garden",
-                plot_id="general",
-                weather={},
-                plot={"user_plots": user_plots, "recent_chats": recent_chats, "user_location": user_location},
-                daily=[],
-                hourly=hourly_data,  # Pass weather data
-                logs=[],
-                age=0
-            )
-            reply = result["reply"]
-
-            # 📝 Save general chat history
-            try:
-                supabase.table("farmerAI_chatlog").insert({
-                    "id": str(uuid4()),
-                    "plot_id": "general",
-                    "user_id": user_id,  # Save user_id if available
-                    "prompt": prompt,
-                    "reply": reply,
-                    "created_at": datetime.utcnow().isoformat(),
-                    "original_schedule": [],
-                    "modified_schedule": [],
-                    "reverted": False,
-                    "is_user_message": True,
-                    "role": "user",
-                    "message_index": 0,
-                    "context_summary": "",
-                    "chat_session_id": chat_session_id,
-                    "edited": False
-                }).execute()
-                print("✅ General chat history saved successfully")
-            except Exception as save_error:
-                print(f"⚠️ Failed to save general chat history: {save_error}")
-                import traceback
-                traceback.print_exc()
-                # Continue without saving - don't crash the chat
-
-            return jsonify({"success": True, "reply": reply})
-        except Exception as e:
-            print(f"❌ Error in general chat: {e}")
-            return jsonify({"success": False, "error": str(e)}), 500
+                return []
+        history_key = ("session", chat_session_id)
+        conversation_summary = chat_summaries.get(history_key, lambda: load_conversation_summary(history_key))
+        raw_turns = chat_summaries.raw_turns(history_key)
+        recent_chats = chat_memory.recent(history_key, load_session_chats, limit=max(5, raw_turns))
+
+        chat_args = {
+            **GENERAL_CHAT_ARGS,
+            "lat": user_location[0] if user_location else GENERAL_CHAT_ARGS["lat"],
+            "lon": user_location[1] if user_location else GENERAL_CHAT_ARGS["lon"],
+            "plot": {"user_id": user_id, "user_plots": user_plots, "recent_chats": recent_chats,
+                     "user_location": user_location, "conversation_summary": conversation_summary,
+                     "raw_turns": raw_turns},
+            "hourly": hourly_data  # Pass weather data
+        }
+        return chat_args, {"plot_id": "general", "user_id": user_id, "with_schedule": False, "history_key": history_key}
 
     # 🔍 Fetch plot for specific plot queries
-    plot = None
     print(f"🔍 Fetching plot data for plot_id: {plot_id}")
     try:
         plot_res = supabase.table("plots").select("*").eq("id", plot_id).single().execute()
         plot = plot_res.data
         print(f"✅ Plot data fetched: {plot}")
-        if not plot:
-            # Plot not found, but still provide helpful advice
-            print(f"⚠️ Plot {plot_id} not found, providing general advice")
-            result = process_chat_command(
-                prompt=prompt,
-                crop="general",
-                lat=37.7749,
-                lon=-122.4194,
-                plot_name="General Garden",
-                plot_id="general",
-                weather={},
-                plot={},
-                daily=[],
-                hourly=[],
-                logs=[],
-                age=0
-            )
-            reply = result["reply"]
-
-            # 📝 Save chat history even when plot not found
-            try:
-                supabase.table("farmerAI_chatlog").insert({
-                    "id": str(uuid4()),
-                    "plot_id": plot_id,
-                    "user_id": None,
-                    "prompt": prompt,
-                    "reply": reply,
-                    "created_at": datetime.utcnow().isoformat(),
-                    "original_schedule": [],
-                    "modified_schedule": [],
-                    "reverted": False,
-                    "is_user_message": True,
-                    "role": "user",
-                    "message_index": 0,
-                    "context_summary": "",
-                    "chat_session_id": chat_session_id,
-                    "edited": False
-                }).execute()
-                print("✅ Chat history saved (plot not found case)")
-            except Exception as save_error:
-                print(f"⚠️ Failed to save chat history: {save_error}")
-
-            return jsonify({"success": True, "reply": reply})
     except Exception as e:
         print(f"❌ Error fetching plot: {e}")
         # Plot fetch failed, but still provide helpful advice
         print(f"⚠️ Plot fetch failed, providing general advice")
-        result = process_chat_command(
-            prompt=prompt,
-            crop="general",
-            lat=37.7749,
-            lon=-122.4194,
-            plot_name="General Garden",
-            plot_id="general",
-            weather={},
-            plot={},
-            daily=[],
-            hourly=[],
-            logs=[],
-            age=0
-        )
-        reply = result["reply"]
+        return dict(GENERAL_CHAT_ARGS), {"plot_id": plot_id, "user_id": None, "with_schedule": False, "history_key": None}
 
-        # 📝 Save chat history even when plot fetch fails
-        try:
-            supabase.table("farmerAI_chatlog").insert({
-                "id": str(uuid4()),
-                "plot_id": plot_id if plot_id else "general",
-                "user_id": None,
-                "prompt": prompt,
-                "reply": reply,
-                "created_at": datetime.utcnow().isoformat(),
-                "original_schedule": [],
-                "modified_schedule": [],
-                "reverted": False,
-                "is_user_message": True,
-                "role": "user",
-                "message_index": 0,
-                "context_summary": "",
-                "chat_session_id": chat_session_id,
-                "edited": False
-            }).execute()
-            print("✅ Chat history saved (plot fetch failed case)")
-        except Exception as save_error:
-            print(f"⚠️ Failed to save chat history: {save_error}")
-
-        return jsonify({"success": True, "reply": reply})
-
-    # If we get here, we have a valid plot
     if not plot:
-        print(f"❌ No plot data available for {plot_id}")
-        return jsonify({"success": False, "error": "Plot data not available"}), 500
+        # Plot not found, but still provide helpful advice
+        print(f"⚠️ Plot {plot_id} not found, providing general advice")
+        return dict(GENERAL_CHAT_ARGS), {"plot_id": plot_id, "user_id": None, "with_schedule": False, "history_key": None}
 
     # 📌 Extract plot details
-    user_id = plot.get("user_id")
     crop = plot.get("crop")
-    area = plot.get("area", 1.0)
-    flex_type = plot.get("flex_type", "daily")
     zip_code = plot.get("zip_code", "00000")
     planting_date = plot.get("planting_date")
     age_at_entry = plot.get("age_at_entry", 0.0)
     lat, lon = plot.get("lat"), plot.get("lon")
     plot_name = plot.get("name", f"Plot {plot_id[:5]}")
     age = get_total_crop_age(planting_date, age_at_entry)
-    
+
     # Handle missing coordinates by using zip code fallback
     if lat is None or lon is None:
         print(f"⚠️ Plot {plot_name} has no coordinates, using zip code fallback")
@@ -676,79 +861,192 @@ def chat():
             # Use default coordinates as fallback
             lat, lon = 37.7749, -122.4194
             print(f"📍 Using default coordinates: lat={lat}, lon={lon}")
-    
+
     print(f"🌱 Plot context: crop={crop}, lat={lat}, lon={lon}, plot_name={plot_name}, age={age}")
 
     # 📦 Weather forecast (Open-Meteo)
     forecast = get_forecast(lat, lon)
-    daily = forecast.get("daily", [])
-    hourly = forecast.get("hourly", [])
-    current_weather = forecast.get("current", {})
 
     # 💧 Watering logs
     logs_res = supabase.table("watering_log") \
         .select("*").eq("plot_id", plot_id) \
         .order("watered_at", desc=True).limit(7).execute()
-    logs = logs_res.data or []
-
-    # 💬 Fetch recent chat history for conversation context
-    recent_chats = []
-    try:
-        chats_res = supabase.table("farmerAI_chatlog") \
-            .select("prompt, reply, created_at") \
-            .eq("plot_id", plot_id) \
-            .order("created_at", desc=True) \
-            .limit(6) \
-            .execute()
-        recent_chats = list(reversed(chats_res.data or []))  # Oldest first
-    except Exception as e:
-        print(f"⚠️ Could not fetch plot chat history: {e}")
-
-    # 📥 Call AI chat processor
-    result = process_chat_command(
-        prompt=prompt,
-        crop=crop,
-        lat=lat,
-        lon=lon,
-        plot_name=plot_name,
-        plot_id=plot_id,
-        weather=current_weather,
-        plot={"recent_chats": recent_chats, **plot},  # Add chat history to plot data
-        daily=daily,
-        hourly=hourly,
-        logs=logs,
-        age=age  # ✅ passed in
-    )
-    reply = result["reply"]
-    schedule_updated = result.get("schedule_updated", False)
 
-    # 🔁 Get updated schedule
-    refreshed = supabase.table("plot_schedules").select("schedule").eq("plot_id", plot_id).execute()
-    updated_schedule = refreshed.data[0]["schedule"] if refreshed.data else []
+    # 💬 Recent chat history for conversation context (buffered in memory, DB on a miss)
+    def load_plot_chats():
+        try:
+            chats_res = supabase.table("farmerAI_chatlog") \
+                .select("prompt, reply, created_at") \
+                .eq("plot_id", plot_id) \
+                .order("created_at", desc=True) \
+                .limit(6) \
+                .execute()
+            return list(reversed(chats_res.data or []))  # Oldest first
+        except Exception as e:
+            print(f"⚠️ Could not fetch plot chat history: {e}")
+            return []
+    history_key = ("plot", plot_id)
+    conversation_summary = chat_summaries.get(history_key, lambda: load_conversation_summary(history_key))
+    raw_turns = chat_summaries.raw_turns(history_key)
+    recent_chats = chat_memory.recent(history_key, load_plot_chats, limit=max(6, raw_turns))
+
+    chat_args = {
+        "crop": crop,
+        "lat": lat,
+        "lon": lon,
+        "plot_name": plot_name,
+        "plot_id": plot_id,
+        "weather": forecast.get("current", {}),
+        "plot": {"recent_chats": recent_chats, "conversation_summary": conversation_summary,
+                 "raw_turns": raw_turns, **plot},  # Add chat history to plot data
+        "daily": forecast.get("daily", []),
+        "hourly": forecast.get("hourly", []),
+        "logs": logs_res.data or [],
+        "age": age
+    }
+    return chat_args, {"plot_id": plot_id, "user_id": plot.get("user_id"), "with_schedule": True, "history_key": history_key}
+
+def save_chat_log(prompt, reply, chat_session_id, log_row):
+    schedule = []
+    schedule_hash = None
+    if log_row["with_schedule"]:
+        # 🔁 Hash of the schedule as of this message; the content lives once in the schedule history
+        refreshed = supabase.table("plot_schedules").select("schedule").eq("plot_id", log_row["plot_id"]).execute()
+        schedule = refreshed.data[0]["schedule"] if refreshed.data else []
+        try:
+            schedule_hash = schedule_history.remember(log_row["plot_id"], schedule)
+        except Exception as e:
+            print(f"⚠️ Could not version schedule for chat log: {e}")
 
-    # 📝 Save chat history
+    history_key = log_row.get("history_key")
+    context_summary = chat_summaries.get(history_key, lambda: "") if history_key else ""
+    row_id = str(uuid4())
+    created_at = datetime.utcnow().isoformat()
+    saved = False
     try:
         supabase.table("farmerAI_chatlog").insert({
-            "id": str(uuid4()),
-            "plot_id": plot_id,
-            "user_id": user_id,
+            "id": row_id,
+            "plot_id": log_row["plot_id"],
+            "user_id": log_row["user_id"],
             "prompt": prompt,
             "reply": reply,
-            "created_at": datetime.utcnow().isoformat(),
-            "original_schedule": updated_schedule,
-            "modified_schedule": updated_schedule,
+            "created_at": created_at,
+            "schedule_hash": schedule_hash,
+            # Legacy full copies: the Expo backend still reverts from original_schedule;
+            # drop them once it reads the delta history
+            "original_schedule": schedule,
+            "modified_schedule": schedule,
             "reverted": False,
             "is_user_message": True,
             "role": "user",
             "message_index": 0,
-            "context_summary": "",
+            "context_summary": context_summary,
             "chat_session_id": chat_session_id,
             "edited": False
         }).execute()
+        saved = True
+        print(f"✅ Chat history saved for plot {log_row['plot_id']}")
     except Exception as e:
+        # Continue without saving - don't crash the chat
         print(f"⚠️ Failed to save chat history: {e}")
 
-    return jsonify({"success": True, "reply": reply, "schedule_updated": schedule_updated})
+    # Keep buffered conversations in step with the log (session and plot views of it)
+    turn = {"prompt": prompt, "reply": reply, "created_at": created_at}
+    chat_memory.append(("session", chat_session_id), turn)
+    chat_memory.append(("plot", log_row["plot_id"]), turn)
+
+    # Fold older turns into the rolling summary off the request path
+    if saved and history_key and chat_summaries.add_turn(history_key, turn):
+        task_utils.submit_unique(("chat_summary", history_key), refresh_conversation_summary, history_key, row_id)
+
+@app.route("/chat", methods=["POST"])
+def chat():
+    data = request.get_json()
+    print(f"📥 Chat request received from plot: {data.get('plotId')}")
+
+    prompt = data.get("prompt")
+    plot_id = data.get("plotId")
+    user_id = data.get("userId")  # Get user_id from frontend
+    chat_session_id = resolve_chat_session_id(data.get("chat_session_id"))
+
+    if not prompt:
+        return jsonify({"success": False, "error": "Missing prompt"}), 400
+
+    try:
+        chat_args, log_row = build_chat_context(prompt, plot_id, chat_session_id, user_id)
+        # 📥 Call AI chat processor
+        result = process_chat_command(prompt=prompt, **chat_args)
+    except Exception as e:
+        print(f"❌ Error in chat: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+    reply = result["reply"]
+    # 📝 Save chat history
+    save_chat_log(prompt, reply, chat_session_id, log_row)
+
+    if not log_row["with_schedule"]:
+        return jsonify({"success": True, "reply": reply})
+    return jsonify({"success": True, "reply": reply, "schedule_updated": result.get("schedule_updated", False)})
+
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.route("/chat_stream", methods=["POST"])
+def chat_stream():
+    """Streaming variant of /chat, relayed as Server-Sent Events.
+
+    Emits "token" events ({"text"}) as the reply arrives, then one "done" event
+    with schedule_updated, ttft_ms and total_ms. The full reply is saved to
+    farmerAI_chatlog once the stream has finished.
+    """
+    data = request.get_json()
+    print(f"📥 Chat stream request received from plot: {data.get('plotId')}")
+
+    prompt = data.get("prompt")
+    plot_id = data.get("plotId")
+    user_id = data.get("userId")
+    chat_session_id = resolve_chat_session_id(data.get("chat_session_id"))
+
+    if not prompt:
+        return jsonify({"success": False, "error": "Missing prompt"}), 400
+
+    started_at = time.perf_counter()
+    try:
+        chat_args, log_row = build_chat_context(prompt, plot_id, chat_session_id, user_id)
+        result = process_chat_command(prompt=prompt, stream=True, **chat_args)
+    except Exception as e:
+        print(f"❌ Error in chat stream: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+    def generate():
+        chunks = result.get("reply_stream") or [result.get("reply", "")]
+        parts = []
+        ttft_ms = None
+        try:
+            for text in chunks:
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - started_at) * 1000, 1)
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+        finally:
+            reply = "".join(parts).strip()
+            total_ms = round((time.perf_counter() - started_at) * 1000, 1)
+            print(f"⏱️ Chat stream: first token {ttft_ms}ms, complete {total_ms}ms")
+            # 📝 Save the complete reply, even if the client disconnected mid-stream
+            save_chat_log(prompt, reply, chat_session_id, log_row)
+        yield sse_event("done", {
+            "success": True,
+            "chat_session_id": chat_session_id,
+            "schedule_updated": result.get("schedule_updated", False),
+            "ttft_ms": ttft_ms,
+            "total_ms": total_ms
+        })
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
 
 
 
@@ -810,17 +1108,29 @@ def update_manual_day():
         return jsonify({"success": False, "error": "Missing plot_id, date, or liters"}), 400
 
     try:
-        sched_res = supabase.table("plot_schedules").select("schedule").eq("plot_id", plot_id).single().execute()
+        sched_res = supabase.table("plot_schedules").select("schedule, day_state").eq("plot_id", plot_id).single().execute()
         if not sched_res.data:
             return jsonify({"success": False, "error": "Schedule not found"}), 404
 
-        schedule = sched_res.data.get("schedule") or []
-        for day in schedule:
-            if day.get("date") == date:
-                day["liters"] = liters
+        try:
+            date = normalize_date(date)
+            liters = max(0.0, round(float(liters), 2))
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "error": "Invalid date or liters"}), 400
+
+        days = parse_schedule(sched_res.data.get("schedule"))
+        old_schedule = dump_schedule(days)
+        for day in days:
+            if day.date == date:
+                day.liters = liters
                 break
 
-        supabase.table("plot_schedules").update({"schedule": schedule}).eq("plot_id", plot_id).execute()
+        schedule = dump_schedule(days)
+        # Pin the edited day so forecast updates don't override the user's liters
+        day_state = pin_edits(sched_res.data.get("day_state"), old_schedule, schedule)
+        supabase.table("plot_schedules").update({"schedule": schedule, "day_state": day_state}) \
+                .eq("plot_id", plot_id).execute()
+        record_schedule_change(plot_id, old_schedule, schedule, "manual edit")
         return jsonify({"success": True})
     except Exception as e:
         print(f"❌ Error in /update_manual_day: {e}")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Load test for the LLM-backed endpoints against a running backend.
+
+Run the backend against the Gemini stand-in so no real quota is spent:
+
+    python -m farmerAI.fake_gemini --latency-ms 900 --error-rate 0.05 &
+    GEMINI_BASE_URL=http://localhost:8765 python start_backend.py &
+    python benchmarks/bench_endpoints.py --plot-id <plot uuid> --requests 200 --concurrency 20
+
+Reports per-endpoint latency percentiles and error counts. With --stream the
+chat requests go to /chat_stream and time to first byte is reported as well.
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+PROMPTS = [
+    "should I water today?",
+    "why is day 3 so high?",
+    "what about tomorrow?",
+    "is it going to rain this week",
+    "how hot will it get on friday"
+]
+
+
+def timed_post(base_url, path, payload, stream=False):
+    start = time.perf_counter()
+    first_byte = None
+    try:
+        res = requests.post(f"{base_url}{path}", json=payload, timeout=120, stream=stream)
+        if stream:
+            for chunk in res.iter_content(chunk_size=None):
+                if first_byte is None and chunk:
+                    first_byte = time.perf_counter() - start
+        else:
+            res.content
+        ok = res.status_code < 400
+    except requests.RequestException:
+        ok = False
+    return path, ok, time.perf_counter() - start, first_byte
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else float("nan")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base-url", default="http://localhost:5050")
+    ap.add_argument("--plot-id", required=True)
+    ap.add_argument("--requests", type=int, default=100)
+    ap.add_argument("--concurrency", type=int, default=10)
+    ap.add_argument("--stream", action="store_true", help="send chat traffic to /chat_stream")
+    args = ap.parse_args()
+
+    chat_path = "/chat_stream" if args.stream else "/chat"
+    jobs = []
+    for i in range(args.requests):
+        kind = i % 10
+        if kind < 6:
+            jobs.append((chat_path, {"prompt": PROMPTS[i % len(PROMPTS)], "plotId": args.plot_id}, args.stream))
+        elif kind < 9:
+            jobs.append(("/get_plan", {"plot_id": args.plot_id, "force_refresh": kind == 8}, False))
+        else:
+            jobs.append(("/generate_ai_schedule", {"plot_id": args.plot_id}, False))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda job: timed_post(args.base_url, *job), jobs))
+    wall = time.perf_counter() - started
+
+    print(f"{len(results)} requests, concurrency {args.concurrency}, {wall:.1f}s wall, {len(results) / wall:.1f} req/s")
+    for path in sorted({r[0] for r in results}):
+        rows = [r for r in results if r[0] == path]
+        latencies = [r[2] * 1000 for r in rows]
+        line = (f"{path:24s} n={len(rows):4d} errors={sum(1 for r in rows if not r[1]):3d} "
+                f"p50={statistics.median(latencies):7.0f}ms p95={percentile(latencies, 0.95):7.0f}ms "
+                f"max={max(latencies):7.0f}ms")
+        ttfb = [r[3] * 1000 for r in rows if r[3] is not None]
+        if ttfb:
+            line += f"  ttfb p50={statistics.median(ttfb):.0f}ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
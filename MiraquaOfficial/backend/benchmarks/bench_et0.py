@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Validation and benchmark for utils/et0_utils.py.
+
+First checks the implementation against the worked examples in FAO Irrigation
+and Drainage Paper 56 (exit 1 on any mismatch), then times each ET₀ method on
+a multi-year, multi-location grid.
+
+    python benchmarks/bench_et0.py [--years 10] [--locations 1000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from utils.et0_utils import (
+    actual_vapour_pressure, daylight_hours, extraterrestrial_radiation, hargreaves,
+    penman_monteith, priestley_taylor, saturation_vapour_pressure, solar_radiation_from_sunshine,
+    solar_radiation_from_temp, wind_at_2m
+)
+
+
+def fao_checks():
+    """(name, computed, published, tolerance) for the FAO-56 worked examples."""
+    checks = []
+    # Example 3: mean saturation vapour pressure, Tmax 24.5 / Tmin 15 °C
+    es = (saturation_vapour_pressure(24.5) + saturation_vapour_pressure(15.0)) / 2
+    checks.append(("Ex 3  es (kPa)", es, 2.39, 0.01))
+    # Example 8: Ra at 20°S on 3 September
+    checks.append(("Ex 8  Ra (MJ/m²/day)", extraterrestrial_radiation(-20.0, 246), 32.2, 0.05))
+    # Example 9: daylight hours, same place and day
+    checks.append(("Ex 9  N (hours)", daylight_hours(-20.0, 246), 11.7, 0.05))
+
+    # Example 17: Brussels, 6 July, 50°48'N, 100 m
+    lat, doy = 50.8, 187
+    ea = actual_vapour_pressure(12.3, 21.5, rh_min=63, rh_max=84)
+    u2 = wind_at_2m(10 / 3.6)
+    ra = extraterrestrial_radiation(lat, doy)
+    rs = solar_radiation_from_sunshine(ra, 9.25, daylight_hours(lat, doy))
+    checks.append(("Ex 17 ea (kPa)", ea, 1.409, 0.005))
+    checks.append(("Ex 17 u2 (m/s)", u2, 2.078, 0.005))
+    checks.append(("Ex 17 Ra (MJ/m²/day)", ra, 41.09, 0.05))
+    checks.append(("Ex 17 Rs (MJ/m²/day)", rs, 22.07, 0.05))
+    checks.append(("Ex 17 ET₀ PM (mm/day)", penman_monteith(12.3, 21.5, rs, u2, ea, lat, doy, elevation=100), 3.9, 0.05))
+
+    # Example 18: Bangkok, April (monthly), 13°44'N, 2 m, G = 0.14
+    lat, doy = 13.73, 105
+    ra = extraterrestrial_radiation(lat, doy)
+    rs = solar_radiation_from_sunshine(ra, 8.5, daylight_hours(lat, doy))
+    checks.append(("Ex 18 Ra (MJ/m²/day)", ra, 38.06, 0.05))
+    checks.append(("Ex 18 Rs (MJ/m²/day)", rs, 22.65, 0.05))
+    checks.append(("Ex 18 ET₀ PM (mm/day)", penman_monteith(25.6, 34.8, rs, 2.0, 2.85, lat, doy, elevation=2, g=0.14), 5.72, 0.02))
+    return checks
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--years", type=int, default=10)
+    ap.add_argument("--locations", type=int, default=1000)
+    args = ap.parse_args()
+
+    failed = 0
+    print("📐 FAO-56 worked examples")
+    for name, computed, published, tol in fao_checks():
+        ok = abs(float(computed) - published) <= tol
+        failed += not ok
+        print(f"  {'✅' if ok else '❌'} {name:<24} {float(computed):8.3f}  (FAO {published})")
+
+    # Multi-year, multi-location grid: (locations, days)
+    rng = np.random.default_rng(0)
+    days = 365 * args.years
+    lat = rng.uniform(-55, 65, size=(args.locations, 1))
+    doy = (np.arange(days) % 365 + 1)[None, :]
+    seasonal = 10 * np.cos(2 * np.pi * (doy - 200) / 365) * np.sign(lat)
+    tmax = 24 + seasonal + rng.normal(0, 4, size=(args.locations, days))
+    tmin = tmax - rng.uniform(5, 15, size=(args.locations, days))
+    ea = actual_vapour_pressure(tmin, tmax, rh_mean=rng.uniform(30, 90, size=(args.locations, days)))
+    u2 = rng.uniform(0.5, 5, size=(args.locations, days))
+    n = args.locations * days
+
+    start = time.perf_counter()
+    ra = extraterrestrial_radiation(lat, doy)
+    ra_s = time.perf_counter() - start
+    rs = solar_radiation_from_temp(ra, tmin, tmax)
+
+    timings = {}
+    for name, fn in (
+        ("hargreaves", lambda: hargreaves(tmin, tmax, ra)),
+        ("penman_monteith", lambda: penman_monteith(tmin, tmax, rs, u2, ea, lat, doy)),
+        ("priestley_taylor", lambda: priestley_taylor(tmin, tmax, rs, ea, lat, doy)),
+    ):
+        start = time.perf_counter()
+        values = fn()
+        timings[name] = (time.perf_counter() - start, float(np.median(values)))
+
+    print(f"\n⏱️ {args.locations} locations × {days} days = {n:,} location-days")
+    print(f"  {'extraterrestrial Ra':<20} {ra_s * 1e9 / n:7.1f} ns/value")
+    for name, (seconds, median) in timings.items():
+        print(f"  {name:<20} {seconds * 1e9 / n:7.1f} ns/value  ({seconds * 1e3:.0f} ms, median ET₀ {median:.2f} mm)")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
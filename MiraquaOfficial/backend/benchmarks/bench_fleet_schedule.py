@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark for batch scheduling: forecast_utils.calculate_schedule (one plot
+at a time) against fleet_utils.calculate_schedules (all plots at once) on a
+synthetic fleet. Checks that both agree on a sample of plots, and fails
+(exit 1) if the batch path costs more than the budget per plot. --days sets
+the planning horizon (up to 16).
+
+    python benchmarks/bench_fleet_schedule.py [--plots 10000] [--cells 200] [--days 7] [--budget-us 50]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from utils.forecast_utils import calculate_schedule
+from utils.fleet_utils import CROPS, TIME_LABELS, calculate_schedules, pack_hourly
+
+
+def synthetic_cell(rng, start_ts, hours_per_day, n_days):
+    """n_days of OpenWeather-like hourly entries for one location cell."""
+    base = rng.uniform(45, 95)
+    days = []
+    for d in range(n_days):
+        day = []
+        for s in range(hours_per_day):
+            ts = start_ts + d * 86400 + s * (86400 // hours_per_day)
+            day.append({
+                "dt": ts,
+                "main": {"temp": base + rng.uniform(-12, 12)},
+                "wind": {"speed": rng.uniform(0, 8)},
+                "clouds": {"all": rng.randint(0, 100)},
+                "pop": rng.choice([0, 0, 0, 0.1, 0.3, 0.7])
+            })
+        days.append(day)
+    return days
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--plots", type=int, default=10000)
+    ap.add_argument("--cells", type=int, default=200)
+    ap.add_argument("--days", type=int, default=7)
+    ap.add_argument("--hours-per-day", type=int, default=8, help="8 = OpenWeather 3-hourly, 24 = hourly")
+    ap.add_argument("--scalar-sample", type=int, default=300)
+    ap.add_argument("--budget-us", type=float, default=50.0)
+    args = ap.parse_args()
+
+    rng = random.Random(42)
+    start_ts = int(time.time())
+    cells = [synthetic_cell(rng, start_ts, args.hours_per_day, args.days) for _ in range(args.cells)]
+    lats = [rng.uniform(-45, 60) for _ in range(args.cells)]
+    soil = np.array([[rng.choice([0.18, 0.22, 0.25, 0.3]) for _ in range(args.days)] for _ in range(args.cells)])
+    plots = [{
+        "crop": rng.choice(CROPS),
+        "area": rng.uniform(5, 500),
+        "age": rng.uniform(0, 12),
+        "cell": rng.randrange(args.cells)
+    } for _ in range(args.plots)]
+
+    # Scalar path, one plot at a time (its debug prints are swallowed)
+    sample = plots[:args.scalar_sample]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scalar = [calculate_schedule(p["crop"], p["area"], p["age"], lats[p["cell"]], 0,
+                                     hourly_blocks=cells[p["cell"]], soil_forecast=list(soil[p["cell"]]),
+                                     days=args.days)[0]
+                  for p in sample]
+    scalar_per_plot = (time.perf_counter() - start) / len(sample)
+
+    # Batch path, whole fleet (packing the forecast is paid once per refresh)
+    start = time.perf_counter()
+    forecast = pack_hourly(cells, days=args.days, lats=lats)
+    pack_s = time.perf_counter() - start
+    forecast_mb = sum(a.nbytes for a in forecast.values()) / 1e6
+
+    crops = [p["crop"] for p in plots]
+    areas = np.array([p["area"] for p in plots])
+    ages = np.array([p["age"] for p in plots])
+    cell_idx = np.array([p["cell"] for p in plots])
+    start = time.perf_counter()
+    result = calculate_schedules(crops, areas, ages, cell_idx, forecast, soil=soil)
+    batch_s = time.perf_counter() - start
+    batch_per_plot = batch_s / len(plots)
+    result_mb = sum(a.nbytes for a in result.values()) / 1e6
+
+    mismatches = 0
+    for i, days in enumerate(scalar):
+        for d, day in enumerate(days):
+            if abs(day["liters"] - result["liters"][i, d]) > 0.011 \
+                    or day["optimal_time"] != TIME_LABELS[result["optimal_hour"][i, d]]:
+                mismatches += 1
+
+    print(f"🧮 {len(plots)} plots over {args.cells} cells, {args.days} days, {args.hours_per_day} forecast slots/day")
+    print(f"  calculate_schedule   {scalar_per_plot * 1e3:8.3f} ms/plot  ({len(sample)} plot sample)")
+    print(f"  calculate_schedules  {batch_per_plot * 1e6:8.2f} µs/plot  ({batch_s * 1e3:.1f} ms total, "
+          f"+{pack_s * 1e3:.1f} ms packing)")
+    print(f"  speed-up            {scalar_per_plot / batch_per_plot:8.0f}x")
+    print(f"  memory               {forecast_mb:8.2f} MB forecast, {result_mb:.2f} MB results")
+    print(f"  mismatched days      {mismatches}")
+
+    if mismatches or batch_per_plot * 1e6 > args.budget_us:
+        print("❌ Batch scheduler disagrees with calculate_schedule or is over budget")
+        return 1
+    print("✅ Within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the chat intent router.
+
+Times route_prompt over every prompt in chat_prompts.txt against a 7-day
+schedule and fails (exit 1) if the p99 latency exceeds the budget.
+
+    python benchmarks/bench_intent_router.py [--budget-us 1000] [--rounds 200]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from farmerAI.intent_router import route_prompt, schedule_index
+
+
+def load_prompts():
+    lines = (backend_dir / "benchmarks" / "chat_prompts.txt").read_text().splitlines()
+    return [line.strip().lower() for line in lines if line.strip() and not line.startswith("#")]
+
+
+def sample_schedule():
+    today = datetime.utcnow().date()
+    return [{
+        "day": f"Day {i + 1}",
+        "date": (today + timedelta(days=i)).strftime("%m/%d/%y"),
+        "liters": 4.0 + i,
+        "optimal_time": "05:00 AM"
+    } for i in range(7)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=200)
+    ap.add_argument("--budget-us", type=float, default=1000.0)
+    args = ap.parse_args()
+
+    prompts = load_prompts()
+    schedule = sample_schedule()
+
+    # Cold index build, paid once per schedule version
+    start = time.perf_counter()
+    schedule_index(schedule)
+    print(f"index build (cold): {(time.perf_counter() - start) * 1e6:.1f}µs")
+
+    samples = []
+    for _ in range(args.rounds):
+        for prompt in prompts:
+            start = time.perf_counter()
+            route_prompt(prompt, schedule)
+            samples.append((time.perf_counter() - start) * 1e6)
+
+    samples.sort()
+    p50 = statistics.median(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{len(prompts)} prompts x {args.rounds} rounds")
+    print(f"route_prompt: p50={p50:.1f}µs  p99={p99:.1f}µs  max={samples[-1]:.1f}µs")
+
+    if p99 > args.budget_us:
+        print(f"❌ p99 over budget ({args.budget_us:.0f}µs)")
+        return 1
+    print("✅ within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark for utils/kc_utils.py: Kc for a whole fleet of plots over a
+forecast horizon with one lookup into the day-by-day curve table, against
+forecast_utils.dynamic_kc called per plot-day. Also checks the FAO-56 curve
+shape (flat initial and mid-season, linear development and late season) for
+every crop and a custom curve, and that the built-in curves keep the old
+stage-step Kc at the initial, mid-season and end-of-season stage midpoints.
+Only the development and late stages changed (steps became ramps); their
+shift from the old step values is reported. Fails (exit 1) if a curve is off
+or the lookup costs more than the budget per plot-day.
+
+    python benchmarks/bench_kc.py [--plots 100000] [--days 16] [--budget-ns 50]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from utils.forecast_utils import dynamic_kc
+from utils.kc_utils import CROP_CURVES, kc_table, plot_kc
+
+
+# dynamic_kc's stage steps before the day-by-day curves: Kc up to 1, 3 and 6
+# months of age, then after
+BASELINE_STEPS = {
+    "tomato": [0.6, 0.95, 1.15, 0.8],
+    "corn": [0.4, 0.9, 1.15, 0.75],
+    "wheat": [0.3, 0.8, 1.0, 0.4],
+    "alfalfa": [0.7, 1.0, 1.2, 0.9],
+    "lettuce": [0.6, 0.85, 1.0, 0.8],
+    "almond": [0.4, 0.85, 1.05, 0.85],
+    "grass": [0.5, 0.95, 1.1, 0.8],
+    "default": [0.5, 0.85, 1.05, 0.8]
+}
+BASELINE_MIDPOINTS = [0.5, 2.0, 4.5, 9.0]  # months, the middle of each old step
+UNCHANGED_STEPS = [0, 2, 3]                # initial, mid-season and after the late season
+
+
+def baseline_shifts(name):
+    """New Kc minus the old step value at each old step's midpoint."""
+    kc = kc_table.kc([name] * len(BASELINE_MIDPOINTS), BASELINE_MIDPOINTS)
+    return kc - np.array(BASELINE_STEPS[name])
+
+
+def curve_errors(stage_days, kc, curve):
+    """Max deviation of a curve from the piecewise-linear FAO-56 shape."""
+    ini, dev, mid, late = np.cumsum(stage_days)
+    kc_ini, kc_mid, kc_end = kc
+    expected = np.concatenate([
+        np.full(ini + 1, kc_ini),
+        kc_ini + (kc_mid - kc_ini) * np.arange(1, dev - ini + 1) / (dev - ini),
+        np.full(mid - dev, kc_mid),
+        kc_mid + (kc_end - kc_mid) * np.arange(1, late - mid + 1) / (late - mid)
+    ])
+    error = max(np.abs(curve[:late + 1] - expected).max(), np.abs(curve[late:] - kc_end).max())
+    return error if error > 1e-9 else 0.0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--plots", type=int, default=100000)
+    ap.add_argument("--days", type=int, default=16)
+    ap.add_argument("--budget-ns", type=float, default=50.0)
+    args = ap.parse_args()
+
+    errors = {name: curve_errors(*CROP_CURVES[name], kc_table.table[kc_table.index[name]])
+              for name in CROP_CURVES}
+    custom = {"stage_days": [20, 35, 40, 30], "kc": [0.35, 1.1, 0.5]}
+    errors["custom plot"] = curve_errors(custom["stage_days"], custom["kc"],
+                                         plot_kc({"kc_curve": custom}, np.arange(800) / 30.44))
+    code = kc_table.add_curve("bench-berry", (25, 40, 60, 30), (0.5, 1.05, 0.6))
+    errors["added crop"] = curve_errors((25, 40, 60, 30), (0.5, 1.05, 0.6), kc_table.table[code])
+
+    shifts = {name: baseline_shifts(name) for name in BASELINE_STEPS}
+    baseline_errors = {name: np.abs(shift[UNCHANGED_STEPS]).max() for name, shift in shifts.items()}
+
+    rng = np.random.default_rng(5)
+    names = list(CROP_CURVES)
+    crops = rng.integers(0, len(names), args.plots)
+    ages = rng.uniform(0, 12, args.plots)
+
+    sample = 2000
+    start = time.perf_counter()
+    for c, a in zip(crops[:sample], ages[:sample]):
+        [dynamic_kc(names[c], a + d / 30.44) for d in range(args.days)]
+    loop_ns = (time.perf_counter() - start) * 1e9 / (sample * args.days)
+
+    start = time.perf_counter()
+    kc = kc_table.kc(crops[:, None], ages[:, None] + np.arange(args.days)[None, :] / 30.44)
+    table_ns = (time.perf_counter() - start) * 1e9 / kc.size
+
+    print(f"🌱 {args.plots} plots × {args.days} days = {kc.size:,} plot-days")
+    print(f"  dynamic_kc loop        {loop_ns:8.0f} ns/plot-day  ({sample} plot sample)")
+    print(f"  table lookup           {table_ns:8.1f} ns/plot-day")
+    print(f"  speed-up               {loop_ns / table_ns:8.0f}x")
+    for name, err in errors.items():
+        print(f"  {name:<22} max curve error {err:.1e}")
+    for name, shift in shifts.items():
+        print(f"  {name:<22} vs old steps {baseline_errors[name]:.1e} (development {shift[1]:+.3f})")
+
+    if any(errors.values()) or any(e > 1e-9 for e in baseline_errors.values()) or table_ns > args.budget_ns:
+        print("❌ Kc curve off the FAO-56 shape or old stage values, or lookup over budget")
+        return 1
+    print("✅ Within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
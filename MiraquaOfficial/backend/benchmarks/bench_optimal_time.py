@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark for utils/window_utils.py: forecast_utils.find_optimal_time (one
+plot-day at a time) against scoring whole multi-day forecasts on an hour
+grid. Checks that one-hour windows pick the same hour as find_optimal_time,
+then times multi-hour windows for a fleet of plots. Fails (exit 1) on any
+mismatch or if the array path costs more than the budget per plot.
+
+    python benchmarks/bench_optimal_time.py [--plots 10000] [--cells 200] [--budget-us 20]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from utils.forecast_utils import find_optimal_time
+from utils.window_utils import HOUR_LABELS, best_windows, grid_from_blocks, grid_from_timeline, plot_windows
+
+
+def synthetic_cell(rng, midnight_ts, days, hours_per_day):
+    """A chronological OpenWeather-like forecast for one location cell, starting at local midnight."""
+    base = rng.uniform(25, 95)
+    step = 86400 // hours_per_day
+    return [{
+        "dt": midnight_ts + i * step,
+        "main": {"temp": base + rng.uniform(-12, 12)},
+        "wind": {"speed": rng.uniform(0, 8)},
+        "clouds": {"all": rng.randint(0, 100)},
+        "pop": rng.choice([0, 0, 0, 0.1, 0.3, 0.7])
+    } for i in range(days * hours_per_day)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--plots", type=int, default=10000)
+    ap.add_argument("--cells", type=int, default=200)
+    ap.add_argument("--days", type=int, default=7)
+    ap.add_argument("--hours-per-day", type=int, default=24, help="24 = hourly, 8 = OpenWeather 3-hourly")
+    ap.add_argument("--budget-us", type=float, default=20.0)
+    args = ap.parse_args()
+
+    rng = random.Random(7)
+    midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+    timelines = [synthetic_cell(rng, int(midnight), args.days, args.hours_per_day) for _ in range(args.cells)]
+    per_day = [[t[d * args.hours_per_day:(d + 1) * args.hours_per_day] for d in range(args.days)] for t in timelines]
+    plot_cells = np.array([rng.randrange(args.cells) for _ in range(args.plots)])
+    durations = np.array([rng.choice([1, 2, 3]) for _ in range(args.plots)])
+
+    # find_optimal_time once per day per plot
+    sample = plot_cells[:300]
+    start = time.perf_counter()
+    reference = [[find_optimal_time(day) for day in per_day[c]] for c in sample]
+    reference_per_plot = (time.perf_counter() - start) / len(sample)
+
+    # Same forecasts through the hour grid, one-hour windows
+    hours = best_windows(grid_from_blocks(per_day, days=args.days))["start_hour"]
+    mismatches = sum(
+        HOUR_LABELS[h if h >= 0 else 6] != ref
+        for c, row in zip(sample, reference) for h, ref in zip(hours[c], row)
+    )
+
+    # Fleet: pack the timelines once, then every plot's best multi-hour window per day
+    start = time.perf_counter()
+    grid = grid_from_timeline(timelines, days=args.days)
+    pack_s = time.perf_counter() - start
+    start = time.perf_counter()
+    windows = plot_windows(grid, plot_cells, durations)
+    fleet_s = time.perf_counter() - start
+    fleet_per_plot = fleet_s / args.plots
+    found = float((windows["start_hour"] >= 0).mean())
+
+    print(f"🕕 {args.plots} plots over {args.cells} cells, {args.days} days, {args.hours_per_day} entries/day")
+    print(f"  find_optimal_time loop  {reference_per_plot * 1e6:8.1f} µs/plot  ({len(sample)} plot sample)")
+    print(f"  plot_windows            {fleet_per_plot * 1e6:8.2f} µs/plot  ({fleet_s * 1e3:.1f} ms total, "
+          f"+{pack_s * 1e3:.1f} ms packing, 1-3 h windows, {found:.0%} of days have one)")
+    print(f"  speed-up               {reference_per_plot / fleet_per_plot:8.0f}x")
+    print(f"  mismatched days         {mismatches}")
+
+    if mismatches or fleet_per_plot * 1e6 > args.budget_us:
+        print("❌ Window finder disagrees with find_optimal_time or is over budget")
+        return 1
+    print("✅ Within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark for utils/schedule_history_utils.py: a chat session of many
+messages, some of which edit the schedule, stored the old way (full
+old/new schedules per edit in schedule_changes, original/modified copies on
+every farmerAI_chatlog row) against the delta history (a JSON Patch per
+edit, a snapshot per chain of KEYFRAME_EVERY edits, a hash per chat row).
+Rebuilds every version from its snapshot and patches and fails (exit 1) on
+any mismatch or if the slowest rebuild takes longer than the budget.
+
+    python benchmarks/bench_schedule_history.py [--messages 2000] [--edit-share 0.3] [--days 7] [--budget-ms 5]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from utils.schedule_history_utils import KEYFRAME_EVERY, apply_patch, make_patch, schedule_hash
+
+
+def size(value):
+    return len(json.dumps(value, separators=(",", ":")))
+
+
+def chat_edit(rng, schedule):
+    """One edit as process_chat_command makes them: skip, set, shift or a % change."""
+    new = [dict(day) for day in schedule]
+    kind = rng.choice(["skip", "set", "shift", "percent"])
+    if kind == "percent":
+        for day in new:
+            day["liters"] = round(day["liters"] * 1.1, 1)
+            day["note"] = "Increased by 10%"
+        return new
+    day = new[rng.randrange(len(new))]
+    if kind == "skip":
+        day["liters"], day["note"] = 0, "User-skip"
+    elif kind == "set":
+        day["liters"] = rng.choice([2.0, 5.5, 8.0])
+        day["note"] = f"User-set to {day['liters']}L"
+    else:
+        day["optimal_time"] = rng.choice(["5:00 AM", "6:00 AM", "7:00 PM"])
+        day["note"] = f"Time moved to {day['optimal_time']}"
+    return new
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=2000)
+    ap.add_argument("--edit-share", type=float, default=0.3)
+    ap.add_argument("--days", type=int, default=7)
+    ap.add_argument("--budget-ms", type=float, default=5.0)
+    args = ap.parse_args()
+
+    rng = random.Random(11)
+    schedule = [{
+        "day": f"Day {i + 1}", "date": f"2026-07-{i + 1:02d}", "liters": round(rng.uniform(2, 9), 1),
+        "optimal_time": "6:00 AM", "moisture": 0.3,
+        "explanation": "Forecast ET is moderate and no rain is expected, so a morning refill keeps the root zone "
+                       "above the stress threshold."
+    } for i in range(args.days)]
+
+    full_bytes = delta_bytes = 0
+    chains, versions = [], []  # chains: (snapshot, [patches]); versions: (chain, position, hash)
+    start = time.perf_counter()
+    for _ in range(args.messages):
+        if rng.random() < args.edit_share:
+            new = chat_edit(rng, schedule)
+            patch = make_patch(schedule, new)
+            full_bytes += size(schedule) + size(new)
+            delta_bytes += size(patch) + 2 * 64
+            if not chains or len(chains[-1][1]) >= KEYFRAME_EVERY:
+                chains.append((schedule, []))
+                delta_bytes += size(schedule)
+            chains[-1][1].append(patch)
+            versions.append((len(chains) - 1, len(chains[-1][1]), schedule_hash(new)))
+            schedule = new
+        full_bytes += 2 * size(schedule)  # chat log copies
+        delta_bytes += 64                 # chat log hash
+    record_s = time.perf_counter() - start
+
+    mismatches, slowest = 0, 0.0
+    for chain, position, digest in versions:
+        start = time.perf_counter()
+        rebuilt = json.loads(json.dumps(chains[chain][0]))
+        for patch in chains[chain][1][:position]:
+            rebuilt = apply_patch(rebuilt, patch, in_place=True)
+        slowest = max(slowest, time.perf_counter() - start)
+        mismatches += schedule_hash(rebuilt) != digest
+
+    print(f"🗂️  {args.messages} chat messages, {len(versions)} edits of a {args.days}-day schedule")
+    print(f"  full snapshots         {full_bytes / 1024:8.0f} KB written")
+    print(f"  delta history          {delta_bytes / 1024:8.0f} KB written ({full_bytes / max(delta_bytes, 1):.0f}x less, "
+          f"{len(chains)} snapshots)")
+    print(f"  edit, diff + hash      {record_s * 1e6 / max(len(versions), 1):8.1f} µs/edit")
+    print(f"  slowest rebuild        {slowest * 1e3:8.2f} ms (up to {KEYFRAME_EVERY} patches)")
+    print(f"  mismatched versions    {mismatches}")
+
+    if mismatches or slowest * 1e3 > args.budget_ms:
+        print("❌ Rebuilt versions don't match or rebuild is over budget")
+        return 1
+    print("✅ Within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark for utils/model_utils.py: a fleet of stored schedules held as
+day dicts, as slotted ScheduleDay objects and as one ScheduleBatch. Measures
+memory per schedule, validation (from_dict) and serialization (to_dict)
+cost per day, and a fleet total computed with .get() over dicts against the
+batch arrays. Checks that dict -> ScheduleDay -> dict and the batch round
+trip both give the stored schedules back, and fails (exit 1) on any
+mismatch or if validation costs more than the budget per day.
+
+    python benchmarks/bench_schedule_models.py [--schedules 5000] [--days 7] [--budget-us 10]
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from utils.model_utils import ScheduleBatch, dump_schedule, parse_schedule
+
+
+def stored_schedules(rng, count, days, start):
+    times = ["05:00 AM", "06:00 AM", "07:00 AM", "06:00 PM", "Skipped"]
+    return [[{
+        "day": f"Day {d + 1}",
+        "date": (start + timedelta(days=d)).strftime("%m/%d/%y"),
+        "liters": round(rng.uniform(0, 12), 2),
+        "optimal_time": rng.choice(times)
+    } for d in range(days)] for _ in range(count)]
+
+
+def measure(build):
+    """(result, bytes allocated while building it)."""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--schedules", type=int, default=5000)
+    ap.add_argument("--days", type=int, default=7)
+    ap.add_argument("--budget-us", type=float, default=10.0)
+    args = ap.parse_args()
+
+    rng = random.Random(5)
+    start = datetime(2026, 7, 1)
+    n_days = args.schedules * args.days
+    stored, dict_bytes = measure(lambda: stored_schedules(rng, args.schedules, args.days, start))
+
+    t = time.perf_counter()
+    models = [parse_schedule(s) for s in stored]
+    parse_s = time.perf_counter() - t
+    _, model_bytes = measure(lambda: [parse_schedule(s) for s in stored])
+    t = time.perf_counter()
+    dumped = [dump_schedule(days) for days in models]
+    dump_s = time.perf_counter() - t
+    batch, batch_bytes = measure(lambda: ScheduleBatch.from_schedules(models, start))
+
+    t = time.perf_counter()
+    dict_total = sum(day.get("liters", 0) for s in stored for day in s)
+    dict_total_s = time.perf_counter() - t
+    t = time.perf_counter()
+    batch_total = float(batch.totals().sum())
+    batch_total_s = time.perf_counter() - t
+
+    mismatches = sum(d != s for d, s in zip(dumped, stored))
+    mismatches += sum(batch.to_dicts(i) != stored[i] for i in range(0, args.schedules, max(args.schedules // 200, 1)))
+    mismatches += abs(dict_total - batch_total) > 1e-3 * n_days
+
+    print(f"📋 {args.schedules} schedules × {args.days} days")
+    print(f"  day dicts              {dict_bytes / args.schedules:8.0f} B/schedule")
+    print(f"  ScheduleDay            {model_bytes / args.schedules:8.0f} B/schedule")
+    print(f"  ScheduleBatch          {batch_bytes / args.schedules:8.0f} B/schedule")
+    print(f"  from_dict (validate)   {parse_s * 1e6 / n_days:8.2f} µs/day")
+    print(f"  to_dict                {dump_s * 1e6 / n_days:8.2f} µs/day")
+    print(f"  fleet total            {dict_total_s * 1e3:8.2f} ms with .get(), {batch_total_s * 1e3:.3f} ms from the batch")
+    print(f"  mismatches             {mismatches}")
+
+    if mismatches or parse_s * 1e6 / n_days > args.budget_us:
+        print("❌ Round trip mismatch or validation over budget")
+        return 1
+    print("✅ Within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark for utils/water_balance_utils.py: a whole growing season of the
+daily root-zone water balance for every plot in a synthetic fleet, with
+irrigation whenever depletion passes RAW. Checks that the water balance
+closes (inputs - ET - drainage = change in depletion) and fails (exit 1) if
+it doesn't or the season takes longer than the budget.
+
+    python benchmarks/bench_water_balance.py [--plots 10000] [--days 180] [--budget-s 1.0]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from utils.et0_utils import extraterrestrial_radiation, hargreaves
+from utils.fleet_utils import CROPS, kc_for
+from utils.water_balance_utils import RAIN_EFFICIENCY, SOIL_NAMES, root_zone, simulate
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--plots", type=int, default=10000)
+    ap.add_argument("--days", type=int, default=180)
+    ap.add_argument("--budget-s", type=float, default=1.0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(3)
+    crops = rng.integers(0, len(CROPS), args.plots)
+    soils = rng.integers(0, len(SOIL_NAMES), args.plots)
+    lat = rng.uniform(25, 48, (args.plots, 1))
+    doy = 90 + np.arange(args.days)[None, :]  # April onwards
+    tmax = 18 + 12 * np.sin(np.pi * (doy - 90) / 200) + rng.normal(0, 3, (args.plots, args.days))
+    tmin = tmax - rng.uniform(8, 15, (args.plots, args.days))
+    rain = np.where(rng.random((args.plots, args.days)) < 0.12, rng.exponential(8, (args.plots, args.days)), 0.0)
+
+    start = time.perf_counter()
+    et0 = hargreaves(tmin, tmax, extraterrestrial_radiation(lat, doy))
+    kc = kc_for(crops[:, None], np.arange(args.days)[None, :] / 30.44)
+    zone = root_zone(crops, soils)
+    result = simulate(kc * et0, rain, 0.0, zone["taw"], zone["raw"], depletion0=0.0, auto_irrigate=True)
+    elapsed = time.perf_counter() - start
+
+    inflow = (RAIN_EFFICIENCY * rain + result["irrigation"]).sum(axis=1)
+    outflow = result["eta"].sum(axis=1) + result["deep_percolation"].sum(axis=1)
+    closure = np.abs(inflow - outflow + result["depletion"][:, -1]).max()  # Dr0 = 0
+
+    print(f"🪣 {args.plots} plots × {args.days} days = {args.plots * args.days:,} plot-days")
+    print(f"  season simulation      {elapsed:8.3f} s  ({elapsed * 1e9 / (args.plots * args.days):.0f} ns/plot-day)")
+    print(f"  mean seasonal ETa      {result['eta'].sum(axis=1).mean():8.0f} mm")
+    print(f"  mean irrigation        {result['irrigation'].sum(axis=1).mean():8.0f} mm "
+          f"({(result['irrigation'] > 0).sum(axis=1).mean():.1f} events)")
+    print(f"  stressed plot-days     {(result['ks'] < 1).mean():8.1%}")
+    print(f"  max balance error      {closure:8.2e} mm")
+
+    if closure > 1e-6 or elapsed > args.budget_s:
+        print("❌ Water balance does not close or is over budget")
+        return 1
+    print("✅ Within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
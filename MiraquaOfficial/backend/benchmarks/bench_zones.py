@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark for utils/zone_utils.py: scheduling a farm split into many
+irrigation zones (mixed soils, crops, Kc curves and emitters) against what
+one uniform plot costs today (plot_water_balance + schedule_state day_inputs
+on the same forecast). Checks that a single zone reproduces the plot's water
+balance, that zone windows match window_utils.best_windows and that zone
+liters add up to the farm totals, and fails (exit 1) on a mismatch or if
+the zoned farm (plan plus JSON rows, what /get_plan pays) takes more than
+--budget-x times the single plot. The budget leaves room for timer noise
+at these few-ms times; a typical run is 2.5-4x.
+
+    python benchmarks/bench_zones.py [--zones 1000] [--days 7] [--budget-x 6]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from utils.kc_utils import CROP_CURVES
+from utils.schedule_state_utils import day_inputs
+from utils.water_balance_utils import SOIL_NAMES, plot_water_balance
+from utils.window_utils import best_windows, grid_from_timeline
+from utils.et0_utils import forecast_et0
+from utils.zone_utils import plan_zones, zone_rows
+
+
+def synthetic_forecast(rng, today, days):
+    """get_forecast()-shaped daily and 3-hourly entries starting at today's midnight (UTC)."""
+    midnight = datetime(today.year, today.month, today.day, tzinfo=timezone.utc).timestamp()
+    hourly = []
+    for i in range(days * 8):
+        ts = midnight + i * 3 * 3600
+        hourly.append({
+            "dt": int(ts),
+            "dt_txt": datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "main": {"temp": rng.uniform(55, 95), "humidity": rng.uniform(20, 80)},
+            "wind": {"speed": rng.uniform(0, 12)},
+            "clouds": {"all": rng.randint(0, 100)},
+            "pop": rng.choice([0, 0, 0, 0.3])
+        })
+    daily = [{
+        "date": (today + timedelta(days=d)).isoformat(),
+        "temp_max": rng.uniform(80, 100),
+        "temp_min": rng.uniform(50, 65),
+        "clouds": rng.randint(0, 100),
+        "precipitation": rng.choice([0, 0, 0, 4.0])
+    } for d in range(days)]
+    return daily, hourly
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--zones", type=int, default=1000)
+    ap.add_argument("--days", type=int, default=7)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--budget-x", type=float, default=6.0)
+    args = ap.parse_args()
+
+    rng = random.Random(9)
+    today = datetime.utcnow().date()
+    daily, hourly = synthetic_forecast(rng, today, args.days)
+    logs = [{"watered_at": (today - timedelta(days=2)).isoformat(), "liters": 400.0},
+            {"watered_at": (today - timedelta(days=1)).isoformat(), "duration_minutes": 20, "zone_id": 3}]
+    plot = {"id": "bench", "crop": "tomato", "area": 100.0, "lat": 36.7, "lon": -119.8, "soil_type": "loam"}
+    crops = list(CROP_CURVES)
+    farm = {**plot, "area": float(args.zones * 10), "zones": [{
+        "id": z + 1,
+        "area": rng.uniform(5, 15),
+        "soil_type": rng.choice(SOIL_NAMES),
+        "crop": rng.choice(crops),
+        "emitter_lpm": rng.choice([2.0, 4.0, 8.0, 15.0]),
+        **({"kc_curve": {"stage_days": [20, 30, 40, 30], "kc": [0.4, 1.1, 0.6]}} if z % 10 == 0 else {})
+    } for z in range(args.zones)]}
+
+    def timed(fn):
+        """(result, best of --repeat runs); the best is steadier than the mean at these sub-10 ms times."""
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        return result, best
+
+    def one_plot_today():
+        balance = plot_water_balance(plot, daily, logs, forecast_et0(daily, hourly, plot["lat"]), 3.0, today=today)
+        return balance, day_inputs(plot, daily, hourly, logs, 3.0, days=args.days, today=today)
+
+    (balance, _), plot_s = timed(one_plot_today)
+    single, single_s = timed(lambda: plan_zones(plot, daily, hourly, logs, 3.0, days=args.days, today=today))
+    zoned, plan_s = timed(lambda: plan_zones(farm, daily, hourly, logs, 3.0, days=args.days, today=today))
+    rows, rows_s = timed(lambda: zone_rows(zoned))
+    # What /get_plan pays per call: the plan and its JSON rows
+    _, farm_s = timed(lambda: zone_rows(plan_zones(farm, daily, hourly, logs, 3.0, days=args.days, today=today)))
+
+    # A single zone is the plot's own water balance, until the plan refills it
+    expected = np.array([d["depletion_mm"] for d in balance["days"]])
+    refilled = np.cumsum(single["liters"][0] > 0) > 0
+    mismatches = int(np.sum(~refilled & (np.abs(single["depletion"][0] - expected) > 0.051)))
+    totals = np.array([d["liters"] for d in rows["days"]])
+    mismatches += int(np.sum(np.abs(totals - zoned["liters"].sum(axis=0)) > 0.01 * args.zones))
+    mismatches += sum(zone["liters"] != zoned["liters"][i].tolist() for i, zone in enumerate(rows["zones"]))
+    mismatches += sum(t != "Skipped" for zone in rows["zones"] for t, l in zip(zone["optimal_time"], zone["liters"])
+                      if l <= 0)
+    # Each zone's window is the one best_windows finds for its length
+    grid = grid_from_timeline([hourly], days=args.days)
+    length = zoned["end_hour"] - zoned["start_hour"]
+    for hours in np.unique(length[zoned["start_hour"] >= 0]):
+        expected_start = best_windows(grid, hours)["start_hour"][0]
+        same_length = (length == hours) & (zoned["start_hour"] >= 0)
+        mismatches += int(np.sum(same_length & (zoned["start_hour"] != expected_start)))
+    watered = float((zoned["liters"] > 0).any(axis=1).mean())
+
+    print(f"🧩 {args.zones} zones, {args.days}-day plan")
+    print(f"  one plot today         {plot_s * 1e3:8.2f} ms  (water balance + day inputs)")
+    print(f"  plan_zones, 1 zone     {single_s * 1e3:8.2f} ms")
+    print(f"  plan_zones, {args.zones} zones {plan_s * 1e3:6.2f} ms  ({watered:.0%} of zones water this week)")
+    print(f"  zone_rows (JSON)       {rows_s * 1e3:8.2f} ms")
+    print(f"  plan + rows            {farm_s * 1e3:8.2f} ms  ({farm_s / plot_s:.1f}x one plot)")
+    print(f"  mismatches             {mismatches}")
+
+    if mismatches or farm_s > args.budget_x * plot_s:
+        print("❌ Zone plan disagrees with the plot water balance or is over budget")
+        return 1
+    print("✅ Within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
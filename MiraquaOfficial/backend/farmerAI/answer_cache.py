@@ -0,0 +1,160 @@
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from uuid import uuid4
+
+import numpy as np
+
+# Similarity-keyed reply cache for general (no specific plot) chat questions.
+# A question is embedded locally as a hashed bag of words and character
+# trigrams; entries are grouped by user and a coarse weather bucket, since the
+# replies quote the user's plots and forecast. A cached reply is reused when a new question in the same
+# bucket is similar enough and the entry hasn't expired.
+
+ANSWER_CACHE_MIN_SIMILARITY = float(os.getenv("ANSWER_CACHE_MIN_SIMILARITY", "0.88"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(3 * 3600)))
+EMBEDDING_DIM = 1024
+MAX_PER_BUCKET = 200
+MAX_BUCKETS = 500
+
+WORD_RE = re.compile(r"[a-z0-9']+")
+# Openers that mark a follow-up, whose answer depends on the conversation so far
+FOLLOW_UP_RE = re.compile(r"^(what about|how about|and|also|then|same|ok|okay|why)\b")
+# Words that don't change what is being asked
+FILLER = {"hi", "hey", "hello", "please", "pls", "thanks", "thank", "you", "the", "a", "an", "um", "so", "just", "quick", "question"}
+
+
+def normalize_question(text):
+    return " ".join(w for w in WORD_RE.findall(text.lower().replace("’", "'")) if w not in FILLER)
+
+
+def is_self_contained(question):
+    """Whether a question can be answered (and cached) without the chat history."""
+    text = normalize_question(question)
+    return len(text.split()) >= 3 and not FOLLOW_UP_RE.match(text)
+
+
+def embed(text):
+    """Unit-length hashed embedding of a normalized question."""
+    vec = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    words = text.split()
+    for word in words:
+        vec[zlib.crc32(word.encode()) % EMBEDDING_DIM] += 2.0
+    padded = f" {text} "
+    for i in range(len(padded) - 2):
+        vec[zlib.crc32(padded[i:i + 3].encode()) % EMBEDDING_DIM] += 1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def weather_bucket(hourly, crops=(), user_id=None):
+    """Coarse key for the conditions a general reply depends on.
+
+    The user (replies name their plots and quote their local forecast), then
+    temperature in 5°F bands and the peak rain chance over the next 12 hours in
+    four bands, plus the user's crops (replies often mention them).
+    """
+    temps = [h.get("main", {}).get("temp") for h in (hourly or [])[:4]]
+    temps = [t for t in temps if isinstance(t, (int, float))]
+    pops = [h.get("pop") or 0 for h in (hourly or [])[:4]]
+    temp_band = int(temps[0] // 5 * 5) if temps else None
+    peak = max(pops, default=0)
+    rain_band = 0 if peak < 0.1 else 1 if peak < 0.3 else 2 if peak < 0.6 else 3
+    return (user_id, temp_band, rain_band, tuple(sorted({c.lower() for c in crops if c})))
+
+
+class SemanticAnswerCache:
+    def __init__(self, min_similarity=ANSWER_CACHE_MIN_SIMILARITY, ttl=ANSWER_CACHE_TTL):
+        self.min_similarity = min_similarity
+        self.ttl = ttl
+        self.buckets = OrderedDict()  # bucket -> {"entries": [...], "matrix": array or None}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def _prune(self, group, now):
+        live = [e for e in group["entries"] if now - e["created"] < self.ttl]
+        if len(live) != len(group["entries"]):
+            self.expired += len(group["entries"]) - len(live)
+            group["entries"] = live
+            group["matrix"] = None
+
+    def lookup(self, question, bucket):
+        """Return the best cached entry for this question, or None.
+
+        The entry is a copy with "similarity" and "age_s" added, for logging.
+        """
+        text = normalize_question(question)
+        if not text:
+            return None
+        vec = embed(text)
+        now = time.time()
+        with self.lock:
+            group = self.buckets.get(bucket)
+            if group:
+                self._prune(group, now)
+            if not group or not group["entries"]:
+                self.misses += 1
+                return None
+            self.buckets.move_to_end(bucket)
+            if group["matrix"] is None:
+                group["matrix"] = np.vstack([e["vector"] for e in group["entries"]])
+            scores = group["matrix"] @ vec
+            best = int(np.argmax(scores))
+            if scores[best] < self.min_similarity:
+                self.misses += 1
+                return None
+            entry = group["entries"][best]
+            entry["hits"] += 1
+            self.hits += 1
+            return {
+                "id": entry["id"],
+                "question": entry["question"],
+                "reply": entry["reply"],
+                "hits": entry["hits"],
+                "similarity": round(float(scores[best]), 3),
+                "age_s": round(now - entry["created"], 1)
+            }
+
+    def store(self, question, bucket, reply):
+        text = normalize_question(question)
+        if not text or not reply:
+            return
+        with self.lock:
+            group = self.buckets.get(bucket)
+            if group is None:
+                group = self.buckets[bucket] = {"entries": [], "matrix": None}
+                while len(self.buckets) > MAX_BUCKETS:
+                    self.buckets.popitem(last=False)
+            self.buckets.move_to_end(bucket)
+            group["entries"].append({
+                "id": str(uuid4())[:8],
+                "question": question.strip(),
+                "reply": reply,
+                "vector": embed(text),
+                "created": time.time(),
+                "hits": 0
+            })
+            group["entries"] = group["entries"][-MAX_PER_BUCKET:]
+            group["matrix"] = None
+
+    def snapshot(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": sum(len(g["entries"]) for g in self.buckets.values()),
+                "buckets": len(self.buckets),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "expired": self.expired,
+                "min_similarity": self.min_similarity,
+                "ttl_s": self.ttl
+            }
+
+
+answer_cache = SemanticAnswerCache()
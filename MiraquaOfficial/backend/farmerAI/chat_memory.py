@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Recent chat turns kept in memory so /chat doesn't have to re-read
+# farmerAI_chatlog on every message just to build prompt context.
+# Each conversation (a chat session, or a plot) gets a bounded ring buffer of
+# its latest turns; conversations are evicted least-recently-used. Misses,
+# restarts and expired entries fall back to the database loader.
+
+MAX_CONVERSATIONS = 2000
+TURNS_PER_CONVERSATION = 6
+# Other workers write to the same chat log, so don't trust a buffer forever
+ENTRY_TTL_SECONDS = 1800
+
+
+class ChatMemory:
+    def __init__(self, max_conversations=MAX_CONVERSATIONS, turns=TURNS_PER_CONVERSATION, ttl=ENTRY_TTL_SECONDS):
+        self.max_conversations = max_conversations
+        self.turns = turns
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (loaded_at, deque of turns)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def recent(self, key, loader, limit=None):
+        """Return the latest turns for a conversation, oldest first.
+
+        loader() is only called on a miss and must return turns oldest first
+        (dicts with prompt, reply and created_at), as read from farmerAI_chatlog.
+        """
+        limit = limit or self.turns
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and now - entry[0] <= self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return list(entry[1])[-limit:]
+            self.misses += 1
+
+        turns = loader() or []
+        with self.lock:
+            self.entries[key] = (now, deque(turns[-self.turns:], maxlen=self.turns))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_conversations:
+                self.entries.popitem(last=False)
+        return list(turns)[-limit:]
+
+    def append(self, key, turn):
+        """Record a new turn for a conversation that is already buffered.
+
+        Unbuffered conversations are left alone: their next read goes to the
+        database, which already has the turn.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry:
+                entry[1].append(turn)
+                self.entries.move_to_end(key)
+
+    def snapshot(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "conversations": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+chat_memory = ChatMemory()
@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+
+from farmerAI.chat_memory import TURNS_PER_CONVERSATION
+
+# Rolling per-conversation summaries, so chat prompts carry a short digest of
+# the conversation plus the last few raw turns instead of an ever longer
+# transcript. Every SUMMARY_EVERY_N_TURNS turns the pending turns are folded
+# into the summary (by a background LLM call); the result is persisted in the
+# context_summary column of the latest farmerAI_chatlog row. Turns not yet in
+# the summary are always sent raw (raw_turns), so none fall between the two.
+
+SUMMARY_EVERY_N_TURNS = 4
+# Raw turns sent alongside a summary at least; covers the turns after a stored
+# summary when it is reloaded after a restart
+RAW_TURNS_WITH_SUMMARY = SUMMARY_EVERY_N_TURNS - 1
+# Cap if summarising keeps failing; no more than chat_memory keeps, so every
+# pending turn can still go raw
+MAX_PENDING_TURNS = TURNS_PER_CONVERSATION
+MAX_SUMMARY_CHARS = 800
+MAX_CONVERSATIONS = 2000
+
+
+class RollingSummaries:
+    def __init__(self, every_n=SUMMARY_EVERY_N_TURNS, max_conversations=MAX_CONVERSATIONS):
+        self.every_n = every_n
+        self.max_conversations = max_conversations
+        self.entries = OrderedDict()  # key -> {"summary": str, "pending": [(seq, turn)], "seq": int}
+        self.lock = threading.Lock()
+        self.refreshes = 0
+
+    def _entry(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = {"summary": None, "pending": [], "seq": 0}
+            while len(self.entries) > self.max_conversations:
+                self.entries.popitem(last=False)
+        self.entries.move_to_end(key)
+        return entry
+
+    def get(self, key, loader):
+        """Current summary for a conversation ("" if none); loader() reads the stored one on a miss."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry["summary"] is not None:
+                self.entries.move_to_end(key)
+                return entry["summary"]
+        summary = loader() or ""
+        with self.lock:
+            entry = self._entry(key)
+            if entry["summary"] is None:
+                entry["summary"] = summary
+            return entry["summary"]
+
+    def add_turn(self, key, turn):
+        """Queue a finished turn; returns True when the summary is due a refresh."""
+        with self.lock:
+            entry = self._entry(key)
+            entry["seq"] += 1
+            entry["pending"] = (entry["pending"] + [(entry["seq"], turn)])[-MAX_PENDING_TURNS:]
+            return len(entry["pending"]) >= self.every_n
+
+    def raw_turns(self, key):
+        """How many of the latest turns to send raw: every turn the summary doesn't cover yet."""
+        with self.lock:
+            entry = self.entries.get(key)
+            return max(RAW_TURNS_WITH_SUMMARY, len(entry["pending"]) if entry else 0)
+
+    def refresh(self, key, summarize):
+        """Fold pending turns into the summary with summarize(previous, turns) -> str.
+
+        Returns the new summary, or None if there was nothing to do.
+        """
+        with self.lock:
+            entry = self._entry(key)
+            previous, pending = entry["summary"] or "", list(entry["pending"])
+        if not pending:
+            return None
+        summary = (summarize(previous, [turn for _, turn in pending]) or "").strip()[:MAX_SUMMARY_CHARS]
+        if not summary:
+            return None
+        with self.lock:
+            entry = self._entry(key)
+            entry["summary"] = summary
+            # Turns that arrived while we were summarising stay pending (by
+            # sequence number, since the cap may have trimmed the list meanwhile)
+            last = pending[-1][0]
+            entry["pending"] = [(seq, turn) for seq, turn in entry["pending"] if seq > last]
+            self.refreshes += 1
+        return summary
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "conversations": len(self.entries),
+                "with_summary": sum(1 for e in self.entries.values() if e["summary"]),
+                "refreshes": self.refreshes
+            }
+
+
+chat_summaries = RollingSummaries()
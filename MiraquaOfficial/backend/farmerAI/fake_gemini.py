@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gemini generateContent API, for load and latency tests
+that shouldn't spend real quota.
+
+Start it, then point the backend at it with GEMINI_BASE_URL:
+
+    python -m farmerAI.fake_gemini --port 8765 --latency-ms 900 --error-rate 0.05
+    GEMINI_BASE_URL=http://localhost:8765 python start_backend.py
+
+Schedule prompts get a templated 7-day JSON schedule, summary prompts a short
+forecast summary, and everything else a canned chat reply. Latency is drawn
+from a log-normal distribution; errors come back as 429/503 like the real API.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask, Response, jsonify, request
+
+app = Flask(__name__)
+
+CONFIG = {
+    "latency_ms": 900.0,     # median latency of a full response
+    "latency_sigma": 0.5,    # log-normal spread
+    "ttft_ms": 300.0,        # median time to first streamed chunk
+    "chunk_ms": 40.0,        # delay between streamed chunks
+    "error_rate": 0.0,       # share of calls answered with 429/503
+    "failing_models": set(), # models that always answer 404 (deprecated)
+    "seed": None
+}
+
+CHAT_REPLIES = [
+    "Rain chances stay low through tomorrow, so water as planned around 5 AM.",
+    "Your plot is on track. Around 6L tomorrow morning is enough; skip the afternoon.",
+    "Highs near 78°F with 10% rain this week, so keep the current schedule.",
+    "The soil should still be moist from the last watering. Wait a day before watering again."
+]
+
+
+def _delay(median_ms):
+    return random.lognormvariate(math.log(max(median_ms, 1.0) / 1000), CONFIG["latency_sigma"])
+
+
+def _prompt_text(body):
+    parts = []
+    for content in body.get("contents", []):
+        for part in content.get("parts", []):
+            parts.append(part.get("text", ""))
+    return "\n".join(parts)
+
+
+def _schedule_json(prompt):
+    days = 7
+    match = re.search(r"exactly (\d+) objects|(\d+)-day", prompt)
+    if match:
+        days = int(match.group(1) or match.group(2))
+    today = datetime.utcnow().date()
+    schedule = []
+    for i in range(days):
+        skip = random.random() < 0.25
+        schedule.append({
+            "day": f"Day {i + 1}",
+            "date": (today + timedelta(days=i)).strftime("%m/%d/%y"),
+            "liters": 0.0 if skip else round(random.uniform(2.0, 9.0), 1),
+            "explanation": "Rain expected" if skip else "ETc above recent rainfall",
+            "optimal_time": f"0{random.randint(4, 6)}:00 AM"
+        })
+    return json.dumps(schedule, indent=2)
+
+
+def _reply_for(prompt):
+    lower = prompt.lower()
+    if "json array" in lower or ("irrigation schedule" in lower and "json" in lower):
+        return _schedule_json(prompt)
+    if "forecast summary" in prompt:
+        return ("Expect about 30L across the week, front-loaded before the warm spell. "
+                "Wednesday is skipped thanks to forecast rain. Early-morning watering keeps evaporation low.")
+    return random.choice(CHAT_REPLIES)
+
+
+def _usage(prompt, reply):
+    prompt_tokens, reply_tokens = len(prompt) // 4, len(reply) // 4
+    return {"promptTokenCount": prompt_tokens, "candidatesTokenCount": reply_tokens,
+            "totalTokenCount": prompt_tokens + reply_tokens}
+
+
+def _candidate(text, finished=True):
+    candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if finished:
+        candidate["finishReason"] = "STOP"
+    return candidate
+
+
+def _error_for(model):
+    if model in CONFIG["failing_models"]:
+        return 404, "NOT_FOUND", f"models/{model} is not found for API version v1beta"
+    if random.random() < CONFIG["error_rate"]:
+        if random.random() < 0.5:
+            return 429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota)."
+        return 503, "UNAVAILABLE", "The model is overloaded. Please try again later."
+    return None
+
+
+def _error_response(error):
+    code, status, message = error
+    return jsonify({"error": {"code": code, "message": message, "status": status}}), code
+
+
+@app.route("/<version>/models/<model>:generateContent", methods=["POST"])
+def generate_content(version, model):
+    body = request.get_json(force=True)
+    prompt = _prompt_text(body)
+    time.sleep(_delay(CONFIG["latency_ms"]))
+    error = _error_for(model)
+    if error:
+        return _error_response(error)
+    reply = _reply_for(prompt)
+    return jsonify({
+        "candidates": [_candidate(reply)],
+        "usageMetadata": _usage(prompt, reply),
+        "modelVersion": model
+    })
+
+
+@app.route("/<version>/models/<model>:streamGenerateContent", methods=["POST"])
+def stream_generate_content(version, model):
+    body = request.get_json(force=True)
+    prompt = _prompt_text(body)
+    time.sleep(_delay(CONFIG["ttft_ms"]))
+    error = _error_for(model)
+    if error:
+        return _error_response(error)
+    reply = _reply_for(prompt)
+    words = reply.split(" ")
+    chunks = [" ".join(words[i:i + 4]) + (" " if i + 4 < len(words) else "") for i in range(0, len(words), 4)]
+
+    def events():
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(_delay(CONFIG["chunk_ms"]))
+            payload = {"candidates": [_candidate(chunk, finished=i == len(chunks) - 1)], "modelVersion": model}
+            if i == len(chunks) - 1:
+                payload["usageMetadata"] = _usage(prompt, reply)
+            yield f"data: {json.dumps(payload)}\r\n\r\n"
+
+    return Response(events(), mimetype="text/event-stream")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Fake Gemini generateContent server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=CONFIG["latency_ms"])
+    ap.add_argument("--latency-sigma", type=float, default=CONFIG["latency_sigma"])
+    ap.add_argument("--ttft-ms", type=float, default=CONFIG["ttft_ms"])
+    ap.add_argument("--chunk-ms", type=float, default=CONFIG["chunk_ms"])
+    ap.add_argument("--error-rate", type=float, default=CONFIG["error_rate"])
+    ap.add_argument("--fail-model", action="append", default=[],
+                    help="model id that always answers 404, e.g. gemini-1.5-flash (repeatable)")
+    ap.add_argument("--seed", type=int)
+    args = ap.parse_args()
+
+    CONFIG.update({
+        "latency_ms": args.latency_ms,
+        "latency_sigma": args.latency_sigma,
+        "ttft_ms": args.ttft_ms,
+        "chunk_ms": args.chunk_ms,
+        "error_rate": args.error_rate,
+        "failing_models": set(args.fail_model),
+        "seed": args.seed
+    })
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    print(f"🧪 Fake Gemini on http://{args.host}:{args.port} "
+          f"(median {args.latency_ms:.0f}ms, errors {args.error_rate:.0%})")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
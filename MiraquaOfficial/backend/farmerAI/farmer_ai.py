@@ -1,10 +1,25 @@
 import os
 import json
+import time
 from flask import Blueprint, request, jsonify
 from dotenv import load_dotenv
 from supabase import create_client
 from google import genai
-from utils.forecast_utils import get_forecast, CROP_KC
+from utils.forecast_utils import get_forecast
+from utils.et0_utils import forecast_et0
+from utils.water_balance_utils import plot_water_balance
+from utils.schedule_utils import LITERS_PER_MM_M2, horizon_days, normalize_time
+from utils.schedule_history_utils import ScheduleHistory
+from utils.model_utils import ScheduleDay, dump_schedule, parse_schedule
+from utils.schedule_state_utils import pin_edits
+from farmerAI.intent_router import route_prompt
+from farmerAI.model_health import breaker_for, candidate_models
+from farmerAI.llm_metrics import llm_metrics
+from farmerAI.rate_limiter import RateLimitTimeout, gemini_limiter, priority_for
+from farmerAI.schedule_repair import SCHEDULE_GENERATION_CONFIG, repair_schedule
+from farmerAI.chat_summary import RAW_TURNS_WITH_SUMMARY
+from farmerAI.local_answers import local_answer
+from farmerAI.answer_cache import answer_cache, is_self_contained, weather_bucket
 from datetime import datetime, timedelta
 import re
 from dateutil import parser as date_parser
@@ -20,12 +35,57 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-gemini = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+schedule_history = ScheduleHistory(supabase)
+
+# GEMINI_BASE_URL points the client at a stand-in server (see fake_gemini.py) for offline load tests
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+if GEMINI_BASE_URL:
+    print(f"🧪 Using Gemini stand-in at {GEMINI_BASE_URL}")
+    gemini = genai.Client(api_key=os.getenv("GEMINI_API_KEY") or "fake-key", http_options={"base_url": GEMINI_BASE_URL})
+else:
+    gemini = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 GEMINI_MODEL = "models/gemini-2.0-flash"
+CHAT_MODELS = ["models/gemini-2.5-flash", "models/gemini-2.0-flash", "models/gemini-1.5-flash"]
+CHAT_UNAVAILABLE_REPLY = "I'm having trouble connecting right now. Try again in a moment."
 
 ai_blueprint = Blueprint("ai", __name__)
 
+# ✅ GEMINI CALL WITH MODEL FALLBACK
+def generate_with_fallback(models, contents, endpoint, config=None):
+    """Call generate_content on each healthy model in turn until one answers.
+
+    Models whose circuit breaker is open are skipped (see model_health), every
+    attempt waits its turn in the shared rate limiter at the endpoint's
+    priority, and every attempt is recorded in llm_metrics under the endpoint
+    label. Returns (response, model_name); raises the last error if every
+    model fails, or RateLimitTimeout if the quota queue gives up.
+    """
+    last_error = None
+    for attempt, model_name in enumerate(candidate_models(models)):
+        breaker = breaker_for(model_name)
+        try:
+            gemini_limiter.acquire(priority_for(endpoint))
+        except RateLimitTimeout:
+            # No call was made, so a half-open model's probe slot goes back
+            breaker.release_probe()
+            raise
+        start_time = time.perf_counter()
+        try:
+            response = gemini.models.generate_content(model=model_name, contents=contents, config=config)
+        except Exception as model_err:
+            latency = time.perf_counter() - start_time
+            breaker.record_failure(latency, model_err)
+            llm_metrics.record_call(endpoint, model_name, latency, ok=False, attempt=attempt, error=model_err)
+            print(f"⚠️ {endpoint} model {model_name} failed: {model_err}")
+            last_error = model_err
+            continue
+        latency = time.perf_counter() - start_time
+        breaker.record_success(latency)
+        llm_metrics.record_call(endpoint, model_name, latency, ok=True, attempt=attempt,
+                                usage=getattr(response, "usage_metadata", None))
+        return response, model_name
+    raise last_error or Exception("All AI models failed")
+
 # ✅ BASIC WATER USAGE SUMMARY
 def generate_summary(crop, lat, lon, schedule):
     # Handle case where schedule is an error string instead of a list
@@ -34,11 +94,12 @@ def generate_summary(crop, lat, lon, schedule):
     
     if not schedule:
         return f"🌾 Crop: {crop}\n💧 No schedule data available"
-        
-    total_liters = sum(day["liters"] for day in schedule)
+
+    schedule = parse_schedule(schedule)
+    total_liters = sum(day.liters for day in schedule)
     avg_liters = round(total_liters / len(schedule), 2)
-    highest_day = max(schedule, key=lambda x: x["liters"])
-    lowest_day = min(schedule, key=lambda x: x["liters"])
+    highest_day = max(schedule, key=lambda x: x.liters)
+    lowest_day = min(schedule, key=lambda x: x.liters)
 
     lat_safe = lat if lat is not None else 0.0
     lon_safe = lon if lon is not None else 0.0
@@ -47,8 +108,8 @@ def generate_summary(crop, lat, lon, schedule):
         f"🌾 Crop: {crop}, Location: ({lat_safe:.4f}, {lon_safe:.4f})\n"
         f"💧 Total water needed over {len(schedule)} days: {total_liters} liters\n"
         f"📈 Average per day: {avg_liters} liters\n"
-        f"🔺 Highest usage: {highest_day['liters']}L on {highest_day['date']}\n"
-        f"🔻 Lowest usage: {lowest_day['liters']}L on {lowest_day['date']}"
+        f"🔺 Highest usage: {highest_day.liters}L on {highest_day.date}\n"
+        f"🔻 Lowest usage: {lowest_day.liters}L on {lowest_day.date}"
     )
 
 # ✅ AI-GENERATED GEMINI SUMMARY
@@ -78,14 +139,11 @@ Write a short, 3-sentence forecast summary. Include water usage, possible skips
 """
 
         # Try models in order until one succeeds
-        for model_name in ["models/gemini-2.5-flash", "models/gemini-2.0-flash", "models/gemini-1.5-flash"]:
-            try:
-                response = gemini.models.generate_content(model=model_name, contents=prompt)
-                return response.text.strip()
-            except Exception as model_err:
-                print(f"⚠️ Gemini summary {model_name} failed: {model_err}")
-                continue
-        return None
+        try:
+            response, _ = generate_with_fallback(CHAT_MODELS, prompt, endpoint="gem_summary")
+            return response.text.strip()
+        except Exception:
+            return None
 
     except Exception as e:
         print(f"⚠️ Gemini summary error: {e}")
@@ -163,12 +221,119 @@ def chat():
         print(f"❌ Error in chat endpoint: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+# ✅ ROLLING CONVERSATION SUMMARY
+def summarize_conversation(previous_summary, turns):
+    """Fold new chat turns into a conversation's running summary (see chat_summary)."""
+    transcript = "\n".join(
+        f"User: {t.get('prompt', '')[:300]}\nMiraqua: {t.get('reply', '')[:300]}" for t in turns
+    )
+    prompt = f"""
+You maintain a running summary of a conversation between a gardener and Miraqua, an irrigation assistant.
+
+Current summary:
+{previous_summary or "(none yet)"}
+
+New exchanges:
+{transcript}
+
+Rewrite the summary to include the new exchanges. Keep facts the assistant will need later: plots and crops discussed, schedule changes made, the user's preferences and open questions. At most 4 sentences, plain text, no markdown.
+"""
+    response, _ = generate_with_fallback(CHAT_MODELS, prompt, endpoint="chat_summary")
+    return response.text.strip()
+
+# ✅ STREAMING GEMINI REPLY
+def stream_chat_reply(contents, endpoint="chat_stream"):
+    """Yield reply text chunks as Gemini produces them.
+
+    Falls back to the next model only while nothing has been sent yet; once the
+    first chunk is out, a mid-stream failure just ends the reply. The generator
+    returns True only if a model finished its reply cleanly.
+    """
+    for attempt, model_name in enumerate(candidate_models(CHAT_MODELS)):
+        breaker = breaker_for(model_name)
+        try:
+            gemini_limiter.acquire(priority_for(endpoint))
+        except RateLimitTimeout as e:
+            print(f"⚠️ {e}")
+            breaker.release_probe()
+            break
+        start_time = time.perf_counter()
+        ttft = None
+        usage = None
+        error = None
+        finished = False
+        try:
+            for chunk in gemini.models.generate_content_stream(model=model_name, contents=contents):
+                # Token counts arrive on the final chunk
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                if chunk.text:
+                    if ttft is None:
+                        # Time to first token is what the breaker tracks for streams
+                        ttft = time.perf_counter() - start_time
+                        breaker.record_success(ttft)
+                    yield chunk.text
+            finished = True
+        except Exception as model_err:
+            print(f"⚠️ Chat stream model {model_name} failed: {model_err}")
+            error = model_err
+        finally:
+            # Closed (client gone) before the model answered: the outcome is unknown, so
+            # give a half-open model's probe slot back rather than holding it for good
+            if ttft is None and error is None and not finished:
+                breaker.release_probe()
+        if ttft is None:
+            error = error or "empty stream"
+            breaker.record_failure(time.perf_counter() - start_time, error)
+        llm_metrics.record_call(endpoint, model_name, time.perf_counter() - start_time, ok=error is None,
+                                attempt=attempt, usage=usage, error=error, ttft=ttft)
+        if ttft is not None:
+            return error is None
+    yield CHAT_UNAVAILABLE_REPLY
+    return False
+
+def _cache_streamed_reply(chunks, prompt, bucket):
+    """Pass a reply stream through, caching the full reply if it finished cleanly."""
+    parts = []
+    while True:
+        try:
+            text = next(chunks)
+        except StopIteration as done:
+            complete = done.value
+            break
+        parts.append(text)
+        yield text
+    # A reply cut short by a mid-stream failure isn't worth serving again
+    if complete:
+        answer_cache.store(prompt, bucket, "".join(parts).strip())
+
+def record_schedule_change(plot_id, old_schedule, new_schedule, reason, undoes=None):
+    """Add an edit to the plot's schedule history; the edit itself is already saved."""
+    try:
+        schedule_history.record(plot_id, old_schedule, new_schedule, reason, undoes=undoes)
+    except Exception as e:
+        print(f"⚠️ Could not record schedule change for plot {plot_id}: {e}")
+
 # ✅ SMART AI-DRIVEN SCHEDULE EDITING
-def process_chat_command(prompt, crop, lat, lon, plot_name, plot_id, weather, plot, daily, hourly, logs, age):
+def process_chat_command(prompt, crop, lat, lon, plot_name, plot_id, weather, plot, daily, hourly, logs, age, stream=False):
+    """Answer a chat prompt, applying any schedule edits it asks for.
+
+    Returns {"schedule_updated", "reply"}. With stream=True, answers that need
+    Gemini come back as {"schedule_updated", "reply_stream"} instead, where
+    reply_stream is a generator of text chunks (see stream_chat_reply).
+    """
+    started = time.perf_counter()
+    result = _process_chat_command(prompt, crop, lat, lon, plot_name, plot_id, weather, plot, daily, hourly, logs, age, stream)
+    # Count how the turn was served (command / local answer / LLM) for /metrics
+    route = result.pop("served_by", "command")
+    local_intent = result.pop("local_intent", None)
+    latency = time.perf_counter() - started if "reply" in result else None
+    llm_metrics.record_chat_route(route, latency, local_intent)
+    return result
+
+def _process_chat_command(prompt, crop, lat, lon, plot_name, plot_id, weather, plot, daily, hourly, logs, age, stream):
     import re, json
     from datetime import datetime, timedelta
     from dateutil import parser as date_parser
-    from uuid import uuid4
     from google import genai
 
     print(f"🤖 process_chat_command called with:")
@@ -212,17 +377,31 @@ def process_chat_command(prompt, crop, lat, lon, plot_name, plot_id, weather, pl
                     weather_items.append(f"{dt_txt}: {temp}°F, {desc}, {pop:.0f}% rain")
                 weather_summary = "\n".join(weather_items)
 
+            # Self-contained questions the same user asks under similar weather reuse an earlier
+            # reply; without a forecast there's nothing to key on, so nothing is cached
+            cache_bucket = weather_bucket(hourly, [p.get("crop") for p in user_plots], plot.get("user_id"))
+            cacheable = bool(hourly) and plot.get("user_id") is not None and is_self_contained(prompt)
+            if cacheable:
+                cached = answer_cache.lookup(prompt, cache_bucket)
+                if cached:
+                    print(f"🗃️ Answer cache hit {cached['id']} (similarity {cached['similarity']}, "
+                          f"{cached['age_s']:.0f}s old, {cached['hits']} hits): \"{cached['question']}\"")
+                    return {"schedule_updated": False, "reply": cached["reply"], "served_by": "answer_cache"}
+
             # Create location summary
             location_summary = f"Location: ({lat:.4f}, {lon:.4f})" if user_location else "Location: Not available"
 
-            # Create chat history summary
+            # Create chat history summary (rolling summary + last few exchanges)
             history_summary = ""
+            conversation_summary = plot.get("conversation_summary")
+            if conversation_summary:
+                history_summary = f"\n\nConversation so far: {conversation_summary}"
             if recent_chats:
                 history_lines = []
-                for chat in recent_chats[-3:]:  # Last 3 exchanges
+                for chat in recent_chats[-max(plot.get("raw_turns", RAW_TURNS_WITH_SUMMARY), 0 if conversation_summary else 3):]:
                     history_lines.append(f"User: {chat['prompt'][:100]}")
                     history_lines.append(f"Bot: {chat['reply'][:100]}")
-                history_summary = f"\n\nRecent conversation:\n" + "\n".join(history_lines)
+                history_summary += f"\n\nRecent conversation:\n" + "\n".join(history_lines)
 
             # Use Gemini for general gardening advice with user context
             prompt_template = f"""
@@ -249,218 +428,183 @@ You are FarmerBot. The weather forecast and plot data is shown below. You MUST u
 7. Never say "I don't have access" - the data is literally shown above
 
 YOUR ANSWER:"""
-            for model_name in ["models/gemini-2.5-flash", "models/gemini-2.0-flash", "models/gemini-1.5-flash"]:
-                try:
-                    response = gemini.models.generate_content(model=model_name, contents=prompt_template)
-                    return {"schedule_updated": False, "reply": response.text.strip()}
-                except Exception as e:
-                    print(f"⚠️ Chat model {model_name} failed: {e}")
-            return {"schedule_updated": False, "reply": "I'm having trouble connecting right now. Try again in a moment."}
+            if stream:
+                reply_stream = stream_chat_reply(prompt_template, endpoint="chat_general_stream")
+                if cacheable:
+                    reply_stream = _cache_streamed_reply(reply_stream, prompt, cache_bucket)
+                return {"schedule_updated": False, "reply_stream": reply_stream, "served_by": "llm"}
+            try:
+                response, _ = generate_with_fallback(CHAT_MODELS, prompt_template, endpoint="chat_general")
+                reply = response.text.strip()
+                if cacheable:
+                    answer_cache.store(prompt, cache_bucket, reply)
+                return {"schedule_updated": False, "reply": reply, "served_by": "llm"}
+            except Exception:
+                return {"schedule_updated": False, "reply": CHAT_UNAVAILABLE_REPLY, "served_by": "error"}
 
         # For specific plots, load schedules
         try:
             schedule_res = supabase.table("plot_schedules").select("*").eq("plot_id", plot_id).single().execute()
-            schedule = schedule_res.data.get("schedule", [])
+            days = parse_schedule(schedule_res.data.get("schedule", []))
             og_schedule = schedule_res.data.get("og_schedule", [])
-            original_schedule = json.loads(json.dumps(schedule))
+            day_state = schedule_res.data.get("day_state")
         except Exception as schedule_error:
             print(f"⚠️ No schedule found for plot {plot_id}, using empty schedule: {schedule_error}")
-            schedule = []
+            days = []
             og_schedule = []
-            original_schedule = []
+            day_state = None
 
-        updated_schedule = [d.copy() for d in schedule]
+        # Readers (router, local answers, prompts) get the normalized day dicts; edits go to
+        # per-day copies of the models, so those dicts double as the "before" snapshot
+        schedule = dump_schedule(days)
+        original_schedule = schedule
+        updated_schedule = [d.copy() for d in days]
         reply_lines = []
         schedule_changed = False
 
-        # === 2. Build date/day index ===
-        date_map = {}
-        for i, day in enumerate(schedule):
-            try:
-                parsed = date_parser.parse(day["date"]).date()
-                date_map[parsed.strftime("%m/%d/%y")] = i
-                date_map[parsed.strftime("%A").lower()] = i
-                date_map[f"day {i + 1}"] = i
-            except:
-                continue
-
-        target_indices = set()
-
-        if "tomorrow" in prompt_lower:
-            tmr = (datetime.utcnow().date() + timedelta(days=1)).strftime("%m/%d/%y")
-            if tmr in date_map:
-                target_indices.add(date_map[tmr])
-
-        for key in date_map:
-            if key in prompt_lower:
-                target_indices.add(date_map[key])
-
-        matches = re.findall(r"day\s*(\d+)", prompt_lower)
-        for m in matches:
-            idx = int(m) - 1
-            if 0 <= idx < len(schedule):
-                target_indices.add(idx)
-
-        date_matches = re.findall(r"\b(\d{1,2}/\d{1,2}(?:/\d{2})?)\b", prompt_lower)
-        for match in date_matches:
-            try:
-                dt = date_parser.parse(match).strftime("%m/%d/%y")
-                if dt in date_map:
-                    target_indices.add(date_map[dt])
-            except:
-                continue
+        # === 2. Route the prompt (day references + commands) ===
+        intent = route_prompt(prompt_lower, schedule)
+        target_indices = intent.target_indices
 
         # === 3. Time Shift ===
-        time_match = re.search(r"(?:move|shift|change).*to\s*(\d{1,2}(:\d{2})?\s*(am|pm))", prompt_lower)
-        if target_indices and time_match:
-            new_time = time_match.group(1).upper()
+        if target_indices and intent.new_time:
+            new_time = normalize_time(intent.new_time) or intent.new_time
             for idx in target_indices:
-                updated_schedule[idx]["optimal_time"] = new_time
-                updated_schedule[idx]["note"] = f"Time moved to {new_time}"
-                reply_lines.append(f"Shifted {updated_schedule[idx]['day']} ({updated_schedule[idx]['date']}) to {new_time}.")
+                updated_schedule[idx].optimal_time = new_time
+                updated_schedule[idx].note = f"Time moved to {new_time}"
+                reply_lines.append(f"Shifted {updated_schedule[idx].day} ({updated_schedule[idx].date}) to {new_time}.")
             schedule_changed = True
 
         # === 4. Skip or Set ===
-        skip_cmd = any(word in prompt_lower for word in ["skip", "cancel", "don't water", "don't water", "no watering"])
-        set_match = re.search(r"set\s*(?:to)?\s*(\d+(\.\d+)?)\s*(liters|l)?", prompt_lower)
-
-        if target_indices and (skip_cmd or set_match):
+        if target_indices and (intent.skip or intent.set_liters is not None):
             for idx in target_indices:
-                if skip_cmd:
-                    updated_schedule[idx]["liters"] = 0
-                    updated_schedule[idx]["note"] = "User-skip"
-                    reply_lines.append(f"Skipped {updated_schedule[idx]['day']} ({updated_schedule[idx]['date']}).")
-                elif set_match:
-                    new_val = float(set_match.group(1))
-                    updated_schedule[idx]["liters"] = new_val
-                    updated_schedule[idx]["note"] = f"User-set to {new_val}L"
-                    reply_lines.append(f"Set {updated_schedule[idx]['day']} ({updated_schedule[idx]['date']}) to {new_val}L.")
+                if intent.skip:
+                    updated_schedule[idx].liters = 0
+                    updated_schedule[idx].note = "User-skip"
+                    reply_lines.append(f"Skipped {updated_schedule[idx].day} ({updated_schedule[idx].date}).")
+                else:
+                    new_val = intent.set_liters
+                    updated_schedule[idx].liters = new_val
+                    updated_schedule[idx].note = f"User-set to {new_val}L"
+                    reply_lines.append(f"Set {updated_schedule[idx].day} ({updated_schedule[idx].date}) to {new_val}L.")
             schedule_changed = True
 
         # === 5. Pause N Days ===
-        pause_match = re.search(r"pause.*?(\d+)\s*day", prompt_lower)
-        if pause_match:
-            num_days = int(pause_match.group(1))
-            for i in range(min(num_days, len(updated_schedule))):
-                updated_schedule[i]["liters"] = 0
-                updated_schedule[i]["note"] = "Paused by user"
-                reply_lines.append(f"Paused {updated_schedule[i]['day']} ({updated_schedule[i]['date']}).")
+        if intent.pause_days is not None:
+            for i in range(min(intent.pause_days, len(updated_schedule))):
+                updated_schedule[i].liters = 0
+                updated_schedule[i].note = "Paused by user"
+                reply_lines.append(f"Paused {updated_schedule[i].day} ({updated_schedule[i].date}).")
             schedule_changed = True
 
         # === 5b. Percentage increase/decrease (requires % sign or explicit "percent") ===
-        increase_pct_match = re.search(r"(?:increase|raise|bump).*?(\d+)\s*%|(\d+)\s*%.*(?:increase|more)", prompt_lower)
-        decrease_pct_match = re.search(r"(?:decrease|reduce|lower|cut).*?(\d+)\s*%|(\d+)\s*%.*(?:decrease|less)", prompt_lower)
-        whole_week = any(word in prompt_lower for word in ["all", "every", "week", "entire"])
-
-        if (increase_pct_match or decrease_pct_match) and (whole_week or not target_indices):
+        if (intent.increase_pct or intent.decrease_pct) and (intent.whole_week or not target_indices):
             if not target_indices:
                 target_indices = set(range(len(updated_schedule)))
 
-            if increase_pct_match:
-                percent = int(increase_pct_match.group(1) or increase_pct_match.group(2))
+            if intent.increase_pct:
+                percent = intent.increase_pct
                 for idx in target_indices:
-                    old_val = updated_schedule[idx]["liters"]
+                    old_val = updated_schedule[idx].liters
                     new_val = round(old_val * (1 + percent / 100), 1)
-                    updated_schedule[idx]["liters"] = new_val
-                    updated_schedule[idx]["note"] = f"Increased by {percent}%"
+                    updated_schedule[idx].liters = new_val
+                    updated_schedule[idx].note = f"Increased by {percent}%"
                 reply_lines.append(f"Done — increased all days by {percent}%.")
                 schedule_changed = True
 
-            elif decrease_pct_match:
-                percent = int(decrease_pct_match.group(1) or decrease_pct_match.group(2))
+            else:
+                percent = intent.decrease_pct
                 for idx in target_indices:
-                    old_val = updated_schedule[idx]["liters"]
+                    old_val = updated_schedule[idx].liters
                     new_val = round(max(0, old_val * (1 - percent / 100)), 1)
-                    updated_schedule[idx]["liters"] = new_val
-                    updated_schedule[idx]["note"] = f"Decreased by {percent}%"
+                    updated_schedule[idx].liters = new_val
+                    updated_schedule[idx].note = f"Decreased by {percent}%"
                 reply_lines.append(f"Done — reduced all days by {percent}%.")
                 schedule_changed = True
 
         # === 6. Revert to Original ===
-        if "revert" in prompt_lower or "reset schedule" in prompt_lower:
+        if intent.revert:
             if og_schedule:
+                # Day state is re-seeded from the original schedule on the next /get_plan
                 supabase.table("plot_schedules").update({
-                    "schedule": og_schedule
+                    "schedule": og_schedule,
+                    "day_state": None
                 }).eq("plot_id", plot_id).execute()
+                record_schedule_change(plot_id, schedule, og_schedule, prompt.strip())
                 return {"schedule_updated": True, "reply": "Reverted to the original AI schedule."}
             else:
                 return {"schedule_updated": False, "reply": "No original schedule saved to revert to."}
 
         # === 7. Schedule Summary ===
-        if "how much" in prompt_lower or "total" in prompt_lower or "my plan" in prompt_lower:
+        if intent.summary:
             total = sum(day.get("liters", 0) for day in schedule)
             reply = f"Your plan totals {round(total, 1)}L over {len(schedule)} days, averaging {round(total/max(len(schedule),1), 1)}L/day."
             return {"schedule_updated": False, "reply": reply}
 
         # === 8. Constraint Editing ===
-        if "constraint" in prompt_lower and any(k in prompt_lower for k in ["add", "update", "change"]):
-            constraint_match = re.search(r"(?:add|update|change).*constraint[s]?:?\s*(.+)", prompt_lower)
-            if constraint_match:
-                new_constraint = constraint_match.group(1).strip()
-                current = plot.get("custom_constraints", "")
-                updated = current + "; " + new_constraint if current else new_constraint
-                supabase.table("plots").update({
-                    "custom_constraints": updated
-                }).eq("id", plot_id).execute()
-                return {
-                    "schedule_updated": False,
-                    "reply": f"✅ Constraint added: {new_constraint}."
-                }
+        if intent.constraint:
+            new_constraint = intent.constraint
+            current = plot.get("custom_constraints", "")
+            updated = current + "; " + new_constraint if current else new_constraint
+            supabase.table("plots").update({
+                "custom_constraints": updated
+            }).eq("id", plot_id).execute()
+            return {
+                "schedule_updated": False,
+                "reply": f"✅ Constraint added: {new_constraint}."
+            }
 
         # === Save if changed ===
         if schedule_changed:
+            updated_schedule = dump_schedule(updated_schedule)
+            # Edited days are pinned so later forecast updates keep the user's choice
             supabase.table("plot_schedules").update({
-                "schedule": updated_schedule
+                "schedule": updated_schedule,
+                "day_state": pin_edits(day_state, original_schedule, updated_schedule)
             }).eq("plot_id", plot_id).execute()
-            supabase.table("schedule_changes").insert({
-                "id": str(uuid4()),
-                "plot_id": plot_id,
-                "timestamp": datetime.utcnow().isoformat(),
-                "old_schedule": original_schedule,
-                "new_schedule": updated_schedule,
-                "reason": prompt.strip()
-            }).execute()
+            record_schedule_change(plot_id, original_schedule, updated_schedule, prompt.strip())
             return {"schedule_updated": True, "reply": " ".join(reply_lines)}
 
-        # === 9. "Why" question — use explanation field from schedule day ===
-        why_match = re.search(r"\b(why|reason|explain|how come)\b", prompt_lower)
-        if why_match:
-            mentioned_day = None
-            for key, idx in date_map.items():
-                if key in prompt_lower:
-                    mentioned_day = schedule[idx] if idx < len(schedule) else None
-                    break
-            if not mentioned_day and target_indices:
-                mentioned_day = schedule[next(iter(target_indices))]
-            if mentioned_day and mentioned_day.get("explanation"):
+        # === 9. Routine questions answered from the schedule / forecast, no LLM ===
+        reply, local_intent = local_answer(prompt_lower, intent, schedule, daily, hourly)
+        if reply:
+            print(f"⚡ Answered locally ({local_intent})")
+            return {"schedule_updated": False, "reply": reply, "served_by": "local_answer", "local_intent": local_intent}
+
+        # === 10. "Why" question — use explanation field from schedule day ===
+        day_context = ""
+        if intent.why and intent.targets:
+            # First day the user mentioned
+            mentioned_day = schedule[intent.targets[0]]
+            if mentioned_day.get("explanation"):
                 day_context = (
                     f"On {mentioned_day['date']}, {mentioned_day['liters']}L was scheduled at "
                     f"{mentioned_day.get('optimal_time','N/A')}. Reason: {mentioned_day['explanation']}"
                 )
-            elif mentioned_day:
-                day_context = f"On {mentioned_day['date']}, {mentioned_day['liters']}L was scheduled at {mentioned_day.get('optimal_time','N/A')}."
             else:
-                day_context = ""
-        else:
-            day_context = ""
+                day_context = f"On {mentioned_day['date']}, {mentioned_day['liters']}L was scheduled at {mentioned_day.get('optimal_time','N/A')}."
 
-        # === 10. Fallback to Gemini ===
+        # === 11. Fallback to Gemini ===
         schedule_lines = "\n".join(
             f"  {day['date']}: {day['liters']}L at {day.get('optimal_time','N/A')}"
             + (f"  [{day['explanation']}]" if day.get('explanation') else "")
             for day in schedule
         ) if schedule else "No schedule yet."
 
-        # Chat history for conversational context
+        # Chat history for conversational context: the rolling summary stands in for
+        # older turns, so only the turns it doesn't cover yet go in verbatim
         history_block = ""
+        conversation_summary = plot.get("conversation_summary")
+        if conversation_summary:
+            history_block = f"Conversation so far: {conversation_summary}\n\n"
         recent_chats = plot.get("recent_chats", [])
         if recent_chats:
             lines = []
-            for c in recent_chats[-6:]:
+            for c in recent_chats[-max(plot.get("raw_turns", RAW_TURNS_WITH_SUMMARY), 0 if conversation_summary else 6):]:
                 if c.get("prompt"): lines.append(f"User: {c['prompt'][:120]}")
                 if c.get("reply"):  lines.append(f"Miraqua: {c['reply'][:120]}")
             if lines:
-                history_block = "Recent conversation:\n" + "\n".join(lines) + "\n\n"
+                history_block += "Recent conversation:\n" + "\n".join(lines) + "\n\n"
 
         # Weather summary
         weather_summary = ""
@@ -496,32 +640,39 @@ Schedule (with reasoning where available):
 
 {f"Day context: {day_context}" if day_context else ""}{history_block}User: {prompt.strip()}"""
 
-        # Try chat models in order
-        for model_name in ["models/gemini-2.5-flash", "models/gemini-2.0-flash", "models/gemini-1.5-flash"]:
-            try:
-                response = gemini.models.generate_content(model=model_name, contents=system_prompt)
-                return {"schedule_updated": False, "reply": response.text.strip()}
-            except Exception as model_err:
-                print(f"⚠️ Chat model {model_name} failed: {model_err}")
+        if stream:
+            return {"schedule_updated": False, "reply_stream": stream_chat_reply(system_prompt, endpoint="chat_stream"), "served_by": "llm"}
 
-        return {"schedule_updated": False, "reply": "I'm having trouble connecting right now. Try again in a moment."}
+        # Try chat models in order
+        try:
+            response, _ = generate_with_fallback(CHAT_MODELS, system_prompt, endpoint="chat")
+            return {"schedule_updated": False, "reply": response.text.strip(), "served_by": "llm"}
+        except Exception:
+            return {"schedule_updated": False, "reply": CHAT_UNAVAILABLE_REPLY, "served_by": "error"}
 
     except Exception as e:
         print(f"❌ Error in process_chat_command: {e}")
         import traceback; traceback.print_exc()
         return {
             "schedule_updated": False,
-            "reply": "Something went wrong on my end. Try rephrasing or ask again."
+            "reply": "Something went wrong on my end. Try rephrasing or ask again.",
+            "served_by": "error"
         }
 
         
 
 
-def generate_ai_schedule(plot, daily, hourly, logs):
+def generate_ai_schedule(plot, daily, hourly, logs, days=None, today=None):
+    """today (a date) is the schedule's first day; defaults to today in UTC.
+
+    Raises RateLimitTimeout when the Gemini quota queue gives up, rather than
+    falling back to a placeholder schedule.
+    """
     from google import genai
     from datetime import datetime, timedelta
     import json, re
 
+    days = horizon_days(days or plot.get("horizon_days"))
     crop = plot["crop"]
     area = plot.get("area", 1.0)
     zip_code = plot.get("zip_code", "00000")
@@ -530,13 +681,29 @@ def generate_ai_schedule(plot, daily, hourly, logs):
     age = plot.get("age_at_entry", 0.0)
     lat = plot.get("lat")
     lon = plot.get("lon")
-    today = datetime.utcnow().date().isoformat()
+    start_date = today or datetime.utcnow().date()
+    today = start_date.isoformat()
+    et0_table = forecast_et0(daily, hourly, lat)
+    et0_lines = "\n".join(
+        f"- {row['date']}: Penman-Monteith {row['et0_pm']} mm, Hargreaves {row['et0_hargreaves']} mm"
+        for row in et0_table
+    ) or "Not available (no forecast); estimate from crop and season."
+    balance = plot_water_balance(plot, daily, logs, et0_table, age, today=start_date)
+    if balance:
+        balance_lines = "\n".join(
+            [f"- Today: {balance['today']['depletion_mm']} mm depleted "
+             f"(root zone holds {balance['taw_mm']} mm, stress starts past {balance['raw_mm']} mm)"]
+            + [f"- {d['date']}: {d['depletion_mm']} mm depleted, rain {d['rain_mm']} mm"
+               f"{' → needs water' if d['needs_water'] else ''}" for d in balance["days"]]
+        )
+    else:
+        balance_lines = "Not available (no forecast)."
 
     prompt = f"""
 You are Miraqua, a smart irrigation assistant designed to save farmers water and money — while keeping their crops healthy.
 
 Today is {today}.
-Your job is to generate a precise, weather-aware, and cost-saving 7-day irrigation schedule tailored to this specific plot.
+Your job is to generate a precise, weather-aware, and cost-saving {days}-day irrigation schedule tailored to this specific plot.
 
 ---
 
@@ -555,8 +722,18 @@ Your job is to generate a precise, weather-aware, and cost-saving 7-day irrigati
 Daily Forecast:
 {json.dumps(daily, indent=2)}
 
-Hourly Forecast:
-{json.dumps(hourly, indent=2)}
+Hourly Forecast (first 24 entries; later days are in the daily forecast):
+{json.dumps(hourly[:24], indent=2)}
+
+---
+
+📐 **Reference ET₀ (computed with FAO-56, mm/day)**
+{et0_lines}
+
+---
+
+🪣 **Root-Zone Water Balance (FAO-56, if no more water is applied)**
+{balance_lines}
 
 ---
 
@@ -569,19 +746,21 @@ Hourly Forecast:
 
 1. Your #1 goal is to **minimize water usage and save money** — while providing enough irrigation to support healthy crop growth.
 
-2. Use **two evapotranspiration (ET₀) models** to estimate daily crop water needs:
-   - **Penman-Monteith** (preferred): based on temperature, humidity, wind, and solar radiation/cloud cover
-   - **Hargreaves** (fallback): based on high/low temperature and estimated solar radiation
+2. Use the **computed reference ET₀** above for daily crop water needs (do not recompute it):
+   - **Penman-Monteith** (preferred): from temperature, humidity, wind, and cloud-estimated solar radiation
+   - **Hargreaves** (cross-check): from the high/low temperature range and extraterrestrial radiation
 
 3. For each day:
-   - Compute ET₀ using both models
-   - Adjust by the crop coefficient (Kc) to get ETc:  
+   - Adjust ET₀ by the crop coefficient (Kc) to get ETc:  
      \[ ETc = ET₀ × Kc \]
-   - If the models differ by >20%, explain the difference and choose the one that results in **less water use without harming the crop**
+   - Liters = ETc (mm) × area (m²)
+   - If the two values differ by >20%, explain the difference and choose the one that results in **less water use without harming the crop**
 
 4. Check soil moisture and forecast conditions:
+   - Water on days marked "needs water" in the water balance, enough to bring depletion back toward 0 mm
+     (1 mm over the plot = {LITERS_PER_MM_M2:g} L per m² of area); once watered, later days start from that refill
    - **Skip irrigation** if:
-     - Soil moisture forecast > 35%
+     - The root zone is not past its stress point that day
      - Rain probability > 40%
      - The crop was watered within the last 48 hours and moisture remains high
 
@@ -598,7 +777,7 @@ Hourly Forecast:
 
 ✅ **Return Format**
 
-Respond with only a valid JSON array containing **exactly 7 objects** (one per day), like this:
+Respond with only a valid JSON array containing **exactly {days} objects** (one per day), like this:
 
 [
   {{
@@ -612,7 +791,7 @@ Respond with only a valid JSON array containing **exactly 7 objects** (one per d
 ]
 
 ### Rules for format:
-- `"day"` must be: `"Day 1"`, `"Day 2"`, ..., `"Day 7"`
+- `"day"` must be: `"Day 1"`, `"Day 2"`, ..., `"Day {days}"`
 - `"date"` format must be: **MM/DD/YY** (e.g., `"06/16/25"`)
 - `"liters"` must be a numeric value (float or int)
 - `"optimal_time"` must be in **HH:MM AM/PM** format (e.g., `"04:00 AM"`)
@@ -628,46 +807,29 @@ Respond with only a valid JSON array containing **exactly 7 objects** (one per d
             "models/gemini-pro-latest"   # Fallback model
         ]
         
-        response = None
-        last_error = None
-        
-        for model_name in models_to_try:
-            try:
-                import time
-                print(f"🤖 Trying AI model: {model_name}")
-                start_time = time.time()
-                response = gemini.models.generate_content(model=model_name, contents=prompt)
-                elapsed = time.time() - start_time
-                print(f"✅ AI generation successful with {model_name} in {elapsed:.2f}s")
-                break
-            except Exception as e:
-                last_error = e
-                print(f"❌ Model {model_name} failed: {str(e)[:100]}...")
-                continue
-
-        if response is None:
-            raise last_error or Exception("All AI models failed")
-            
-        text = response.text.strip()
-
-        # ✅ Strip triple backticks if present
-        clean_text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip(), flags=re.MULTILINE)
-
-        # ✅ Parse JSON
-        schedule = json.loads(clean_text)
-
-        # ✅ Enforce correct dates & day names
-        for i in range(7):
-            date_obj = datetime.utcnow().date() + timedelta(days=i)
-            schedule[i]["date"] = date_obj.strftime("%m/%d/%y")
+        start_time = time.time()
+        # Structured output: Gemini returns JSON matching the schedule schema
+        response, model_name = generate_with_fallback(models_to_try, prompt, endpoint="schedule",
+                                                      config=SCHEDULE_GENERATION_CONFIG)
+        elapsed = time.time() - start_time
+        print(f"✅ AI generation successful with {model_name} in {elapsed:.2f}s")
 
-            schedule[i]["day"] = f"Day {i + 1}"
+        text = response.text.strip()
 
+        # ✅ Validate, and repair locally (length, dates & day names, liters, times)
+        schedule, repairs = repair_schedule(text, days=days, today=start_date)
+        llm_metrics.record_schedule_output("schedule", repairs)
 
-        print("✅ AI schedule parsed and fixed successfully")
-        return schedule
+        print(f"✅ AI schedule parsed{' and repaired (' + ', '.join(repairs) + ')' if repairs else ''} successfully")
+        return dump_schedule(parse_schedule(schedule))
 
+    except RateLimitTimeout:
+        # Out of quota: the simple prompt would wait in the same queue, and a
+        # placeholder schedule must not be saved over a real one
+        raise
     except Exception as e:
+        if 'text' in locals():
+            llm_metrics.record_parse_failure("schedule")
         print("⚠️ AI Schedule Output:", {
             "error": "Could not parse response",
             "raw": text if 'text' in locals() else "no response",
@@ -680,45 +842,46 @@ Respond with only a valid JSON array containing **exactly 7 objects** (one per d
         # Try a simpler AI prompt for fallback
         try:
             simple_prompt = f"""
-Generate a 7-day irrigation schedule for {crop} crop in {area}m² area.
+Generate a {days}-day irrigation schedule for {crop} crop in {area}m² area.
 Today is {today}. 
-Return ONLY a JSON array with 7 objects, each with: day, date (MM/DD/YY), liters (number), optimal_time (HH:MM AM/PM).
+Return ONLY a JSON array with {days} objects, each with: day, date (MM/DD/YY), liters (number), optimal_time (HH:MM AM/PM).
 Keep it simple and practical.
 """
             
-            fallback_response = gemini.models.generate_content(model=GEMINI_MODEL, contents=simple_prompt)
+            fallback_response, _ = generate_with_fallback([GEMINI_MODEL], simple_prompt, endpoint="schedule_fallback",
+                                                          config=SCHEDULE_GENERATION_CONFIG)
             fallback_text = fallback_response.text.strip()
             
-            # Try to parse the simpler AI response
-            clean_fallback = re.sub(r"^```(?:json)?\s*|\s*```$", "", fallback_text.strip(), flags=re.MULTILINE)
-            fallback_schedule = json.loads(clean_fallback)
-            
-            # Add real dates
-            for i, day in enumerate(fallback_schedule):
-                date = (datetime.utcnow() + timedelta(days=i)).strftime("%m/%d/%y")
-                day["date"] = date
-                day["reason"] = "AI-enhanced fallback schedule"
+            # Try to parse the simpler AI response (repair also adds real dates)
+            fallback_schedule, repairs = repair_schedule(fallback_text, days=days, today=start_date)
+            llm_metrics.record_schedule_output("schedule_fallback", repairs)
+            fallback_days = parse_schedule(fallback_schedule)
+            for day in fallback_days:
+                day.explanation = day.explanation or "AI-enhanced fallback schedule"
             
             print("✅ AI-enhanced fallback schedule generated successfully")
-            return fallback_schedule
+            return dump_schedule(fallback_days)
             
+        except RateLimitTimeout:
+            raise
         except Exception as fallback_error:
+            if 'fallback_text' in locals():
+                llm_metrics.record_parse_failure("schedule_fallback")
             print(f"⚠️ AI fallback also failed: {fallback_error}")
             # Ultimate fallback - basic schedule
             print("🔄 Using basic fallback schedule...")
             fallback_schedule = []
             base_liters = 2.0  # Base watering amount
             
-            for i in range(7):
-                date = (datetime.utcnow() + timedelta(days=i)).strftime("%m/%d/%y")
+            for i in range(days):
+                date = (start_date + timedelta(days=i)).strftime("%m/%d/%y")
                 # Simple fallback: water every other day with varying amounts
                 liters = base_liters + (i % 2) * 1.0
-                fallback_schedule.append({
-                    "day": f"Day {i+1}",
-                    "date": date,
-                    "liters": round(liters, 1),
-                    "optimal_time": "06:00",
-                    "reason": "Basic fallback schedule - AI unavailable"
-                })
+                fallback_schedule.append(ScheduleDay(
+                    day=f"Day {i+1}",
+                    date=date,
+                    liters=round(liters, 1),
+                    explanation="Basic fallback schedule - AI unavailable"
+                ).to_dict())
             
             return fallback_schedule
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Small offline intent classifier for chat prompts: TF-IDF over word unigrams
+and bigrams feeding a softmax (multinomial logistic) regression, all in NumPy.
+
+It is trained from the labelled prompts in intent_examples.tsv the first time
+it is needed (a few tens of milliseconds, no network) and used by
+local_answers to spot routine questions that can be answered without Gemini.
+
+Run it directly to see cross-validated accuracy on the examples:
+
+    python -m farmerAI.intent_classifier
+"""
+
+import os
+import re
+import threading
+
+import numpy as np
+
+EXAMPLES_PATH = os.path.join(os.path.dirname(__file__), "intent_examples.tsv")
+
+TOKEN_RE = re.compile(r"[a-z']+|\d+")
+
+
+def tokenize(text):
+    words = ["<num>" if w.isdigit() else w.replace("'", "") for w in TOKEN_RE.findall(text.lower())]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def load_examples(path=EXAMPLES_PATH):
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+            label, _, text = line.partition("\t")
+            if text:
+                examples.append((label.strip(), text.strip()))
+    return examples
+
+
+class IntentClassifier:
+    def __init__(self, labels, vocab, idf, weights, bias):
+        self.labels = labels
+        self.vocab = vocab       # term -> column
+        self.idf = idf           # (terms,)
+        self.weights = weights   # (terms, labels)
+        self.bias = bias         # (labels,)
+
+    @classmethod
+    def train(cls, examples, epochs=300, lr=2.0, l2=1e-3):
+        labels = sorted({label for label, _ in examples})
+        docs = [tokenize(text) for _, text in examples]
+        vocab = {}
+        for tokens in docs:
+            for term in tokens:
+                vocab.setdefault(term, len(vocab))
+
+        df = np.zeros(len(vocab))
+        for tokens in docs:
+            df[[vocab[t] for t in set(tokens)]] += 1
+        idf = np.log((1 + len(docs)) / (1 + df)) + 1.0
+
+        X = np.vstack([cls._vector(tokens, vocab, idf) for tokens in docs])
+        y = np.zeros((len(docs), len(labels)))
+        y[np.arange(len(docs)), [labels.index(label) for label, _ in examples]] = 1.0
+
+        # Full-batch gradient descent on the cross-entropy; the data is tiny
+        W = np.zeros((len(vocab), len(labels)))
+        b = np.zeros(len(labels))
+        for _ in range(epochs):
+            probs = _softmax(X @ W + b)
+            grad = (probs - y) / len(docs)
+            W -= lr * (X.T @ grad + l2 * W)
+            b -= lr * grad.sum(axis=0)
+        return cls(labels, vocab, idf, W, b)
+
+    @staticmethod
+    def _vector(tokens, vocab, idf):
+        vec = np.zeros(len(vocab))
+        for term in tokens:
+            col = vocab.get(term)
+            if col is not None:
+                vec[col] += 1.0
+        nz = vec > 0
+        vec[nz] = (1.0 + np.log(vec[nz])) * idf[nz]  # sublinear tf
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def predict(self, text):
+        """Return (label, confidence) for a prompt."""
+        counts = {}
+        for term in tokenize(text):
+            col = self.vocab.get(term)
+            if col is not None:
+                counts[col] = counts.get(col, 0) + 1
+        if not counts:
+            return "other", 0.0
+        cols = np.fromiter(counts.keys(), dtype=np.int64)
+        values = (1.0 + np.log(np.fromiter(counts.values(), dtype=float))) * self.idf[cols]
+        values /= np.linalg.norm(values)
+        probs = _softmax(values @ self.weights[cols] + self.bias)
+        best = int(np.argmax(probs))
+        return self.labels[best], float(probs[best])
+
+
+def _softmax(z):
+    z = z - z.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+_classifier = None
+_lock = threading.Lock()
+
+
+def get_classifier():
+    """The shared classifier, trained from intent_examples.tsv on first use."""
+    global _classifier
+    if _classifier is None:
+        with _lock:
+            if _classifier is None:
+                _classifier = IntentClassifier.train(load_examples())
+    return _classifier
+
+
+def cross_validate(examples, folds=5):
+    """Accuracy per label over k interleaved folds."""
+    hits, totals = {}, {}
+    for k in range(folds):
+        train = [e for i, e in enumerate(examples) if i % folds != k]
+        test = [e for i, e in enumerate(examples) if i % folds == k]
+        model = IntentClassifier.train(train)
+        for label, text in test:
+            predicted, _ = model.predict(text)
+            totals[label] = totals.get(label, 0) + 1
+            hits[label] = hits.get(label, 0) + (predicted == label)
+    return {label: hits[label] / totals[label] for label in sorted(totals)}
+
+
+def main():
+    examples = load_examples()
+    scores = cross_validate(examples)
+    print(f"🧠 {len(examples)} examples, {len(scores)} intents")
+    for label, acc in scores.items():
+        print(f"  {label:<15} {acc:.0%}")
+    overall = sum(scores[l] * sum(1 for e in examples if e[0] == l) for l in scores) / len(examples)
+    print(f"  {'overall':<15} {overall:.0%}")
+
+
+if __name__ == "__main__":
+    main()
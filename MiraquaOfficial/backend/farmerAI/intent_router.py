@@ -0,0 +1,148 @@
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from dateutil import parser as date_parser
+
+# Rule-based command parsing for process_chat_command. All patterns are compiled
+# once at import, and the date/day index for a schedule is built once per
+# schedule version instead of on every message.
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# One scan over the prompt picks up every day reference it contains.
+TARGET_RE = re.compile(
+    r"(?P<tomorrow>tomorrow)"
+    r"|(?P<weekday>" + "|".join(WEEKDAYS) + r")"
+    r"|day\s*(?P<day_num>\d+)"
+    r"|\b(?P<month>\d{1,2})/(?P<dom>\d{1,2})(?:/(?P<year>\d{2}))?\b"
+)
+TIME_SHIFT_RE = re.compile(r"(?:move|shift|change).*to\s*(\d{1,2}(:\d{2})?\s*(am|pm))")
+SET_RE = re.compile(r"set\s*(?:to)?\s*(\d+(\.\d+)?)\s*(liters|l)?")
+PAUSE_RE = re.compile(r"pause.*?(\d+)\s*day")
+INCREASE_PCT_RE = re.compile(r"(?:increase|raise|bump).*?(\d+)\s*%|(\d+)\s*%.*(?:increase|more)")
+DECREASE_PCT_RE = re.compile(r"(?:decrease|reduce|lower|cut).*?(\d+)\s*%|(\d+)\s*%.*(?:decrease|less)")
+CONSTRAINT_RE = re.compile(r"(?:add|update|change).*constraint[s]?:?\s*(.+)")
+WHY_RE = re.compile(r"\b(why|reason|explain|how come)\b")
+SKIP_RE = re.compile(r"skip|cancel|don't water|don’t water|no watering")
+WHOLE_WEEK_RE = re.compile(r"all|every|week|entire")
+SUMMARY_RE = re.compile(r"how much|total|my plan")
+REVERT_RE = re.compile(r"revert|reset schedule")
+
+
+class ScheduleIndex:
+    """Lookup from day references ("06/16/25", "monday", "day 3") to schedule positions."""
+
+    __slots__ = ("by_date", "by_weekday", "length")
+
+    def __init__(self, dates):
+        self.by_date = {}
+        self.by_weekday = {}
+        self.length = len(dates)
+        for i, raw in enumerate(dates):
+            try:
+                parsed = date_parser.parse(raw).date()
+            except (ValueError, TypeError, OverflowError):
+                continue
+            self.by_date.setdefault(parsed.strftime("%m/%d/%y"), i)
+            self.by_weekday.setdefault(parsed.strftime("%A").lower(), i)
+
+
+@lru_cache(maxsize=1024)
+def _index_for_dates(dates):
+    return ScheduleIndex(dates)
+
+
+def schedule_index(schedule):
+    """Return the (cached) ScheduleIndex for this version of a schedule."""
+    return _index_for_dates(tuple(str(day.get("date", "")) for day in schedule))
+
+
+class ChatIntent:
+    """Everything the rule-based commands need to know about one prompt."""
+
+    __slots__ = (
+        "targets", "new_time", "skip", "set_liters", "pause_days",
+        "increase_pct", "decrease_pct", "whole_week", "revert",
+        "summary", "constraint", "why"
+    )
+
+    def __init__(self):
+        self.targets = []
+        self.new_time = None
+        self.skip = False
+        self.set_liters = None
+        self.pause_days = None
+        self.increase_pct = None
+        self.decrease_pct = None
+        self.whole_week = False
+        self.revert = False
+        self.summary = False
+        self.constraint = None
+        self.why = False
+
+    @property
+    def target_indices(self):
+        return set(self.targets)
+
+
+def _target_index(match, index, today):
+    if match.group("tomorrow"):
+        return index.by_date.get((today + timedelta(days=1)).strftime("%m/%d/%y"))
+    if match.group("weekday"):
+        return index.by_weekday.get(match.group("weekday"))
+    if match.group("day_num"):
+        idx = int(match.group("day_num")) - 1
+        return idx if 0 <= idx < index.length else None
+    year = match.group("year") or today.strftime("%y")
+    key = f"{int(match.group('month')):02d}/{int(match.group('dom')):02d}/{year}"
+    return index.by_date.get(key)
+
+
+def route_prompt(prompt_lower, schedule):
+    """Parse a lower-cased chat prompt into a ChatIntent against the given schedule.
+
+    targets lists the referenced schedule positions in the order they appear
+    in the prompt, without duplicates.
+    """
+    intent = ChatIntent()
+    index = schedule_index(schedule)
+    today = datetime.utcnow().date()
+
+    for match in TARGET_RE.finditer(prompt_lower):
+        idx = _target_index(match, index, today)
+        if idx is not None and idx not in intent.targets:
+            intent.targets.append(idx)
+
+    time_match = TIME_SHIFT_RE.search(prompt_lower)
+    if time_match:
+        intent.new_time = time_match.group(1).upper()
+
+    intent.skip = SKIP_RE.search(prompt_lower) is not None
+    set_match = SET_RE.search(prompt_lower)
+    if set_match:
+        intent.set_liters = float(set_match.group(1))
+
+    pause_match = PAUSE_RE.search(prompt_lower)
+    if pause_match:
+        intent.pause_days = int(pause_match.group(1))
+
+    if "%" in prompt_lower:
+        increase_match = INCREASE_PCT_RE.search(prompt_lower)
+        if increase_match:
+            intent.increase_pct = int(increase_match.group(1) or increase_match.group(2))
+        else:
+            decrease_match = DECREASE_PCT_RE.search(prompt_lower)
+            if decrease_match:
+                intent.decrease_pct = int(decrease_match.group(1) or decrease_match.group(2))
+    intent.whole_week = WHOLE_WEEK_RE.search(prompt_lower) is not None
+
+    intent.revert = REVERT_RE.search(prompt_lower) is not None
+    intent.summary = SUMMARY_RE.search(prompt_lower) is not None
+
+    if "constraint" in prompt_lower:
+        constraint_match = CONSTRAINT_RE.search(prompt_lower)
+        if constraint_match:
+            intent.constraint = constraint_match.group(1).strip()
+
+    intent.why = WHY_RE.search(prompt_lower) is not None
+    return intent
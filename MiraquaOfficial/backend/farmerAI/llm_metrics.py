@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+# Instrumentation for every Gemini call: latency histograms and token / retry /
+# parse-failure counters labelled by endpoint and model, served on /metrics,
+# plus one JSON line per call in a local sink for offline cost analysis.
+# Chat turns are also counted by how they were served (rule-based command,
+# local templated answer, semantic answer cache, or LLM) to show how much
+# traffic skips Gemini.
+
+CHAT_ROUTES = ("command", "local_answer", "answer_cache", "llm", "error")
+LOCAL_ROUTES = ("command", "local_answer", "answer_cache")
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, float("inf"))
+
+# Rough list prices (USD per 1M tokens: input, output) for cost estimates
+MODEL_PRICES = {
+    "models/gemini-2.5-flash": (0.30, 2.50),
+    "models/gemini-2.0-flash": (0.10, 0.40),
+    "models/gemini-1.5-flash": (0.075, 0.30),
+    "models/gemini-pro-latest": (1.25, 10.00),
+}
+
+JSONL_PATH = os.getenv("LLM_METRICS_JSONL", os.path.join(os.path.dirname(os.path.dirname(__file__)), "llm_calls.jsonl"))
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, value):
+        self.n += 1
+        self.total += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile."""
+        if not self.n:
+            return None
+        rank = q * self.n
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def snapshot(self):
+        label = lambda b: "+Inf" if b == float("inf") else b
+        return {
+            "count": self.n,
+            "sum": round(self.total, 3),
+            "avg": round(self.total / self.n, 3) if self.n else None,
+            "p50_le": label(self.quantile(0.5)),
+            "p95_le": label(self.quantile(0.95)),
+            "buckets": {str(label(b)): c for b, c in zip(self.buckets, self.counts)}
+        }
+
+
+class CallStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.ttft = Histogram()
+        self.calls = 0
+        self.errors = 0
+        self.fallbacks = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.cost_usd = 0.0
+
+    def snapshot(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "fallbacks": self.fallbacks,
+            "prompt_tokens": self.prompt_tokens,
+            "response_tokens": self.response_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "latency_s": self.latency.snapshot(),
+            "ttft_s": self.ttft.snapshot() if self.ttft.n else None
+        }
+
+
+class LLMMetrics:
+    def __init__(self, jsonl_path=JSONL_PATH):
+        self.jsonl_path = jsonl_path
+        self.stats = {}          # (endpoint, model) -> CallStats
+        self.parse_failures = {} # endpoint -> count
+        self.schedule_outputs = {} # endpoint -> {"clean", "repaired", "failed"}
+        self.chat_routes = {route: 0 for route in CHAT_ROUTES}
+        self.local_intents = {}    # intent -> chats answered locally
+        self.route_latency = {"local_answer": Histogram(), "answer_cache": Histogram(), "llm": Histogram()}
+        self.lock = threading.Lock()
+        self.sink_lock = threading.Lock()
+
+    def record_call(self, endpoint, model, latency, ok, attempt=0, usage=None, error=None, ttft=None):
+        """Record one generate_content call.
+
+        attempt is the position in the fallback chain (0 = first model tried);
+        usage is the response's usage_metadata, when there is one.
+        """
+        prompt_tokens = getattr(usage, "prompt_token_count", None) or 0
+        response_tokens = getattr(usage, "candidates_token_count", None) or 0
+        in_price, out_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        cost = (prompt_tokens * in_price + response_tokens * out_price) / 1_000_000
+
+        with self.lock:
+            stats = self.stats.setdefault((endpoint, model), CallStats())
+            stats.calls += 1
+            stats.latency.observe(latency)
+            if ttft is not None:
+                stats.ttft.observe(ttft)
+            if not ok:
+                stats.errors += 1
+            if attempt:
+                stats.fallbacks += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.response_tokens += response_tokens
+            stats.cost_usd += cost
+
+        self._write({
+            "ts": datetime.utcnow().isoformat(),
+            "endpoint": endpoint,
+            "model": model,
+            "ok": ok,
+            "attempt": attempt,
+            "latency_s": round(latency, 4),
+            "ttft_s": round(ttft, 4) if ttft is not None else None,
+            "prompt_tokens": prompt_tokens,
+            "response_tokens": response_tokens,
+            "cost_usd": round(cost, 6),
+            "error": str(error)[:200] if error else None
+        })
+
+    def record_parse_failure(self, endpoint):
+        with self.lock:
+            self.parse_failures[endpoint] = self.parse_failures.get(endpoint, 0) + 1
+            self._count_output(endpoint, "failed")
+        self._write({"ts": datetime.utcnow().isoformat(), "endpoint": endpoint, "event": "parse_failure"})
+
+    def record_schedule_output(self, endpoint, repairs):
+        """Record a parsed schedule; repairs is the list of fixes applied locally."""
+        with self.lock:
+            self._count_output(endpoint, "repaired" if repairs else "clean")
+        if repairs:
+            self._write({"ts": datetime.utcnow().isoformat(), "endpoint": endpoint, "event": "repaired", "repairs": repairs})
+
+    def record_chat_route(self, route, latency, intent=None):
+        """Record how one chat turn was served; latency is end-to-end seconds.
+
+        Streamed LLM replies pass latency=None (the reply is still arriving).
+        """
+        with self.lock:
+            self.chat_routes[route] = self.chat_routes.get(route, 0) + 1
+            if route == "local_answer":
+                self.local_intents[intent] = self.local_intents.get(intent, 0) + 1
+            if latency is not None and route in self.route_latency:
+                self.route_latency[route].observe(latency)
+
+    def _chat_routing(self):
+        total = sum(self.chat_routes.values())
+        llm = self.route_latency["llm"]
+        # Each local answer or cache hit saves roughly one average LLM turn
+        skipped = [self.route_latency["local_answer"], self.route_latency["answer_cache"]]
+        saved = sum(h.n * (llm.total / llm.n) - h.total for h in skipped) if llm.n else None
+        return {
+            **self.chat_routes,
+            "total": total,
+            "served_locally_share": round(sum(self.chat_routes[r] for r in LOCAL_ROUTES) / max(total, 1), 3),
+            "local_answer_share": round(self.chat_routes["local_answer"] / max(total, 1), 3),
+            "answer_cache_share": round(self.chat_routes["answer_cache"] / max(total, 1), 3),
+            "local_intents": dict(self.local_intents),
+            "latency_s": {route: h.snapshot() for route, h in self.route_latency.items()},
+            "latency_saved_s": round(saved, 3) if saved is not None else None
+        }
+
+    def _count_output(self, endpoint, outcome):
+        counts = self.schedule_outputs.setdefault(endpoint, {"clean": 0, "repaired": 0, "failed": 0})
+        counts[outcome] += 1
+
+    def _write(self, row):
+        if not self.jsonl_path:
+            return
+        try:
+            with self.sink_lock, open(self.jsonl_path, "a") as f:
+                f.write(json.dumps(row) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write LLM metrics: {e}")
+
+    def snapshot(self):
+        with self.lock:
+            by_endpoint = {}
+            for (endpoint, model), stats in self.stats.items():
+                by_endpoint.setdefault(endpoint, {})[model] = stats.snapshot()
+            return {
+                "endpoints": by_endpoint,
+                "parse_failures": dict(self.parse_failures),
+                "schedule_outputs": {
+                    endpoint: {**counts, "repair_rate": round(counts["repaired"] / max(sum(counts.values()), 1), 3)}
+                    for endpoint, counts in self.schedule_outputs.items()
+                },
+                "chat_routing": self._chat_routing(),
+                "total_cost_usd": round(sum(s.cost_usd for s in self.stats.values()), 6)
+            }
+
+
+llm_metrics = LLMMetrics()
@@ -0,0 +1,103 @@
+import os
+from datetime import datetime
+
+from farmerAI.intent_classifier import get_classifier
+from farmerAI.intent_router import schedule_index
+
+# Templated replies for routine plot questions ("should I water today?", "when
+# is the next watering?", "how much this week?", "will it rain?"), built from
+# the stored schedule and forecast. process_chat_command tries these before
+# Gemini and only uses one when the intent classifier is confident.
+
+LOCAL_ANSWER_MIN_CONFIDENCE = float(os.getenv("LOCAL_ANSWER_MIN_CONFIDENCE", "0.7"))
+
+
+def _liters(day):
+    try:
+        return round(float(day.get("liters") or 0), 1)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _today_index(schedule):
+    """Index of today's entry, or None when the schedule doesn't cover today (stale plan)."""
+    today = datetime.utcnow().strftime("%m/%d/%y")
+    return schedule_index(schedule).by_date.get(today)
+
+
+def _day_label(day, is_today):
+    return "today" if is_today else f"on {day.get('day')} ({day.get('date')})"
+
+
+def _water_today(intent, schedule, daily, hourly):
+    today_idx = _today_index(schedule)
+    idx = intent.targets[0] if intent.targets else today_idx
+    if idx is None:
+        return None  # out-of-date plan: let Gemini explain rather than call an old day "today"
+    day = schedule[idx]
+    when = _day_label(day, idx == today_idx)
+    liters = _liters(day)
+    if liters <= 0 or day.get("optimal_time") == "Skipped":
+        reason = f" {day['explanation']}" if day.get("explanation") else ""
+        return f"No watering {when}.{reason}".strip()
+    return f"Yes, around {liters:g}L {when}, best at {day.get('optimal_time', '06:00 AM')}."
+
+
+def _next_watering(intent, schedule, daily, hourly):
+    today_idx = _today_index(schedule)
+    if today_idx is None:
+        return None
+    for idx in range(today_idx, len(schedule)):
+        day = schedule[idx]
+        if _liters(day) > 0 and day.get("optimal_time") != "Skipped":
+            when = _day_label(day, idx == today_idx)
+            return f"Next watering is {when}: around {_liters(day):g}L at {day.get('optimal_time', '06:00 AM')}."
+    return "Nothing else is scheduled in the current plan."
+
+
+def _week_total(intent, schedule, daily, hourly):
+    total = sum(_liters(day) for day in schedule)
+    return f"Your plan totals {round(total, 1)}L over {len(schedule)} days, averaging {round(total / max(len(schedule), 1), 1)}L/day."
+
+
+def _rain_forecast(intent, schedule, daily, hourly):
+    if not daily and not hourly:
+        return None
+    wet_days = []
+    for d in daily or []:
+        rain = d.get("precipitation") or 0
+        if rain > 0:
+            try:
+                name = datetime.strptime(d["date"], "%Y-%m-%d").strftime("%A")
+            except (KeyError, ValueError):
+                name = d.get("date", "one day")
+            wet_days.append(f"{name} (about {round(rain, 1)}mm)")
+    chance = max((h.get("pop") or 0 for h in hourly or []), default=0)
+    if wet_days:
+        return f"Rain is in the forecast: {', '.join(wet_days)}. The schedule already accounts for it."
+    if chance >= 0.3:
+        return f"No measurable rain forecast, though showers peak at a {round(chance * 100)}% chance."
+    return f"No rain in the forecast for the next {max(len(daily or []), 1)} days, so stick with the schedule."
+
+
+TEMPLATES = {
+    "water_today": _water_today,
+    "next_watering": _next_watering,
+    "week_total": _week_total,
+    "rain_forecast": _rain_forecast,
+}
+
+
+def local_answer(prompt, intent, schedule, daily, hourly):
+    """Try to answer a plot question without the LLM.
+
+    Returns (reply, label); reply is None when the prompt should go to Gemini.
+    """
+    label, confidence = get_classifier().predict(prompt)
+    template = TEMPLATES.get(label)
+    # "Why" questions and low-confidence guesses deserve a real explanation
+    if template is None or confidence < LOCAL_ANSWER_MIN_CONFIDENCE or intent.why:
+        return None, label
+    if label != "rain_forecast" and not schedule:
+        return None, label
+    return template(intent, schedule, daily, hourly), label
@@ -0,0 +1,171 @@
+import math
+import threading
+import time
+from collections import deque
+
+# Shared circuit breakers for the Gemini fallback chains. Every request used to
+# walk the model list from the top, paying for a failed call to a deprecated or
+# rate-limited model each time. Breakers remember which models are failing (or
+# answering too slowly to be worth waiting on), skip them while open, and let a
+# single probe through once the cooldown ends.
+
+WINDOW_SIZE = 20            # recent calls kept per model
+WINDOW_SECONDS = 300        # ...and only if they are this recent
+MIN_CALLS = 5               # calls needed before the error rate is trusted
+ERROR_RATE_TRIP = 0.5
+CONSECUTIVE_FAILURE_TRIP = 3
+LATENCY_P95_TRIP = 30.0     # seconds; a model this slow is skipped like a failing one
+BASE_COOLDOWN = 30.0
+MAX_COOLDOWN = 600.0
+
+# Errors that will not fix themselves on the next call
+HARD_FAILURE_MARKERS = ("404", "NOT_FOUND", "429", "RESOURCE_EXHAUSTED", "PERMISSION_DENIED")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class ModelBreaker:
+    def __init__(self, model):
+        self.model = model
+        self.state = CLOSED
+        self.calls = deque(maxlen=WINDOW_SIZE)  # (timestamp, ok, latency_s)
+        self.consecutive_failures = 0
+        self.cooldown = BASE_COOLDOWN
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.skipped = 0
+        self.last_error = None
+        self.lock = threading.Lock()
+
+    def _recent(self, now):
+        return [c for c in self.calls if now - c[0] <= WINDOW_SECONDS]
+
+    @staticmethod
+    def _p95(recent):
+        latencies = sorted(c[2] for c in recent if c[1])
+        # Nearest rank: with a full window of 20, one slow call isn't the p95
+        return latencies[math.ceil(0.95 * len(latencies)) - 1] if latencies else None
+
+    def allow(self, now=None):
+        """Whether a call may go to this model right now (claims the probe slot when half-open)."""
+        now = now or time.monotonic()
+        with self.lock:
+            if self.state == OPEN and now - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            self.skipped += 1
+            return False
+
+    def record_success(self, latency, now=None):
+        now = now or time.monotonic()
+        with self.lock:
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            if self.state != CLOSED:
+                if latency >= LATENCY_P95_TRIP:
+                    # Answered, but still too slow: back off as for a failed probe
+                    self.calls.append((now, True, latency))
+                    self.last_error = f"slow: {latency:.1f}s"
+                    self.cooldown = min(self.cooldown * 2, MAX_COOLDOWN)
+                    self._open(now)
+                    return
+                print(f"✅ Gemini model {self.model} recovered, closing breaker")
+                # The calls that opened the breaker don't count against it any more
+                self.calls.clear()
+            self.calls.append((now, True, latency))
+            self.state = CLOSED
+            self.cooldown = BASE_COOLDOWN
+            recent = self._recent(now)
+            p95 = self._p95(recent)
+            if sum(1 for c in recent if c[1]) >= MIN_CALLS and p95 >= LATENCY_P95_TRIP:
+                self.last_error = f"slow: p95 {p95:.1f}s"
+                self._open(now)
+
+    def record_failure(self, latency, error, now=None):
+        now = now or time.monotonic()
+        with self.lock:
+            self.calls.append((now, False, latency))
+            self.consecutive_failures += 1
+            self.last_error = str(error)[:200]
+            recent = self._recent(now)
+            error_rate = sum(1 for c in recent if not c[1]) / len(recent)
+            hard = any(marker in self.last_error for marker in HARD_FAILURE_MARKERS)
+
+            if self.state == HALF_OPEN:
+                # Failed probe: back off harder before the next one
+                self.cooldown = min(self.cooldown * 2, MAX_COOLDOWN)
+                self._open(now)
+            elif self.state == CLOSED and (
+                hard
+                or self.consecutive_failures >= CONSECUTIVE_FAILURE_TRIP
+                or (len(recent) >= MIN_CALLS and error_rate >= ERROR_RATE_TRIP)
+            ):
+                self._open(now)
+            self.probe_in_flight = False
+
+    def release_probe(self):
+        """Give back a claimed probe slot when the call never happened (or its outcome is unknown)."""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def _open(self, now):
+        self.state = OPEN
+        self.opened_at = now
+        print(f"🚫 Gemini model {self.model} breaker open for {self.cooldown:.0f}s ({self.last_error})")
+
+    def snapshot(self, now=None):
+        now = now or time.monotonic()
+        with self.lock:
+            recent = self._recent(now)
+            latencies = sorted(c[2] for c in recent if c[1])
+            p95 = self._p95(recent)
+            return {
+                "state": self.state,
+                "calls": len(recent),
+                "error_rate": round(sum(1 for c in recent if not c[1]) / len(recent), 3) if recent else 0.0,
+                "latency_p50_s": round(latencies[len(latencies) // 2], 3) if latencies else None,
+                "latency_p95_s": round(p95, 3) if p95 is not None else None,
+                "latency_max_s": round(latencies[-1], 3) if latencies else None,
+                "consecutive_failures": self.consecutive_failures,
+                "cooldown_s": self.cooldown,
+                "retry_in_s": round(max(0.0, self.cooldown - (now - self.opened_at)), 1) if self.state == OPEN else 0.0,
+                "skipped": self.skipped,
+                "last_error": self.last_error
+            }
+
+
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def breaker_for(model):
+    with _registry_lock:
+        if model not in _breakers:
+            _breakers[model] = ModelBreaker(model)
+        return _breakers[model]
+
+
+def candidate_models(models):
+    """Yield the models in a fallback chain that are worth calling now, in order.
+
+    Checked lazily, so a half-open model only claims its probe slot when the
+    caller actually gets to it. If every breaker is open, the first model is
+    tried anyway so a full outage degrades to the old behaviour.
+    """
+    yielded = False
+    for model in models:
+        if breaker_for(model).allow():
+            yielded = True
+            yield model
+    if not yielded and models:
+        yield models[0]
+
+
+def snapshot():
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {b.model: b.snapshot() for b in breakers}
@@ -0,0 +1,131 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from farmerAI.llm_metrics import Histogram
+
+# Client-side token bucket in front of Gemini, shared by every caller in the
+# process. Waiters are served strictly by priority, background classes may
+# not dip into the last few tokens, and they give up sooner, so running low on
+# quota slows summaries and bulk jobs before it slows live chat.
+
+INTERACTIVE, SCHEDULE, BACKGROUND, BULK = 0, 1, 2, 3
+PRIORITY_NAMES = {INTERACTIVE: "interactive", SCHEDULE: "schedule", BACKGROUND: "background", BULK: "bulk"}
+
+# Endpoint labels (as used in llm_metrics) -> priority class
+ENDPOINT_PRIORITY = {
+    "chat": INTERACTIVE,
+    "chat_stream": INTERACTIVE,
+    "chat_general": INTERACTIVE,
+    "chat_general_stream": INTERACTIVE,
+    "schedule": SCHEDULE,
+    "schedule_fallback": SCHEDULE,
+    "gem_summary": BACKGROUND,
+    "chat_summary": BACKGROUND,
+}
+
+# Longest each class will queue before giving up (seconds)
+MAX_WAIT = {INTERACTIVE: 30.0, SCHEDULE: 60.0, BACKGROUND: 20.0, BULK: 10.0}
+# Tokens only interactive traffic may use
+INTERACTIVE_RESERVE = 2
+
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "60"))
+GEMINI_BURST = float(os.getenv("GEMINI_BURST", "10"))
+
+
+class RateLimitTimeout(Exception):
+    pass
+
+
+class PriorityTokenBucket:
+    def __init__(self, rate_per_minute=GEMINI_RPM, burst=GEMINI_BURST, reserve=INTERACTIVE_RESERVE):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+        self.reserve = min(reserve, burst - 1)
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.waiters = []  # heap of (priority, seq)
+        self.seq = itertools.count()
+        self.cond = threading.Condition()
+        self.wait_times = {p: Histogram() for p in PRIORITY_NAMES}
+        self.granted = {p: 0 for p in PRIORITY_NAMES}
+        self.timed_out = {p: 0 for p in PRIORITY_NAMES}
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _floor(self, priority):
+        return 0 if priority == INTERACTIVE else self.reserve
+
+    def acquire(self, priority=INTERACTIVE, max_wait=None):
+        """Block until a call of this priority may go out; return seconds waited.
+
+        Raises RateLimitTimeout if no token frees up within the class's max wait.
+        """
+        max_wait = MAX_WAIT.get(priority, 30.0) if max_wait is None else max_wait
+        start = time.monotonic()
+        ticket = (priority, next(self.seq))
+        with self.cond:
+            heapq.heappush(self.waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self.waiters[0] == ticket and self.tokens - 1 >= self._floor(priority):
+                        self.tokens -= 1
+                        waited = now - start
+                        self.wait_times[priority].observe(waited)
+                        self.granted[priority] += 1
+                        return waited
+                    remaining = max_wait - (now - start)
+                    if remaining <= 0:
+                        self.timed_out[priority] += 1
+                        raise RateLimitTimeout(f"Gemini rate limit: gave up after {max_wait:.0f}s ({PRIORITY_NAMES.get(priority)})")
+                    # Sleep until roughly the next token, or until someone leaves the queue
+                    needed = self._floor(priority) + 1 - self.tokens
+                    self.cond.wait(min(remaining, max(needed / self.rate, 0.01)))
+            finally:
+                self.waiters.remove(ticket)
+                heapq.heapify(self.waiters)
+                self.cond.notify_all()
+
+    def snapshot(self):
+        with self.cond:
+            self._refill(time.monotonic())
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self.waiters:
+                depth[PRIORITY_NAMES[priority]] += 1
+            return {
+                "rate_per_minute": round(self.rate * 60, 1),
+                "tokens": round(self.tokens, 2),
+                "queue_depth": depth,
+                "granted": {PRIORITY_NAMES[p]: n for p, n in self.granted.items()},
+                "timed_out": {PRIORITY_NAMES[p]: n for p, n in self.timed_out.items()},
+                "wait_s": {PRIORITY_NAMES[p]: h.snapshot() for p, h in self.wait_times.items()}
+            }
+
+
+gemini_limiter = PriorityTokenBucket()
+_scope = threading.local()
+
+
+def priority_for(endpoint):
+    override = getattr(_scope, "priority", None)
+    if override is not None:
+        return override
+    return ENDPOINT_PRIORITY.get(endpoint, BULK)
+
+
+@contextmanager
+def priority_scope(priority):
+    """Send every Gemini call made on this thread at the given priority, e.g. BULK for batch jobs."""
+    previous = getattr(_scope, "priority", None)
+    _scope.priority = priority
+    try:
+        yield
+    finally:
+        _scope.priority = previous
@@ -0,0 +1,138 @@
+import json
+import re
+from datetime import datetime, timedelta
+
+from utils.schedule_utils import DEFAULT_TIME, normalize_time
+
+# Response schema and local validator/repairer for AI-generated schedules.
+# Gemini is asked for schema-constrained JSON, and whatever comes back is
+# normalised here (length, dates, numeric liters, time format) so that a second
+# "simplified" LLM call is only needed when the output can't be salvaged.
+
+SCHEDULE_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "day": {"type": "STRING"},
+            "date": {"type": "STRING"},
+            "liters": {"type": "NUMBER"},
+            "explanation": {"type": "STRING"},
+            "optimal_time": {"type": "STRING"}
+        },
+        "required": ["day", "date", "liters", "optimal_time"],
+        "propertyOrdering": ["day", "date", "liters", "explanation", "optimal_time"]
+    }
+}
+
+SCHEDULE_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": SCHEDULE_RESPONSE_SCHEMA
+}
+
+# Below this share of usable days the output is re-prompted rather than padded
+MIN_USABLE_SHARE = 0.5
+
+FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.MULTILINE)
+TRAILING_COMMA_RE = re.compile(r",\s*([\]}])")
+LITERS_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+class ScheduleRepairError(ValueError):
+    pass
+
+
+def _load_json(text):
+    text = FENCE_RE.sub("", text.strip())
+    try:
+        return json.loads(text), False
+    except ValueError:
+        pass
+    # Prose around the array, or trailing commas
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end <= start:
+        raise ScheduleRepairError("No JSON array in response")
+    try:
+        return json.loads(TRAILING_COMMA_RE.sub(r"\1", text[start:end + 1])), True
+    except ValueError as e:
+        raise ScheduleRepairError(f"Unparseable JSON: {e}")
+
+
+def _liters(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return max(0.0, round(float(value), 2))
+    if isinstance(value, str):
+        match = LITERS_RE.search(value.replace(",", "."))
+        if match:
+            return max(0.0, round(float(match.group()), 2))
+    return None
+
+
+def repair_schedule(text, days=7, today=None):
+    """Parse and normalise a schedule response.
+
+    Returns (schedule, repairs), where repairs lists what had to be fixed
+    (empty when the output was already valid). Raises ScheduleRepairError when
+    too little of the response is usable to repair.
+    """
+    today = today or datetime.utcnow().date()
+    data, reextracted = _load_json(text)
+    repairs = ["extracted JSON array"] if reextracted else []
+
+    if isinstance(data, dict):
+        data = next((v for v in data.values() if isinstance(v, list)), None)
+        repairs.append("unwrapped object")
+    if not isinstance(data, list):
+        raise ScheduleRepairError("Response is not a list of days")
+
+    entries = []
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        liters = _liters(item.get("liters"))
+        if liters is None:
+            continue
+        raw = item.get("liters")
+        if isinstance(raw, str) or raw < 0:
+            repairs.append("liters")
+        entries.append((item, liters))
+
+    if len(entries) < max(1, int(days * MIN_USABLE_SHARE + 0.5)):
+        raise ScheduleRepairError(f"Only {len(entries)} usable days out of {days}")
+    if len(entries) != len(data):
+        repairs.append("dropped unusable days")
+    if len(entries) > days:
+        entries = entries[:days]
+        repairs.append("truncated")
+
+    schedule = []
+    for item, liters in entries:
+        day = dict(item)
+        day["liters"] = liters
+        optimal_time = normalize_time(item.get("optimal_time"))
+        if optimal_time is None:
+            optimal_time = DEFAULT_TIME
+        if optimal_time != item.get("optimal_time"):
+            repairs.append("optimal_time")
+        day["optimal_time"] = optimal_time
+        schedule.append(day)
+
+    if len(schedule) < days:
+        # Pad with the average of the days we did get
+        avg = round(sum(d["liters"] for d in schedule) / len(schedule), 2)
+        for _ in range(days - len(schedule)):
+            schedule.append({"liters": avg, "optimal_time": DEFAULT_TIME,
+                             "explanation": "Estimated from the rest of the week"})
+        repairs.append("padded")
+
+    # ✅ Enforce correct dates & day names
+    for i, day in enumerate(schedule):
+        date = (today + timedelta(days=i)).strftime("%m/%d/%y")
+        if "date" in day and day["date"] != date:
+            repairs.append("date")
+        day["date"] = date
+        day["day"] = f"Day {i + 1}"
+
+    return schedule, sorted(set(repairs))
@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from tests.fake_supabase import FakeSupabase  # noqa: E402
+
+
+@pytest.fixture
+def supabase():
+    """In-memory stand-in for the Supabase client, with schedule_changes unique on (plot_id, version)."""
+    return FakeSupabase(unique={"schedule_changes": ("plot_id", "version")})
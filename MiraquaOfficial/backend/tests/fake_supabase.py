@@ -0,0 +1,121 @@
+import copy
+from types import SimpleNamespace
+
+# The slice of the supabase-py query builder the backend uses, over in-memory
+# tables: table().select/insert/update/upsert, eq/lt/lte/gte filters,
+# order/limit, single/maybe_single, execute().
+
+
+class DuplicateKeyError(Exception):
+    code = "23505"
+
+
+class _Query:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.ordering = None
+        self.count = None
+        self.action = ("select", None)
+        self.one = None
+
+    def select(self, *_columns):
+        self.action = ("select", None)
+        return self
+
+    def insert(self, row):
+        self.action = ("insert", row)
+        return self
+
+    def update(self, values):
+        self.action = ("update", values)
+        return self
+
+    def upsert(self, row, on_conflict=None):
+        self.action = ("upsert", (row, on_conflict))
+        return self
+
+    def _filter(self, op, column, value):
+        self.filters.append((op, column, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda a, b: a == b, column, value)
+
+    def lt(self, column, value):
+        return self._filter(lambda a, b: a is not None and a < b, column, value)
+
+    def lte(self, column, value):
+        return self._filter(lambda a, b: a is not None and a <= b, column, value)
+
+    def gte(self, column, value):
+        return self._filter(lambda a, b: a is not None and a >= b, column, value)
+
+    def order(self, column, desc=False):
+        self.ordering = (column, desc)
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def single(self):
+        self.one = "single"
+        return self
+
+    def maybe_single(self):
+        self.one = "maybe"
+        return self
+
+    def _matches(self, row):
+        return all(op(row.get(column), value) for op, column, value in self.filters)
+
+    def execute(self):
+        rows = self.db.tables.setdefault(self.table, [])
+        kind, payload = self.action
+        if kind == "insert":
+            self.db.check_unique(self.table, payload)
+            rows.append(copy.deepcopy(payload))
+            return SimpleNamespace(data=[copy.deepcopy(payload)])
+        if kind == "update":
+            for row in rows:
+                if self._matches(row):
+                    row.update(copy.deepcopy(payload))
+            return SimpleNamespace(data=[copy.deepcopy(r) for r in rows if self._matches(r)])
+        if kind == "upsert":
+            row, key = payload
+            key = key[0] if isinstance(key, (list, tuple)) else key
+            existing = [r for r in rows if r.get(key) == row.get(key)]
+            if existing:
+                existing[0].update(copy.deepcopy(row))
+            else:
+                rows.append(copy.deepcopy(row))
+            return SimpleNamespace(data=[copy.deepcopy(row)])
+
+        data = [copy.deepcopy(r) for r in rows if self._matches(r)]
+        if self.ordering:
+            column, desc = self.ordering
+            data.sort(key=lambda r: r.get(column), reverse=desc)
+        if self.count is not None:
+            data = data[:self.count]
+        if self.one:
+            return SimpleNamespace(data=data[0] if data else None)
+        return SimpleNamespace(data=data)
+
+
+class FakeSupabase:
+    def __init__(self, unique=None):
+        self.tables = {}
+        self.unique = unique or {}
+
+    def table(self, name):
+        return _Query(self, name)
+
+    def check_unique(self, table, row):
+        columns = self.unique.get(table)
+        if not columns:
+            return
+        key = tuple(row.get(c) for c in columns)
+        if any(tuple(r.get(c) for c in columns) == key for r in self.tables.get(table, [])):
+            raise DuplicateKeyError(f'duplicate key value violates unique constraint "{table}_{"_".join(columns)}"')
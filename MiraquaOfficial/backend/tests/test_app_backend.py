@@ -0,0 +1,97 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+
+for name, value in {"SUPABASE_URL": "http://localhost", "SUPABASE_SERVICE_ROLE_KEY": "test", "GEMINI_API_KEY": "test"}.items():
+    os.environ.setdefault(name, value)
+
+app_backend = pytest.importorskip("app_backend")
+
+from farmerAI.rate_limiter import RateLimitTimeout  # noqa: E402
+
+TODAY = date(2025, 6, 16)
+PLOT = {"id": "p1", "crop": "tomato", "area": 10, "planting_date": "2025-05-01", "age_at_entry": 1.0,
+        "lat": 38.5, "lon": -121.7, "zip_code": "95616", "soil_type": "loam", "flex_type": "daily",
+        "horizon_days": 7, "kc_curve": None, "zones": None, "name": "Tomatoes"}
+SCHEDULE = [{"day": "Day 1", "date": "06/16/25", "liters": 4.0, "optimal_time": "06:00 AM"}]
+STORED = [{"day": "Day 1", "date": "06/16/25", "liters": 9.0, "optimal_time": "06:00 AM"}]
+
+
+@pytest.fixture
+def backend(supabase, monkeypatch):
+    supabase.tables["plots"] = [dict(PLOT)]
+    supabase.tables["plot_schedules"] = [{"plot_id": "p1", "schedule": STORED, "og_schedule": STORED}]
+    monkeypatch.setattr(app_backend, "supabase", supabase)
+    monkeypatch.setattr(app_backend, "generate_summary", lambda *args: "summary")
+    return supabase
+
+
+def use_generator(monkeypatch, fn):
+    monkeypatch.setattr(sys.modules["farmer_ai"], "generate_ai_schedule", fn)
+
+
+def stored_schedule(supabase):
+    return supabase.tables["plot_schedules"][0]["schedule"]
+
+
+def test_rate_limit_timeout_answers_busy_and_keeps_schedule(backend, monkeypatch):
+    def busy(*args, **kwargs):
+        raise RateLimitTimeout("queue full")
+    use_generator(monkeypatch, busy)
+
+    result = app_backend.regenerate_schedule(dict(PLOT), [], [], [], today=TODAY)
+    assert result.get("busy") and "error" in result
+    assert stored_schedule(backend) == STORED
+
+
+def test_regenerated_schedule_is_saved(backend, monkeypatch):
+    use_generator(monkeypatch, lambda *args, **kwargs: SCHEDULE)
+
+    result = app_backend.regenerate_schedule(dict(PLOT), [], [], [], today=TODAY)
+    assert result["schedule"] == SCHEDULE
+    assert stored_schedule(backend) == SCHEDULE
+
+
+def test_run_from_superseded_settings_does_not_overwrite(backend, monkeypatch):
+    def generate_then_settings_change(*args, **kwargs):
+        # /update_plot_settings lands while this run is waiting on the model
+        backend.tables["plots"][0]["crop"] = "lettuce"
+        return SCHEDULE
+    use_generator(monkeypatch, generate_then_settings_change)
+
+    result = app_backend.regenerate_schedule(dict(PLOT), [], [], [], today=TODAY)
+    assert result.get("busy")
+    assert stored_schedule(backend) == STORED
+
+
+def test_quota_timeout_propagates_through_generation(monkeypatch):
+    farmer_ai = sys.modules["farmer_ai"]
+
+    def give_up(*args, **kwargs):
+        raise RateLimitTimeout("queue full")
+    monkeypatch.setattr(farmer_ai.gemini_limiter, "acquire", give_up)
+
+    with pytest.raises(RateLimitTimeout):
+        farmer_ai.generate_with_fallback(farmer_ai.CHAT_MODELS, "hi", endpoint="chat")
+    # Not swallowed into a generic {"error"} dict, so callers can answer 503
+    with pytest.raises(RateLimitTimeout):
+        farmer_ai.generate_ai_schedule(dict(PLOT), [], [], [], today=TODAY)
+
+
+def test_shorter_request_horizon_keeps_the_stored_schedule_full_length(backend, monkeypatch):
+    week = [dict(SCHEDULE[0], day=f"Day {i + 1}") for i in range(7)]
+    use_generator(monkeypatch, lambda *args, **kwargs: week)
+
+    result = app_backend.schedule_for_request(dict(PLOT), [], [], [], horizon=3)
+    assert len(result["schedule"]) == 3
+    assert len(stored_schedule(backend)) == 7
+
+
+def test_longer_request_horizon_is_previewed_not_saved(backend, monkeypatch):
+    use_generator(monkeypatch, lambda *args, days=7, **kwargs: [dict(SCHEDULE[0], day=f"Day {i + 1}") for i in range(days)])
+
+    result = app_backend.schedule_for_request(dict(PLOT), [], [], [], horizon=14)
+    assert len(result["schedule"]) == 14
+    assert stored_schedule(backend) == STORED
@@ -0,0 +1,73 @@
+import threading
+
+from farmerAI.chat_summary import MAX_PENDING_TURNS, RAW_TURNS_WITH_SUMMARY, RollingSummaries
+
+KEY = ("plot", "p1")
+
+
+def turn(n):
+    return {"prompt": f"q{n}", "reply": f"a{n}"}
+
+
+def add(summaries, first, last):
+    due = False
+    for n in range(first, last + 1):
+        due = summaries.add_turn(KEY, turn(n))
+    return due
+
+
+def test_refresh_due_every_n_turns():
+    summaries = RollingSummaries(every_n=4)
+    assert not add(summaries, 1, 3)
+    assert add(summaries, 4, 4)
+
+
+def test_unsummarised_turns_are_all_sent_raw():
+    summaries = RollingSummaries(every_n=4)
+    add(summaries, 1, 4)
+    summaries.refresh(KEY, lambda previous, turns: "turns 1-4")
+    add(summaries, 5, 8)
+    # Summary covers 1-4, so 5-8 must all be in the raw window
+    assert summaries.raw_turns(KEY) == 4
+    summaries.refresh(KEY, lambda previous, turns: "turns 1-8")
+    assert summaries.raw_turns(KEY) == RAW_TURNS_WITH_SUMMARY
+
+
+def test_refresh_passes_previous_summary_and_pending_turns():
+    summaries = RollingSummaries(every_n=2)
+    seen = []
+    add(summaries, 1, 2)
+    summaries.refresh(KEY, lambda previous, turns: seen.append((previous, turns)) or "s1")
+    add(summaries, 3, 4)
+    summaries.refresh(KEY, lambda previous, turns: seen.append((previous, turns)) or "s2")
+    assert seen == [("", [turn(1), turn(2)]), ("s1", [turn(3), turn(4)])]
+    assert summaries.get(KEY, lambda: "stored") == "s2"
+
+
+def test_turns_added_during_refresh_stay_pending_after_cap_trim():
+    summaries = RollingSummaries(every_n=4)
+    add(summaries, 1, 4)
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_summary(previous, turns):
+        started.set()
+        finish.wait(5)
+        return "turns 1-4"
+
+    worker = threading.Thread(target=summaries.refresh, args=(KEY, slow_summary))
+    worker.start()
+    started.wait(5)
+    # Enough new turns to push the cap and trim some of 1-4 off the front
+    add(summaries, 5, 4 + MAX_PENDING_TURNS - 1)
+    finish.set()
+    worker.join(5)
+
+    pending = [t for _, t in summaries.entries[KEY]["pending"]]
+    assert pending == [turn(n) for n in range(5, 4 + MAX_PENDING_TURNS)]
+
+
+def test_failed_summary_keeps_turns_pending():
+    summaries = RollingSummaries(every_n=2)
+    add(summaries, 1, 2)
+    assert summaries.refresh(KEY, lambda previous, turns: "") is None
+    assert summaries.raw_turns(KEY) == max(RAW_TURNS_WITH_SUMMARY, 2)
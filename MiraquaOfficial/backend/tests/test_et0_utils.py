@@ -0,0 +1,34 @@
+import numpy as np
+
+from utils.et0_utils import REFERENCE_ET0, extraterrestrial_radiation, f_to_c, hargreaves, hourly_hargreaves
+from utils.fleet_utils import daily_et0, pack_hourly
+
+
+def hourly(temps_f):
+    return [{"main": {"temp": t}} for t in temps_f]
+
+
+def test_hourly_hargreaves_uses_day_range_and_real_ra():
+    temps = [60, 64, 70, 78, 84, 80, 72, 66]
+    et0 = hourly_hargreaves(temps, 38.5, 196)
+    expected = hargreaves(f_to_c(60), f_to_c(84), extraterrestrial_radiation(38.5, 196))
+    assert np.isclose(et0, expected)
+    assert 3 < et0 < 8  # a July day in mm/day, not a relative index
+
+
+def test_hourly_hargreaves_falls_back_to_reference():
+    assert hourly_hargreaves([70, 80], 38.5, 196) == REFERENCE_ET0
+    assert hourly_hargreaves([60, 64, 70, 78, 84, 80, 72, 66], np.nan, 196) == REFERENCE_ET0
+
+
+def test_hourly_hargreaves_depends_on_latitude_and_season():
+    temps = [50, 55, 62, 70, 75, 70, 60, 54]
+    assert hourly_hargreaves(temps, 45, 172) > hourly_hargreaves(temps, 45, 355)
+
+
+def test_fleet_et0_matches_per_cell_calculation():
+    days = [[hourly([60, 64, 70, 78, 84, 80, 72, 66])], [hourly([70, 75])]]
+    forecast = pack_hourly(days, days=1, lats=[38.5, 10.0])
+    et0 = daily_et0(forecast)
+    assert np.isclose(et0[0, 0], hourly_hargreaves([60, 64, 70, 78, 84, 80, 72, 66], 38.5, forecast["doy"][0]))
+    assert et0[1, 0] == REFERENCE_ET0
@@ -0,0 +1,59 @@
+from farmerAI.model_health import (
+    BASE_COOLDOWN, CLOSED, HALF_OPEN, LATENCY_P95_TRIP, MIN_CALLS, OPEN, ModelBreaker
+)
+
+FAST, SLOW = 1.0, LATENCY_P95_TRIP + 5
+
+
+def test_slow_model_trips_breaker_without_failing():
+    breaker = ModelBreaker("slow-model")
+    for i in range(MIN_CALLS):
+        breaker.record_success(SLOW, now=100.0 + i)
+    assert breaker.state == OPEN
+    assert breaker.last_error.startswith("slow")
+    assert not breaker.allow(now=110.0)
+
+
+def test_occasional_slow_call_stays_under_p95():
+    breaker = ModelBreaker("mostly-fast")
+    for i in range(19):
+        breaker.record_success(FAST, now=100.0 + i)
+    breaker.record_success(SLOW, now=120.0)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot(now=121.0)["latency_p95_s"] == FAST
+
+
+def test_too_few_calls_do_not_trip():
+    breaker = ModelBreaker("new-model")
+    for i in range(MIN_CALLS - 1):
+        breaker.record_success(SLOW, now=100.0 + i)
+    assert breaker.state == CLOSED
+
+
+def test_slow_probe_reopens_with_longer_cooldown():
+    breaker = ModelBreaker("slow-model")
+    for i in range(MIN_CALLS):
+        breaker.record_success(SLOW, now=100.0 + i)
+    probe_at = 104.0 + BASE_COOLDOWN
+    assert breaker.allow(now=probe_at) and breaker.state == HALF_OPEN
+    breaker.record_success(SLOW, now=probe_at)
+    assert breaker.state == OPEN and breaker.cooldown == BASE_COOLDOWN * 2
+
+
+def test_fast_probe_closes_and_forgets_slow_calls():
+    breaker = ModelBreaker("slow-model")
+    for i in range(MIN_CALLS):
+        breaker.record_success(SLOW, now=100.0 + i)
+    probe_at = 104.0 + BASE_COOLDOWN
+    assert breaker.allow(now=probe_at)
+    breaker.record_success(FAST, now=probe_at)
+    breaker.record_success(FAST, now=probe_at + 1)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot(now=probe_at + 2)["latency_p95_s"] == FAST
+
+
+def test_failures_still_trip():
+    breaker = ModelBreaker("failing-model")
+    for i in range(3):
+        breaker.record_failure(FAST, Exception("500 INTERNAL"), now=100.0 + i)
+    assert breaker.state == OPEN
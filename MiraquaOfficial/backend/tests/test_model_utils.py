@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import pytest
+
+from utils.model_utils import Plot, ScheduleBatch, ScheduleDay, dump_schedule, normalize_date, parse_schedule
+
+
+def test_from_dict_normalizes_formats():
+    day = ScheduleDay.from_dict({"date": "2025-06-16", "liters": "3.456", "optimal_time": "5am", "reason": "dry"}, 0)
+    assert (day.day, day.date, day.liters, day.optimal_time, day.explanation) == \
+        ("Day 1", "06/16/25", 3.46, "05:00 AM", "dry")
+
+
+def test_extra_keys_survive_round_trip():
+    row = {"day": "Day 1", "date": "06/16/25", "liters": 2.0, "optimal_time": "06:00 AM", "moisture": 0.3}
+    assert dump_schedule(parse_schedule([row])) == [row]
+
+
+@pytest.mark.parametrize("liters", [None, "", "n/a", True, float("nan"), -4])
+def test_legacy_liters_count_as_zero(liters):
+    assert ScheduleDay.from_dict({"date": "06/16/25", "liters": liters}).liters == 0.0
+
+
+def test_bad_dates_are_filled_from_neighbours():
+    days = parse_schedule([
+        {"date": "not a date", "liters": 1},
+        {"date": "06/17/25", "liters": None},
+        {"liters": 2},
+        {"date": "06/19/25", "liters": 3},
+    ])
+    assert [d.date for d in days] == ["06/16/25", "06/17/25", "06/18/25", "06/19/25"]
+    assert [d.liters for d in days] == [1.0, 0.0, 2.0, 3.0]
+
+
+def test_schedule_without_any_date_keeps_stored_text():
+    days = parse_schedule([{"date": "Monday", "liters": 1}, {"liters": 2}])
+    assert [d.date for d in days] == ["Monday", ""]
+
+
+def test_non_object_entries_are_dropped():
+    days = parse_schedule([{"date": "06/16/25", "liters": 1}, None, "Day 2", {"date": "06/18/25", "liters": 2}])
+    assert [d.date for d in days] == ["06/16/25", "06/18/25"]
+
+
+def test_normalize_date_still_rejects_input():
+    # Request input (e.g. /update_manual_day) stays strict
+    with pytest.raises(ValueError):
+        normalize_date("tomorrow")
+
+
+def test_batch_round_trip():
+    schedules = [
+        [{"date": "06/16/25", "liters": 2.5, "optimal_time": "06:00 AM"},
+         {"date": "06/17/25", "liters": 0.0, "optimal_time": "Skipped"}],
+        [{"date": "06/16/25", "liters": 1.0, "optimal_time": "07:30 PM"}],
+    ]
+    batch = ScheduleBatch.from_schedules(schedules)
+    assert batch.to_dicts(0) == [
+        {"day": "Day 1", "date": "06/16/25", "liters": 2.5, "optimal_time": "06:00 AM"},
+        {"day": "Day 2", "date": "06/17/25", "liters": 0.0, "optimal_time": "Skipped"},
+    ]
+    assert batch.days(1)[0].optimal_time == "07:30 PM"
+    assert list(batch.watering_days()) == [1, 1]
+
+
+NEW_PLOT = {"crop": "tomato", "area": 20, "lat": 37.7, "lon": -122.4, "planting_date": "2025-03-01", "age_at_entry": 1.5}
+NOW = datetime(2025, 6, 16)
+
+
+def test_valid_new_plot_passes():
+    Plot.from_row(NEW_PLOT).validate(now=NOW)
+
+
+@pytest.mark.parametrize("changes, message", [
+    ({"planting_date": ""}, "planting_date"),
+    ({"planting_date": None}, "planting_date"),
+    ({"planting_date": "03/01/2025"}, "planting_date"),
+    ({"planting_date": "2025-07-01"}, "future"),
+    ({"age_at_entry": None}, "Age at entry"),
+    ({"age_at_entry": "young"}, "Age at entry"),
+    ({"area": 0}, "Area"),
+    ({"lat": 95}, "coordinates"),
+    ({"horizon_days": 30}, "horizon_days"),
+    ({"kc_curve": {"stage_days": [10, 20], "kc": [0.5]}}, "kc_curve"),
+    ({"zones": [{"area": 15}, {"area": 10}]}, "more than the plot"),
+])
+def test_new_plot_rejections(changes, message):
+    with pytest.raises(ValueError, match=message):
+        Plot.from_row({**NEW_PLOT, **changes}).validate(now=NOW)
+
+
+def test_partial_update_skips_missing_fields():
+    Plot.from_row({"area": 5}).validate(now=NOW, partial=True)
+    with pytest.raises(ValueError, match="planting_date"):
+        Plot.from_row({"planting_date": ""}).validate(now=NOW, partial=True)
@@ -0,0 +1,15 @@
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip("timezonefinder")
+from dateutil import tz  # noqa: E402
+
+from utils.precompute_utils import plot_local_date  # noqa: E402
+
+
+def test_local_date_lags_utc_west_of_greenwich():
+    # 03:00 UTC on the 17th is still the evening of the 16th in California
+    now = datetime(2025, 6, 17, 3, 0, tzinfo=tz.UTC)
+    assert plot_local_date({"lat": 37.77, "lon": -122.42}, now) == date(2025, 6, 16)
+    assert plot_local_date({"lat": None, "lon": None}, now) == date(2025, 6, 17)
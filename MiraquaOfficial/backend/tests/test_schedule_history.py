@@ -0,0 +1,105 @@
+from utils.schedule_history_utils import ScheduleHistory, apply_patch, make_patch, schedule_hash
+
+
+def schedule(*liters):
+    return [{"day": f"Day {i + 1}", "date": f"06/{16 + i:02d}/25", "liters": l} for i, l in enumerate(liters)]
+
+
+def revert(history, plot_id, current):
+    """What /revert_schedule does: restore the undo target's parent and record the revert."""
+    target = history.undo_target(plot_id)
+    previous = history.load(plot_id, target["parent_hash"]) if target else None
+    if previous is not None:
+        history.record(plot_id, current, previous, "revert", undoes=target["version"])
+    return previous
+
+
+def test_patch_round_trip():
+    old, new = schedule(2.0, 3.0, 1.5), schedule(2.0, 0.0)
+    new[0]["note"] = "skip"
+    assert apply_patch(old, make_patch(old, new)) == new
+    assert make_patch(old, old) == []
+
+
+def test_hash_ignores_key_order():
+    assert schedule_hash([{"a": 1, "b": 2}]) == schedule_hash([{"b": 2, "a": 1}])
+
+
+def test_load_rebuilds_every_version(supabase):
+    history = ScheduleHistory(supabase, keyframe_every=3)
+    versions = [schedule(2.0, 3.0, 1.0)]
+    for step in range(7):
+        new = [dict(day) for day in versions[-1]]
+        new[step % 3]["liters"] += 1
+        history.record("p1", versions[-1], new, "edit")
+        versions.append(new)
+    fresh = ScheduleHistory(supabase, keyframe_every=3)  # nothing cached
+    for version in versions:
+        assert fresh.load("p1", schedule_hash(version)) == version
+
+
+def test_repeated_reverts_walk_back(supabase):
+    history = ScheduleHistory(supabase)
+    s0, s1, s2, s3 = schedule(1.0), schedule(2.0), schedule(3.0), schedule(4.0)
+    history.record("p1", s0, s1, "edit")
+    history.record("p1", s1, s2, "edit")
+    history.record("p1", s2, s3, "edit")
+
+    assert revert(history, "p1", s3) == s2
+    assert revert(history, "p1", s2) == s1
+    assert revert(history, "p1", s1) == s0
+    assert revert(history, "p1", s0) is None
+
+
+def test_revert_after_new_edit_undoes_that_edit_first(supabase):
+    history = ScheduleHistory(supabase)
+    s0, s1, s2, s3 = schedule(1.0), schedule(2.0), schedule(3.0), schedule(4.0)
+    history.record("p1", s0, s1, "edit")
+    history.record("p1", s1, s2, "edit")
+    assert revert(history, "p1", s2) == s1
+    history.record("p1", s1, s3, "edit")
+
+    assert revert(history, "p1", s3) == s1
+    assert revert(history, "p1", s1) == s0
+
+
+def test_revert_is_recorded_when_schedule_already_matches(supabase):
+    history = ScheduleHistory(supabase)
+    s0, s1 = schedule(1.0), schedule(2.0)
+    history.record("p1", s0, s1, "edit")
+    assert revert(history, "p1", s0) == s0
+    assert history.undo_target("p1") is None
+
+
+def test_concurrent_edit_gets_next_version(supabase):
+    history = ScheduleHistory(supabase)
+    s0, s1, s2 = schedule(1.0), schedule(2.0), schedule(3.0)
+    history.record("p1", s0, s1, "edit")
+
+    real_head = history._head
+    stale = real_head("p1")
+    calls = []
+
+    def racing_head(plot_id, before=None):
+        # First read sees the head before another worker's edit lands
+        calls.append(plot_id)
+        if len(calls) == 1:
+            other = ScheduleHistory(supabase)
+            other.record("p1", s1, schedule(9.0), "other worker")
+            return stale
+        return real_head(plot_id, before)
+
+    history._head = racing_head
+    row = history.record("p1", s1, s2, "edit")
+    versions = sorted(r["version"] for r in supabase.tables["schedule_changes"])
+    assert versions == [1, 2, 3]
+    assert row["version"] == 3
+    assert ScheduleHistory(supabase).load("p1", schedule_hash(s2)) == s2
+
+
+def test_other_plots_are_separate(supabase):
+    history = ScheduleHistory(supabase)
+    history.record("p1", schedule(1.0), schedule(2.0), "edit")
+    history.record("p2", schedule(5.0), schedule(6.0), "edit")
+    assert revert(history, "p1", schedule(2.0)) == schedule(1.0)
+    assert revert(history, "p2", schedule(6.0)) == schedule(5.0)
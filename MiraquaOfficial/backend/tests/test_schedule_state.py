@@ -0,0 +1,63 @@
+from datetime import date, datetime, timedelta, timezone
+
+from utils.schedule_state_utils import day_inputs, recompute, seed_state
+
+PLOT = {"id": "p1", "crop": "tomato", "area": 10.0, "lat": 37.7, "lon": -122.4, "soil_type": "loam"}
+
+
+def forecast(start, days, temp=80.0):
+    """get_forecast()-shaped daily and 3-hourly entries from start's UTC midnight."""
+    midnight = datetime(start.year, start.month, start.day, tzinfo=timezone.utc).timestamp()
+    hourly = [{
+        "dt": int(midnight + i * 3 * 3600),
+        "dt_txt": datetime.fromtimestamp(midnight + i * 3 * 3600, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "main": {"temp": temp, "humidity": 40},
+        "wind": {"speed": 3},
+        "clouds": {"all": 20},
+        "pop": 0
+    } for i in range(days * 8)]
+    daily = [{"date": (start + timedelta(days=d)).isoformat(), "temp_max": temp + 10, "temp_min": temp - 20,
+              "clouds": 20, "precipitation": 0} for d in range(days)]
+    return daily, hourly
+
+
+def schedule(start, days, liters=2.0):
+    return [{"day": f"Day {i + 1}", "date": (start + timedelta(days=i)).strftime("%m/%d/%y"), "liters": liters}
+            for i in range(days)]
+
+
+def test_inputs_are_dated_from_the_given_day():
+    local_day = date(2025, 6, 16)
+    daily, hourly = forecast(local_day, 7)
+    inputs = day_inputs(PLOT, daily, hourly, [], 2.0, days=7, today=local_day)
+    assert [i["date"] for i in inputs] == [(local_day + timedelta(days=d)).isoformat() for d in range(7)]
+
+
+def test_state_seeded_on_the_local_day_is_reused_that_day():
+    local_day = date(2025, 6, 16)
+    daily, hourly = forecast(local_day, 7)
+    inputs = day_inputs(PLOT, daily, hourly, [], 2.0, days=7, today=local_day)
+    state = seed_state(PLOT, schedule(local_day, 7), inputs, daily, [], 2.0)
+
+    same_day, recomputed = recompute(state, inputs)
+    assert same_day is not None and recomputed == []
+
+    # Inputs dated from the UTC day (already tomorrow west of UTC) can't reuse it
+    utc_inputs = day_inputs(PLOT, daily, hourly, [], 2.0, days=7, today=local_day + timedelta(days=1))
+    assert recompute(state, utc_inputs) == (None, None)
+
+
+def test_days_past_the_forecast_keep_their_liters():
+    local_day = date(2025, 6, 16)
+    daily, hourly = forecast(local_day, 3)  # OpenWeather-like: 3 days for a 7-day plan
+    inputs = day_inputs(PLOT, daily, hourly, [], 2.0, days=7, today=local_day)
+    assert [i["forecast"] for i in inputs] == [True] * 3 + [False] * 4
+    state = seed_state(PLOT, schedule(local_day, 7, liters=0.0), inputs, daily, [], 2.0)
+
+    # A hotter forecast changes the last forecast day's ET₀, which days 4-7 reuse
+    hot_daily, hot_hourly = forecast(local_day, 3, temp=100.0)
+    hot = day_inputs(PLOT, hot_daily, hot_hourly, [], 2.0, days=7, today=local_day)
+    new_state, recomputed = recompute(state, hot)
+    assert recomputed and max(recomputed) < 3
+    assert [d["planned_mm"] for d in new_state["days"][3:]] == [0.0] * 4
+    assert new_state["days"][3]["depletion_start"] == new_state["days"][2]["depletion_end"]
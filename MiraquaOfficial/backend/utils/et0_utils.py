@@ -0,0 +1,219 @@
+from datetime import datetime
+
+import numpy as np
+
+# Reference evapotranspiration (ET₀, mm/day) following FAO Irrigation and
+# Drainage Paper 56. Every function works elementwise on NumPy arrays (or
+# scalars) and broadcasts, so one call can cover many days and locations.
+# Temperatures in °C, radiation in MJ m⁻² day⁻¹, wind in m/s, pressure in kPa.
+
+SOLAR_CONSTANT = 0.0820       # MJ m⁻² min⁻¹
+STEFAN_BOLTZMANN = 4.903e-9   # MJ K⁻⁴ m⁻² day⁻¹
+LATENT_HEAT = 2.45            # MJ kg⁻¹
+ALBEDO = 0.23                 # grass reference crop
+MJ_TO_MM = 0.408              # 1 / LATENT_HEAT
+# mm/day the schedulers' base liters are sized for (a typical warm-season
+# FAO-56 reference day); they scale liters by ET₀ / REFERENCE_ET0.
+REFERENCE_ET0 = 5.0
+
+
+def f_to_c(temp_f):
+    return (np.asarray(temp_f, dtype=float) - 32.0) * 5.0 / 9.0
+
+
+def day_of_year(dates):
+    """Day of year for datetime.date objects or ISO date strings (array of ints)."""
+    return np.array([datetime.fromisoformat(str(d)[:10]).timetuple().tm_yday for d in dates])
+
+
+# --- Radiation (FAO-56 eqs 21-25, 34-39) ---
+
+def solar_geometry(lat_deg, doy):
+    """(sunset hour angle ws, inverse relative distance dr, declination δ) in radians."""
+    phi = np.radians(lat_deg)
+    doy = np.asarray(doy, dtype=float)
+    dr = 1 + 0.033 * np.cos(2 * np.pi / 365 * doy)
+    decl = 0.409 * np.sin(2 * np.pi / 365 * doy - 1.39)
+    # Clipped so polar day / night don't produce NaN
+    ws = np.arccos(np.clip(-np.tan(phi) * np.tan(decl), -1.0, 1.0))
+    return ws, dr, decl
+
+
+def extraterrestrial_radiation(lat_deg, doy):
+    """Ra, MJ m⁻² day⁻¹ (eq 21)."""
+    phi = np.radians(lat_deg)
+    ws, dr, decl = solar_geometry(lat_deg, doy)
+    ra = 24 * 60 / np.pi * SOLAR_CONSTANT * dr * (
+        ws * np.sin(phi) * np.sin(decl) + np.cos(phi) * np.cos(decl) * np.sin(ws)
+    )
+    return np.maximum(ra, 0.0)
+
+
+def daylight_hours(lat_deg, doy):
+    """N, maximum possible sunshine hours (eq 34)."""
+    ws, _, _ = solar_geometry(lat_deg, doy)
+    return 24 / np.pi * ws
+
+
+def clear_sky_radiation(ra, elevation=0.0):
+    """Rso (eq 37)."""
+    return (0.75 + 2e-5 * np.asarray(elevation, dtype=float)) * ra
+
+
+def solar_radiation_from_sunshine(ra, sunshine_hours, daylight):
+    """Rs from the Angstrom formula (eq 35) with the default a=0.25, b=0.50."""
+    return (0.25 + 0.50 * np.asarray(sunshine_hours, dtype=float) / daylight) * ra
+
+
+def solar_radiation_from_clouds(ra, cloud_pct):
+    """Rs from mean cloud cover, taking the clear fraction of the sky as n/N."""
+    return (0.25 + 0.50 * (1 - np.clip(np.asarray(cloud_pct, dtype=float), 0, 100) / 100)) * ra
+
+
+def solar_radiation_from_temp(ra, tmin, tmax, krs=0.16):
+    """Rs from the temperature range (eq 50); krs 0.16 interior, 0.19 coastal."""
+    return krs * np.sqrt(np.maximum(np.asarray(tmax) - np.asarray(tmin), 0.0)) * ra
+
+
+def net_radiation(rs, rso, tmin, tmax, ea):
+    """Rn = Rns - Rnl (eqs 38-40)."""
+    rns = (1 - ALBEDO) * rs
+    tk4 = ((np.asarray(tmax) + 273.16) ** 4 + (np.asarray(tmin) + 273.16) ** 4) / 2
+    ratio = np.clip(np.asarray(rs) / np.where(rso > 0, rso, np.nan), 0.25, 1.0)
+    ratio = np.where(np.isnan(ratio), 0.5, ratio)  # no sun at all: use a mid value
+    rnl = STEFAN_BOLTZMANN * tk4 * (0.34 - 0.14 * np.sqrt(ea)) * (1.35 * ratio - 0.35)
+    return rns - rnl
+
+
+# --- Humidity and air (FAO-56 eqs 7-19) ---
+
+def atmospheric_pressure(elevation):
+    return 101.3 * ((293 - 0.0065 * np.asarray(elevation, dtype=float)) / 293) ** 5.26
+
+
+def psychrometric_constant(elevation):
+    return 0.665e-3 * atmospheric_pressure(elevation)
+
+
+def saturation_vapour_pressure(temp):
+    """e°(T), kPa (eq 11)."""
+    temp = np.asarray(temp, dtype=float)
+    return 0.6108 * np.exp(17.27 * temp / (temp + 237.3))
+
+
+def vapour_pressure_slope(temp):
+    """Δ, kPa/°C (eq 13)."""
+    temp = np.asarray(temp, dtype=float)
+    return 4098 * saturation_vapour_pressure(temp) / (temp + 237.3) ** 2
+
+
+def actual_vapour_pressure(tmin, tmax, rh_min=None, rh_max=None, rh_mean=None):
+    """ea from relative humidity (eq 17, or eq 19 with only mean RH); dew point ≈ tmin otherwise."""
+    if rh_min is not None and rh_max is not None:
+        return (saturation_vapour_pressure(tmin) * np.asarray(rh_max) / 100
+                + saturation_vapour_pressure(tmax) * np.asarray(rh_min) / 100) / 2
+    if rh_mean is not None:
+        return np.asarray(rh_mean) / 100 * (saturation_vapour_pressure(tmin) + saturation_vapour_pressure(tmax)) / 2
+    return saturation_vapour_pressure(tmin)
+
+
+def wind_at_2m(speed, height=10.0):
+    """Wind speed measured at height (m) scaled to 2 m (eq 47)."""
+    return np.asarray(speed, dtype=float) * 4.87 / np.log(67.8 * height - 5.42)
+
+
+# --- ET₀ methods ---
+
+def hargreaves(tmin, tmax, ra):
+    """Hargreaves ET₀ (eq 52): temperature and Ra only."""
+    tmin, tmax = np.asarray(tmin, dtype=float), np.asarray(tmax, dtype=float)
+    tmean = (tmin + tmax) / 2
+    et0 = 0.0023 * (tmean + 17.8) * np.sqrt(np.maximum(tmax - tmin, 0.0)) * MJ_TO_MM * ra
+    return np.maximum(et0, 0.0)
+
+
+def hourly_hargreaves(temps_f, lat_deg, doy, min_entries=8):
+    """Hargreaves ET₀ (mm/day) from hourly temperatures in °F (the schedulers' input).
+
+    temps_f is (..., slots) with NaN for missing entries; tmin / tmax are the
+    day's extremes. Days with fewer than min_entries readings (a full day of
+    3-hourly OpenWeather entries), or no latitude, get REFERENCE_ET0.
+    """
+    temps = np.asarray(temps_f, dtype=float)
+    valid = np.isfinite(temps)
+    filled = valid.sum(axis=-1) >= min_entries
+    tmin = f_to_c(np.where(filled, np.where(valid, temps, np.inf).min(axis=-1), 32.0))
+    tmax = f_to_c(np.where(filled, np.where(valid, temps, -np.inf).max(axis=-1), 32.0))
+    lat = np.asarray(lat_deg, dtype=float)
+    known = filled & np.isfinite(lat)
+    et0 = hargreaves(tmin, tmax, extraterrestrial_radiation(np.nan_to_num(lat), doy))
+    return np.where(known, et0, REFERENCE_ET0)
+
+
+def penman_monteith(tmin, tmax, rs, u2, ea, lat_deg, doy, elevation=0.0, g=0.0):
+    """FAO-56 Penman-Monteith daily ET₀ (eq 6)."""
+    tmin, tmax = np.asarray(tmin, dtype=float), np.asarray(tmax, dtype=float)
+    tmean = (tmin + tmax) / 2
+    es = (saturation_vapour_pressure(tmin) + saturation_vapour_pressure(tmax)) / 2
+    delta = vapour_pressure_slope(tmean)
+    gamma = psychrometric_constant(elevation)
+    rso = clear_sky_radiation(extraterrestrial_radiation(lat_deg, doy), elevation)
+    rn = net_radiation(rs, rso, tmin, tmax, ea)
+    u2 = np.asarray(u2, dtype=float)
+    et0 = (0.408 * delta * (rn - g) + gamma * 900 / (tmean + 273) * u2 * (es - ea)) \
+        / (delta + gamma * (1 + 0.34 * u2))
+    return np.maximum(et0, 0.0)
+
+
+def priestley_taylor(tmin, tmax, rs, ea, lat_deg, doy, elevation=0.0, g=0.0, alpha=1.26):
+    """Priestley-Taylor ET₀: radiation-driven, no wind or humidity deficit term."""
+    tmin, tmax = np.asarray(tmin, dtype=float), np.asarray(tmax, dtype=float)
+    tmean = (tmin + tmax) / 2
+    delta = vapour_pressure_slope(tmean)
+    gamma = psychrometric_constant(elevation)
+    rso = clear_sky_radiation(extraterrestrial_radiation(lat_deg, doy), elevation)
+    rn = net_radiation(rs, rso, tmin, tmax, ea)
+    return np.maximum(alpha * delta / (delta + gamma) * (rn - g) / LATENT_HEAT, 0.0)
+
+
+def forecast_et0(daily, hourly, lat):
+    """Per-day ET₀ for a get_forecast() result (imperial units).
+
+    Returns a list of {"date", "et0_pm", "et0_hargreaves"} in mm/day. Penman-
+    Monteith uses radiation estimated from cloud cover and the day's mean
+    humidity and wind from the hourly entries; Hargreaves needs only the
+    temperature range. Empty when there is no usable forecast.
+    """
+    if not daily or lat is None:
+        return []
+    dates = [d["date"] for d in daily]
+    tmax = f_to_c([d.get("temp_max", 70) for d in daily])
+    tmin = f_to_c([d.get("temp_min", 60) for d in daily])
+    clouds = np.array([d.get("clouds", 50) for d in daily], dtype=float)
+    doy = day_of_year(dates)
+    ra = extraterrestrial_radiation(float(lat), doy)
+
+    rh = np.full(len(daily), np.nan)
+    wind = np.full(len(daily), np.nan)
+    by_date = {}
+    for h in hourly or []:
+        key = h.get("dt_txt", "")[:10]
+        by_date.setdefault(key, []).append(h)
+    for i, date in enumerate(dates):
+        entries = by_date.get(date, [])
+        humid = [e["main"]["humidity"] for e in entries if "humidity" in e.get("main", {})]
+        speeds = [e["wind"]["speed"] for e in entries if "speed" in e.get("wind", {})]
+        if humid:
+            rh[i] = np.mean(humid)
+        if speeds:
+            wind[i] = np.mean(speeds) * 0.44704  # mph → m/s
+    ea = np.where(np.isnan(rh), actual_vapour_pressure(tmin, tmax),
+                  actual_vapour_pressure(tmin, tmax, rh_mean=np.nan_to_num(rh)))
+    u2 = np.where(np.isnan(wind), 2.0, wind_at_2m(wind))  # FAO default 2 m/s when unknown
+
+    pm = penman_monteith(tmin, tmax, solar_radiation_from_clouds(ra, clouds), u2, ea, float(lat), doy)
+    hg = hargreaves(tmin, tmax, ra)
+    return [
+        {"date": date, "et0_pm": round(float(p), 2), "et0_hargreaves": round(float(h), 2)}
+        for date, p, h in zip(dates, pm, hg)
+    ]
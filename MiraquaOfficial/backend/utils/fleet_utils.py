@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from utils.et0_utils import REFERENCE_ET0, hourly_hargreaves
+from utils.kc_utils import CROP_CURVES, kc_table
+from utils.model_utils import ScheduleBatch
+from utils.schedule_utils import LEGACY_REFILL_SHARE, mm_to_liters
+from utils.window_utils import HOUR_LABELS, hour_scores
+
+# Batch version of forecast_utils.calculate_schedule: every plot's 7-day liters
+# and watering time computed at once with NumPy instead of one plot (and one
+# day) at a time. Plots reference a location cell; the forecast is packed once
+# per cell into (cells, days, slots) arrays, so plots sharing a cell share the
+# weather work.
+
+DAYS = 7
+ROOT_DEPTH_MM = 300
+MOISTURE_THRESHOLD = 0.28
+TARGET_MOISTURE = 0.42
+DEFAULT_SOIL = 0.25
+FALLBACK_HOUR = 6
+
+CROPS = list(CROP_CURVES)  # row codes of kc_utils.kc_table for the built-in crops
+
+TIME_LABELS = np.array(HOUR_LABELS + ["Skipped"])
+
+
+def crop_codes(crops):
+    """Crop names -> row codes into kc_utils.kc_table (unknown crops use "default")."""
+    return kc_table.codes(crops)
+
+
+def kc_for(codes, ages):
+    """Kc for crop codes at ages in months (day-by-day curves, see kc_utils)."""
+    return kc_table.kc(codes, ages)
+
+
+def pack_hourly(cells, days=DAYS, lats=None, today=None):
+    """Pack per-cell forecasts into arrays.
+
+    cells is a list with one entry per location cell, each a list of per-day
+    lists of OpenWeather hourly entries (calculate_schedule's hourly_blocks).
+    Returns a dict of (cells, days, slots) arrays: temp, wind, clouds, pop,
+    hour and valid, where valid marks the slots that hold an entry; plus lat
+    (cells,), NaN where unknown, and doy (days,) counted from today (UTC).
+    """
+    slots = max([len(day) for blocks in cells for day in blocks[:days]] or [1]) or 1
+    shape = (len(cells), days, slots)
+    packed = {
+        "temp": np.full(shape, np.nan),
+        "wind": np.zeros(shape),
+        "clouds": np.zeros(shape),
+        "pop": np.zeros(shape),
+        "hour": np.full(shape, FALLBACK_HOUR, dtype=np.int64),
+        "valid": np.zeros(shape, dtype=bool),
+        "lat": np.full(len(cells), np.nan) if lats is None else np.asarray(lats, dtype=float),
+        "doy": np.array([((today or datetime.utcnow()) + timedelta(days=d)).timetuple().tm_yday
+                         for d in range(days)])
+    }
+    for c, blocks in enumerate(cells):
+        for d, day in enumerate(blocks[:days]):
+            for s, h in enumerate(day):
+                clouds = h.get("clouds", 50)
+                dt = h.get("dt")
+                packed["temp"][c, d, s] = h.get("main", {}).get("temp", 20)
+                packed["wind"][c, d, s] = h.get("wind", {}).get("speed", 1.5)
+                packed["clouds"][c, d, s] = clouds.get("all", 50) if isinstance(clouds, dict) else clouds
+                packed["pop"][c, d, s] = h.get("pop", 0)
+                packed["hour"][c, d, s] = datetime.fromtimestamp(dt).hour if dt else FALLBACK_HOUR
+                packed["valid"][c, d, s] = True
+    return packed
+
+
+def optimal_hours(forecast):
+    """Best watering hour per (cell, day), as in find_optimal_time."""
+    score = hour_scores(forecast)
+    best = np.take_along_axis(forecast["hour"], score.argmin(axis=-1)[..., None], axis=-1)[..., 0]
+    return np.where(np.isfinite(score).any(axis=-1), best, FALLBACK_HOUR)
+
+
+def daily_et0(forecast):
+    """Hargreaves ET₀ (mm/day) per (cell, day) from the hourly temperatures, as in calculate_schedule."""
+    return hourly_hargreaves(forecast["temp"], forecast["lat"][:, None], forecast["doy"][None, :])
+
+
+def calculate_schedules(crops, areas, ages, cells, forecast, soil=None):
+    """Schedule many plots at once.
+
+    crops are names or crop_codes(); areas (m²), ages (months) and cells
+    (index into the forecast's first axis) are per-plot arrays. soil is an
+    optional (cells, days) soil-moisture forecast, 0.25 where missing.
+    Returns {"liters": (plots, days), "optimal_hour": (plots, days) with -1 for
+    skipped days, "kc": (plots,)}.
+    """
+    codes = np.asarray(crops) if np.issubdtype(np.asarray(crops).dtype, np.integer) else crop_codes(crops)
+    areas = np.asarray(areas, dtype=float)
+    cells = np.asarray(cells, dtype=np.int64)
+    n_cells, days = forecast["temp"].shape[:2]
+    if soil is None:
+        soil = np.full((n_cells, days), DEFAULT_SOIL)
+
+    kc = kc_for(codes, ages)
+    et0 = daily_et0(forecast)[cells]         # (plots, days)
+    moisture = np.asarray(soil, dtype=float)[cells]
+    hours = optimal_hours(forecast)[cells]
+
+    skipped = moisture > MOISTURE_THRESHOLD
+    mm_needed = np.maximum(0.0, (TARGET_MOISTURE - moisture) * ROOT_DEPTH_MM)
+    liters = np.round(mm_to_liters(mm_needed * LEGACY_REFILL_SHARE, areas[:, None]) * kc[:, None] * et0 / REFERENCE_ET0, 2)
+    return {
+        "liters": np.where(skipped, 0.0, liters),
+        "optimal_hour": np.where(skipped, -1, hours),
+        "kc": kc
+    }
+
+
+def schedule_rows(liters, hours, today=None):
+    """One plot's row of calculate_schedules output as calculate_schedule-style day dicts."""
+    return ScheduleBatch.from_hours(np.asarray(liters)[None, :], np.asarray(hours)[None, :], today).to_dicts(0)
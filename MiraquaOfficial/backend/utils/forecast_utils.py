@@ -5,23 +5,16 @@ import requests_cache
 from retry_requests import retry
 from datetime import datetime, timedelta
 import numpy as np
-from utils.schedule_utils import cap_liters
+from utils.et0_utils import REFERENCE_ET0, hourly_hargreaves
+from utils.schedule_utils import LEGACY_REFILL_SHARE, cap_liters, mm_to_liters
+from utils.kc_utils import kc_table
+from utils.model_utils import ScheduleDay
+from utils.window_utils import DEFAULT_WEIGHTS, FALLBACK_HOUR, MAX_POP, MIN_TEMP, MORNING_FACTOR, MORNING_HOURS
 
 cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
 retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
 openmeteo = openmeteo_requests.Client(session=retry_session)
 
-CROP_KC = {
-    "corn": 1.15,
-    "wheat": 1.0,
-    "alfalfa": 1.2,
-    "lettuce": 0.85,
-    "tomato": 1.05,
-    "almond": 1.05,
-    "grass": 1.1,
-    "default": 0.95
-}
-
 def get_lat_lon(zip_code):
     geo_url = f"https://geocoding-api.open-meteo.com/v1/search?name={zip_code}&country=US&count=1"
     res = requests.get(geo_url).json()
@@ -39,8 +32,83 @@ from dotenv import load_dotenv
 
 load_dotenv()
 OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY")
+# Horizons up to this many days use OpenWeather as before; longer ones the
+# Open-Meteo forecast, which reaches 16 days
+EXTENDED_FORECAST_AFTER_DAYS = 7
+
+def _daily_from_hourly(entries):
+    """Per-date summaries (date, temp_max/min/avg, clouds, precipitation) from hourly entries."""
+    daily_groups = {}
+    for entry in entries:
+        dt = entry.get("dt")
+        if dt:
+            date_key = datetime.fromtimestamp(dt).strftime("%Y-%m-%d")
+            if date_key not in daily_groups:
+                daily_groups[date_key] = []
+            daily_groups[date_key].append(entry)
+
+    daily = []
+    for date_key, entries in daily_groups.items():
+        temps = [e.get("main", {}).get("temp") for e in entries if e.get("main", {}).get("temp")]
+        clouds = [e.get("clouds", {}).get("all", 50) if isinstance(e.get("clouds"), dict) else e.get("clouds", 50) for e in entries]
+        rains = [e.get("rain", {}).get("3h", e.get("rain", {}).get("1h", 0)) if isinstance(e.get("rain"), dict) else e.get("rain", 0) for e in entries]
+
+        daily.append({
+            "date": date_key,
+            "temp_max": max(temps) if temps else 70,
+            "temp_min": min(temps) if temps else 60,
+            "temp_avg": np.mean(temps) if temps else 70,
+            "clouds": int(np.mean(clouds)) if clouds else 50,
+            "precipitation": sum(rains) if rains else 0
+        })
+    return daily
 
-def get_forecast(lat, lon):
+def get_extended_forecast(lat, lon, days):
+    """Hourly Open-Meteo forecast for up to 16 days, in get_forecast()'s shape and units.
+
+    Hourly entries mimic OpenWeather's (dt, dt_txt, main.temp/humidity in °F
+    and %, wind.speed in mph, clouds.all, pop, rain.1h in mm), so everything
+    downstream reads them the same way.
+    """
+    try:
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "hourly": ["temperature_2m", "relative_humidity_2m", "wind_speed_10m", "cloud_cover",
+                       "precipitation_probability", "precipitation"],
+            "temperature_unit": "fahrenheit",
+            "wind_speed_unit": "mph",
+            "forecast_days": days,
+            "timezone": "GMT"
+        }
+        print(f"🌤️ Fetching {days}-day extended forecast for lat={lat}, lon={lon}")
+        response = openmeteo.weather_api("https://api.open-meteo.com/v1/forecast", params=params)[0]
+        hourly = response.Hourly()
+        times = range(hourly.Time(), hourly.TimeEnd(), hourly.Interval())
+        temp, humidity, wind, clouds, pop, rain = (hourly.Variables(i).ValuesAsNumpy() for i in range(6))
+
+        entries = []
+        for i, ts in enumerate(times):
+            if np.isnan(temp[i]):
+                continue
+            entries.append({
+                "dt": int(ts),
+                "dt_txt": datetime.utcfromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"),
+                "main": {"temp": round(float(temp[i]), 1), "humidity": round(float(humidity[i]))},
+                "wind": {"speed": round(float(wind[i]), 1)},
+                "clouds": {"all": round(float(clouds[i]))},
+                "pop": 0.0 if np.isnan(pop[i]) else round(float(pop[i]) / 100, 2),
+                "rain": {"1h": 0.0 if np.isnan(rain[i]) else round(float(rain[i]), 2)}
+            })
+        print(f"✅ Open-Meteo forecast fetched ({len(entries)} hours)")
+        return {"hourly": entries, "daily": _daily_from_hourly(entries), "current": entries[0] if entries else {}}
+    except Exception as e:
+        print(f"❌ Error fetching extended forecast: {e}")
+        return {"hourly": [], "daily": [], "current": {}}
+
+def get_forecast(lat, lon, days=None):
+    if days and days > EXTENDED_FORECAST_AFTER_DAYS and lat and lon:
+        return get_extended_forecast(lat, lon, days)
     try:
         if not lat or not lon:
             print(f"⚠️ Invalid coordinates: lat={lat}, lon={lon}")
@@ -55,7 +123,8 @@ def get_forecast(lat, lon):
         }
 
         print(f"🌤️ Fetching weather for lat={lat}, lon={lon}")
-        res = requests.get(url, params=params, timeout=10)
+        # Through the shared HTTP cache, so a warm-up fetch (e.g. for a new plot) serves later requests
+        res = cache_session.get(url, params=params, timeout=10)
         res.raise_for_status()
         data = res.json()
         
@@ -75,32 +144,7 @@ def get_forecast(lat, lon):
                 validated_hourly.append(entry)
         
         # Extract daily summary from hourly data
-        daily = []
-        if validated_hourly:
-            # Group hourly data by day
-            daily_groups = {}
-            for entry in validated_hourly:
-                dt = entry.get("dt")
-                if dt:
-                    date_key = datetime.fromtimestamp(dt).strftime("%Y-%m-%d")
-                    if date_key not in daily_groups:
-                        daily_groups[date_key] = []
-                    daily_groups[date_key].append(entry)
-            
-            # Create daily summaries
-            for date_key, entries in daily_groups.items():
-                temps = [e.get("main", {}).get("temp") for e in entries if e.get("main", {}).get("temp")]
-                clouds = [e.get("clouds", {}).get("all", 50) if isinstance(e.get("clouds"), dict) else e.get("clouds", 50) for e in entries]
-                rains = [e.get("rain", {}).get("3h", 0) if isinstance(e.get("rain"), dict) else e.get("rain", 0) for e in entries]
-                
-                daily.append({
-                    "date": date_key,
-                    "temp_max": max(temps) if temps else 70,
-                    "temp_min": min(temps) if temps else 60,
-                    "temp_avg": np.mean(temps) if temps else 70,
-                    "clouds": int(np.mean(clouds)) if clouds else 50,
-                    "precipitation": sum(rains) if rains else 0
-                })
+        daily = _daily_from_hourly(validated_hourly)
         
         current = validated_hourly[0] if validated_hourly else {}
 
@@ -122,30 +166,12 @@ def get_forecast(lat, lon):
 
 
 def dynamic_kc(crop, age_months):
-    crop = crop.lower()
-    stages = {
-        "tomato": [0.6, 0.95, 1.15, 0.8],
-        "corn": [0.4, 0.9, 1.15, 0.75],
-        "wheat": [0.3, 0.8, 1.0, 0.4],
-        "alfalfa": [0.7, 1.0, 1.2, 0.9],
-        "lettuce": [0.6, 0.85, 1.0, 0.8],
-        "almond": [0.4, 0.85, 1.05, 0.85],
-        "grass": [0.5, 0.95, 1.1, 0.8],
-        "default": [0.5, 0.85, 1.05, 0.8]
-    }
-    kc_stages = stages.get(crop, stages["default"])
-    if age_months <= 1:
-        return kc_stages[0]
-    elif age_months <= 3:
-        return kc_stages[1]
-    elif age_months <= 6:
-        return kc_stages[2]
-    else:
-        return kc_stages[3]
+    return float(kc_table.kc([crop], [age_months])[0])
 
 def find_optimal_time(hourly_day):
+    # One plot-day at a time; utils/window_utils scores whole forecasts (and multi-hour windows) in bulk
     best_score = float("inf")
-    best_hour = 6  # fallback
+    best_hour = FALLBACK_HOUR
 
     for h in hourly_day:
         temp = h.get("main", {}).get("temp", 20)
@@ -154,16 +180,16 @@ def find_optimal_time(hourly_day):
         clouds = clouds_raw.get("all", 50) if isinstance(clouds_raw, dict) else clouds_raw
         rain = h.get("pop", 0)
         dt = h.get("dt")
-        hour = datetime.fromtimestamp(dt).hour if dt else 6
+        hour = datetime.fromtimestamp(dt).hour if dt else FALLBACK_HOUR
 
-        if rain > 0.2 or temp < 2:
+        if rain > MAX_POP or temp < MIN_TEMP:
             continue
 
         sunlight = 100 - clouds
-        score = temp * 0.4 + wind * 0.3 + sunlight * 0.2
+        score = temp * DEFAULT_WEIGHTS["temp"] + wind * DEFAULT_WEIGHTS["wind"] + sunlight * DEFAULT_WEIGHTS["sunlight"]
 
-        if 4 <= hour <= 8:
-            score *= 0.8  # morning bonus
+        if MORNING_HOURS[0] <= hour <= MORNING_HOURS[1]:
+            score *= MORNING_FACTOR  # morning bonus
 
         if score < best_score:
             best_score = score
@@ -173,12 +199,15 @@ def find_optimal_time(hourly_day):
     hour_12 = best_hour % 12 or 12
     return f"{hour_12:02d}:00 {am_pm}"
 
-def calculate_schedule(crop, area, age, lat, lon, flex_type="daily", hourly_blocks=None, soil_forecast=None):
+def calculate_schedule(crop, area, age, lat, lon, flex_type="daily", hourly_blocks=None, soil_forecast=None, days=7):
+    # Legacy scheduler, kept as the reference fleet_utils.calculate_schedules is checked against.
+    # Its fixed 0.28 / 0.42 moisture thresholds aren't soil-specific, so the water balance isn't
+    # wired in here; live schedules use the balance's TAW / RAW (water_balance_utils, schedule_state_utils).
     if not hourly_blocks:
-        hourly_blocks = [[] for _ in range(7)]
+        hourly_blocks = [[] for _ in range(days)]
     if not soil_forecast:
         print("no soil forecast provided, using default values")
-        soil_forecast = [0.25] * 7
+        soil_forecast = [0.25] * days
 
     kc = dynamic_kc(crop, age)
     print(f"[Kc DEBUG] crop={crop}, age={age:.1f} months → kc={kc}")
@@ -190,35 +219,33 @@ def calculate_schedule(crop, area, age, lat, lon, flex_type="daily", hourly_bloc
 
     schedule = []
 
-    for day_index in range(7):
+    for day_index in range(days):
         hourly_day = hourly_blocks[day_index] if day_index < len(hourly_blocks) else []
         avg_moisture = soil_forecast[day_index] if day_index < len(soil_forecast) else 0.25
         temps = [h.get("main", {}).get("temp", 20) for h in hourly_day]
+        date_obj = today + timedelta(days=day_index)
 
-        avg_temp_c = sum(temps) / len(temps) if temps else 20.0
-
-        if len(temps) >= 12:
-            et0 = 0.0023 * ((avg_temp_c + 17.8) * np.sqrt(avg_temp_c - 10)) * 0.408 if avg_temp_c > 10 else 0.15
-            print(f"[DEBUG] Day {day_index + 1}: avg_temp_c={avg_temp_c:.2f} ET₀={et0:.3f}, Moisture={avg_moisture:.3f}")
+        et0 = float(hourly_hargreaves(temps or [np.nan], np.nan if lat is None else lat,
+                                      date_obj.timetuple().tm_yday))
+        if len(temps) >= 8:
+            print(f"[DEBUG] Day {day_index + 1}: temp {min(temps):.1f}-{max(temps):.1f}°F ET₀={et0:.2f} mm, Moisture={avg_moisture:.3f}")
         else:
-            et0 = 0.15
-            print(f"[DEBUG] Day {day_index + 1}: ET₀={et0:.3f}, Moisture={avg_moisture:.3f} (avg_temp_c not available)")
+            print(f"[DEBUG] Day {day_index + 1}: ET₀={et0:.2f} mm (reference), Moisture={avg_moisture:.3f}")
 
         if avg_moisture > moisture_threshold:
             liters = 0.0
             optimal_time = "Skipped"
         else:
             mm_needed = max(0, (target_moisture - avg_moisture) * root_depth_mm)
-            base_liters = mm_needed * area * 0.1
-            liters = round(base_liters * kc * et0 / 0.15, 2)
+            base_liters = mm_to_liters(mm_needed * LEGACY_REFILL_SHARE, area)
+            liters = round(base_liters * kc * et0 / REFERENCE_ET0, 2)
             print(f"[DEBUG] Day {day_index + 1}: mm_needed={mm_needed:.2f}, Kc={kc:.2f}, base_liters={base_liters:.2f}, FINAL={liters}L")
             optimal_time = find_optimal_time(hourly_day)
 
-        date_obj = today + timedelta(days=day_index)
-        schedule.append({
-            "day": f"Day {day_index + 1}",
-            "date": date_obj.strftime("%m/%d/%y"),
-            "liters": liters,
-            "optimal_time": optimal_time
-        })
+        schedule.append(ScheduleDay(
+            day=f"Day {day_index + 1}",
+            date=date_obj.strftime("%m/%d/%y"),
+            liters=liters,
+            optimal_time=optimal_time
+        ).to_dict())
     return schedule, kc
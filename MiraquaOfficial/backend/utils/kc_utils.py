@@ -0,0 +1,104 @@
+import threading
+
+import numpy as np
+
+# Crop coefficient (Kc) curves by day since planting, FAO-56 style (chapter 6):
+# Kc_ini through the initial stage, a linear rise to Kc_mid over crop
+# development, Kc_mid through mid-season, a linear fall to Kc_end over the late
+# season, then Kc_end. Every curve is precomputed into one (crops, days) table,
+# so Kc for any number of plots is a single index into it.
+
+MAX_DAY = 730          # older crops use the last day's value (Kc_end)
+DAYS_PER_MONTH = 30.44
+
+# Stage lengths in days (initial, development, mid-season, late) and
+# (Kc_ini, Kc_mid, Kc_end). Stages end at 1, 3 and 6 months, as before.
+CROP_CURVES = {
+    "tomato": ((30, 61, 92, 45), (0.6, 1.15, 0.8)),
+    "corn": ((30, 61, 92, 45), (0.4, 1.15, 0.75)),
+    "wheat": ((30, 61, 92, 45), (0.3, 1.0, 0.4)),
+    "alfalfa": ((30, 61, 92, 45), (0.7, 1.2, 0.9)),
+    "lettuce": ((30, 61, 92, 45), (0.6, 1.0, 0.8)),
+    "almond": ((30, 61, 92, 45), (0.4, 1.05, 0.85)),
+    "grass": ((30, 61, 92, 45), (0.5, 1.1, 0.8)),
+    "default": ((30, 61, 92, 45), (0.5, 1.05, 0.8))
+}
+
+
+def validate_curve(stage_days, kc):
+    """Raise ValueError unless stage_days is 4 positive lengths and kc is 3 values in (0, 2]."""
+    if len(stage_days) != 4 or any(int(d) < 1 for d in stage_days):
+        raise ValueError("stage_days must be 4 stage lengths of at least 1 day")
+    if len(kc) != 3 or any(not 0 < float(k) <= 2 for k in kc):
+        raise ValueError("kc must be (Kc_ini, Kc_mid, Kc_end), each between 0 and 2")
+
+
+def build_curve(stage_days, kc, max_day=MAX_DAY):
+    """Daily Kc for days 0..max_day since planting."""
+    validate_curve(stage_days, kc)
+    ini, dev, mid, late = (int(d) for d in stage_days)
+    kc_ini, kc_mid, kc_end = (float(k) for k in kc)
+    knots = np.cumsum([0, ini, dev, mid, late])
+    return np.interp(np.arange(max_day + 1), knots, [kc_ini, kc_ini, kc_mid, kc_mid, kc_end])
+
+
+def months_to_days(ages_months):
+    return np.clip(np.rint(np.asarray(ages_months, dtype=float) * DAYS_PER_MONTH), 0, MAX_DAY).astype(np.int64)
+
+
+class KcTable:
+    """Named Kc curves as rows of one array; custom curves can be added at runtime."""
+
+    def __init__(self, curves):
+        self.lock = threading.Lock()
+        self.index = {}
+        self.table = np.zeros((0, MAX_DAY + 1))
+        for name, (stage_days, kc) in curves.items():
+            self.add_curve(name, stage_days, kc)
+
+    def add_curve(self, name, stage_days, kc):
+        """Add or replace a named curve (e.g. a crop a user defined); returns its code."""
+        row = build_curve(stage_days, kc)
+        name = str(name).lower()
+        with self.lock:
+            # Copy-on-write, so lookups running meanwhile see a consistent table and index
+            index = dict(self.index)
+            table = self.table.copy() if name in index else np.vstack([self.table, row])
+            code = index.setdefault(name, len(index))
+            table[code] = row
+            self.table, self.index = table, index
+        return code
+
+    def codes(self, crops):
+        """Crop names -> row codes (unknown crops use "default")."""
+        index = self.index
+        default = index["default"]
+        return np.array([index.get(str(c).lower(), default) for c in crops], dtype=np.int64)
+
+    def lookup(self, codes, days):
+        """Kc for crop codes at days since planting; both broadcast."""
+        days = np.clip(np.asarray(days, dtype=np.int64), 0, MAX_DAY)
+        return self.table[codes, days]
+
+    def kc(self, crops, ages_months):
+        """Kc for crop names (or codes) at ages in months."""
+        codes = np.asarray(crops) if np.issubdtype(np.asarray(crops).dtype, np.integer) else self.codes(crops)
+        return self.lookup(codes, months_to_days(ages_months))
+
+
+kc_table = KcTable(CROP_CURVES)
+
+
+def plot_kc(plot, ages_months):
+    """Kc for one plot at the given ages, from its own kc_curve when it has one.
+
+    kc_curve is {"stage_days": [initial, development, mid, late], "kc":
+    [Kc_ini, Kc_mid, Kc_end]}; an invalid one falls back to the crop's curve.
+    """
+    custom = plot.get("kc_curve")
+    if custom:
+        try:
+            return build_curve(custom["stage_days"], custom["kc"])[months_to_days(ages_months)]
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"⚠️ Ignoring invalid kc_curve for plot {plot.get('id')}: {e}")
+    return kc_table.kc([plot.get("crop", "default")], ages_months)
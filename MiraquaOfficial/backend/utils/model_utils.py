@@ -0,0 +1,325 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+from utils.kc_utils import validate_curve
+from utils.schedule_utils import DEFAULT_TIME, MAX_HORIZON_DAYS, normalize_time
+
+# Typed schedule and plot records. Schedules are stored and sent as lists of
+# dicts; ScheduleDay.from_dict is the one place they're read back, so every
+# day comes out with the same keys and formats ("reason" -> "explanation",
+# "06:00" -> "06:00 AM", dates as MM/DD/YY). ScheduleBatch keeps many
+# schedules as arrays for fleet work, at a few bytes per day.
+
+DATE_FORMAT = "%m/%d/%y"
+INPUT_DATE_FORMATS = (DATE_FORMAT, "%Y-%m-%d", "%m/%d/%Y")
+SKIPPED = "Skipped"
+MAX_ZONES = 5000
+
+
+def normalize_date(value):
+    """value as MM/DD/YY; raises ValueError for anything that isn't a date."""
+    if isinstance(value, datetime):
+        return value.strftime(DATE_FORMAT)
+    return _normalize_date_text(str(value or "").strip()[:10])
+
+
+# Schedules repeat the same few dates and times, so parsing them is cached
+@lru_cache(maxsize=4096)
+def _normalize_date_text(text):
+    for fmt in INPUT_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime(DATE_FORMAT)
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date: {text!r}")
+
+
+_normalize_time = lru_cache(maxsize=4096)(normalize_time)
+
+
+def time_to_minutes(label):
+    """ "06:30 AM" -> 390, "Skipped" -> -1."""
+    if label == SKIPPED:
+        return -1
+    clock, meridiem = label.split(" ")
+    hour, minute = (int(p) for p in clock.split(":"))
+    return (hour % 12 + (12 if meridiem == "PM" else 0)) * 60 + minute
+
+
+def minutes_to_time(minutes):
+    if minutes < 0:
+        return SKIPPED
+    hour, minute = divmod(int(minutes), 60)
+    return f"{hour % 12 or 12:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+class ScheduleDay:
+    """One day of a watering schedule."""
+
+    __slots__ = ("day", "date", "liters", "optimal_time", "explanation", "note", "extra")
+    FIELDS = ("day", "date", "liters", "optimal_time", "explanation", "note")
+
+    def __init__(self, day, date, liters=0.0, optimal_time=DEFAULT_TIME, explanation="", note=None, extra=None):
+        self.day = day
+        self.date = date
+        self.liters = liters
+        self.optimal_time = optimal_time
+        self.explanation = explanation
+        self.note = note
+        self.extra = extra  # any other keys (e.g. "moisture"), kept as they were
+
+    @classmethod
+    def from_dict(cls, data, index=None):
+        """Day from a stored or generated dict; raises ValueError if it isn't an object.
+
+        Legacy rows are coerced rather than rejected: liters that aren't a
+        number count as 0, and an unparseable date is left as None for
+        parse_schedule to fill in.
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"Schedule day must be an object, got {type(data).__name__}")
+        day = data.get("day") or (f"Day {index + 1}" if index is not None else "")
+        extra = {k: v for k, v in data.items() if k not in cls.FIELDS and k != "reason"}
+        label = data.get("optimal_time")
+        try:
+            date = normalize_date(data.get("date"))
+        except ValueError:
+            date = None
+        return cls(
+            day=str(day),
+            date=date,
+            liters=_liters(data.get("liters")),
+            optimal_time=(_normalize_time(label) if isinstance(label, str) else None) or DEFAULT_TIME,
+            explanation=str(data.get("explanation") or data.get("reason") or ""),
+            note=data.get("note"),
+            extra=extra or None
+        )
+
+    def to_dict(self):
+        out = {"day": self.day, "date": self.date, "liters": self.liters, "optimal_time": self.optimal_time}
+        if self.explanation:
+            out["explanation"] = self.explanation
+        if self.note is not None:
+            out["note"] = self.note
+        if self.extra:
+            out.update(self.extra)
+        return out
+
+    def copy(self):
+        return ScheduleDay(self.day, self.date, self.liters, self.optimal_time, self.explanation, self.note,
+                           dict(self.extra) if self.extra else None)
+
+    def __repr__(self):
+        return f"ScheduleDay({self.date} {self.liters}L at {self.optimal_time})"
+
+
+def parse_schedule(rows):
+    """List of stored day dicts (or ScheduleDays) -> list of ScheduleDay.
+
+    Stored schedules are repaired, never discarded: entries that aren't
+    objects are dropped, and a day without a usable date gets one counted
+    from the nearest dated day (or keeps its stored text if no day has one).
+    """
+    days, raw_dates = [], []
+    for i, row in enumerate(rows or []):
+        if isinstance(row, ScheduleDay):
+            days.append(row)
+            raw_dates.append(row.date)
+        elif isinstance(row, dict):
+            days.append(ScheduleDay.from_dict(row, i))
+            raw_dates.append(row.get("date"))
+    if any(day.date is None for day in days):
+        _fill_dates(days, raw_dates)
+    return days
+
+
+def _fill_dates(days, raw_dates):
+    dated = [i for i, day in enumerate(days) if day.date is not None]
+    for i, day in enumerate(days):
+        if day.date is not None:
+            continue
+        if dated:
+            anchor = min(dated, key=lambda j: abs(j - i))
+            day.date = (datetime.strptime(days[anchor].date, DATE_FORMAT) + timedelta(days=i - anchor)).strftime(DATE_FORMAT)
+        else:
+            day.date = str(raw_dates[i] or "")
+
+
+def dump_schedule(days):
+    return [day.to_dict() for day in days]
+
+
+class ScheduleBatch:
+    """Many schedules as (schedules, days) arrays: liters and watering minute of day (-1 = skipped).
+
+    Every schedule starts on the same date. Explanations and notes aren't
+    kept; ScheduleDay is for that.
+    """
+
+    __slots__ = ("liters", "minutes", "start")
+
+    def __init__(self, liters, minutes, start=None):
+        self.liters = np.asarray(liters, dtype=np.float32)
+        self.minutes = np.asarray(minutes, dtype=np.int16)
+        self.start = start or datetime.utcnow()
+
+    @classmethod
+    def from_hours(cls, liters, hours, start=None):
+        """From fleet_utils.calculate_schedules output (hour of day, -1 for skipped)."""
+        hours = np.asarray(hours)
+        return cls(liters, np.where(hours >= 0, hours * 60, -1), start)
+
+    @classmethod
+    def from_schedules(cls, schedules, start=None):
+        """From lists of day dicts or ScheduleDays; shorter schedules are padded with skipped days."""
+        parsed = [parse_schedule(s) for s in schedules]
+        width = max([len(s) for s in parsed] or [0])
+        liters = np.zeros((len(parsed), width), dtype=np.float32)
+        minutes = np.full((len(parsed), width), -1, dtype=np.int16)
+        for i, days in enumerate(parsed):
+            liters[i, :len(days)] = [d.liters for d in days]
+            minutes[i, :len(days)] = [time_to_minutes(d.optimal_time) for d in days]
+        if start is None and parsed and parsed[0]:
+            start = datetime.strptime(parsed[0][0].date, DATE_FORMAT)
+        return cls(liters, minutes, start)
+
+    def __len__(self):
+        return self.liters.shape[0]
+
+    @property
+    def nbytes(self):
+        return self.liters.nbytes + self.minutes.nbytes
+
+    def days(self, i):
+        """Schedule i as ScheduleDays."""
+        return [
+            ScheduleDay(
+                day=f"Day {d + 1}",
+                date=(self.start + timedelta(days=d)).strftime(DATE_FORMAT),
+                liters=round(float(self.liters[i, d]), 2),
+                optimal_time=minutes_to_time(self.minutes[i, d])
+            )
+            for d in range(self.liters.shape[1])
+        ]
+
+    def to_dicts(self, i):
+        return dump_schedule(self.days(i))
+
+    def totals(self):
+        return self.liters.sum(axis=1, dtype=np.float64)
+
+    def watering_days(self):
+        return (self.minutes >= 0).sum(axis=1)
+
+
+class Plot:
+    """A plots row with its numeric fields coerced."""
+
+    __slots__ = ("id", "user_id", "name", "crop", "area", "lat", "lon", "zip_code", "soil_type", "planting_date",
+                 "age_at_entry", "flex_type", "horizon_days", "kc_curve", "zones", "extra")
+    FIELDS = __slots__[:-1]
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    @classmethod
+    def from_row(cls, row):
+        plot = cls(**{k: row.get(k) for k in cls.FIELDS})
+        plot.crop = str(plot.crop or "default").lower()
+        plot.area = _number(plot.area)
+        plot.lat = _number(plot.lat)
+        plot.lon = _number(plot.lon)
+        plot.flex_type = plot.flex_type or "daily"
+        plot.extra = {k: v for k, v in row.items() if k not in cls.FIELDS} or None
+        return plot
+
+    def validate(self, now=None, partial=False):
+        """Raise ValueError (message fit for an API response) for invalid settings.
+
+        A new plot (the default) must have a planting_date and age_at_entry;
+        with partial=True (a settings update) fields left as None are skipped.
+        """
+        if self.planting_date is not None or not partial:
+            try:
+                planted = datetime.strptime(str(self.planting_date or ""), "%Y-%m-%d")
+            except ValueError:
+                raise ValueError("Invalid planting_date format. Use YYYY-MM-DD.")
+            if planted > (now or datetime.utcnow()):
+                raise ValueError("Planting date cannot be in the future")
+        if self.age_at_entry is not None or not partial:
+            try:
+                float(self.age_at_entry)
+            except (TypeError, ValueError):
+                raise ValueError("Age at entry must be a number")
+        if self.area is not None and not self.area > 0:
+            raise ValueError("Area must be a positive number")
+        if (self.lat is not None and not -90 <= self.lat <= 90) or (self.lon is not None and not -180 <= self.lon <= 180):
+            raise ValueError("Invalid coordinates")
+        if self.horizon_days is not None:
+            try:
+                if not 1 <= int(self.horizon_days) <= MAX_HORIZON_DAYS:
+                    raise ValueError
+            except (TypeError, ValueError):
+                raise ValueError(f"horizon_days must be 1-{MAX_HORIZON_DAYS}")
+        if self.kc_curve:
+            try:
+                validate_curve(self.kc_curve["stage_days"], self.kc_curve["kc"])
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Invalid kc_curve: {e}")
+        if self.zones is not None:
+            validate_zones(self.zones)
+            zoned_area = sum(float(z["area"]) for z in self.zones if z.get("area") is not None)
+            if self.area and zoned_area > self.area + 1e-6:
+                raise ValueError("Zone areas add up to more than the plot's area")
+        return self
+
+    def to_dict(self):
+        out = {k: getattr(self, k) for k in self.FIELDS if getattr(self, k) is not None}
+        if self.extra:
+            out.update(self.extra)
+        return out
+
+
+def validate_zones(zones):
+    """Raise ValueError (message fit for an API response) unless zones is a usable zone list."""
+    if not isinstance(zones, list) or len(zones) > MAX_ZONES:
+        raise ValueError(f"zones must be a list of at most {MAX_ZONES} zones")
+    for i, zone in enumerate(zones):
+        if not isinstance(zone, dict):
+            raise ValueError(f"Zone {i + 1} must be an object")
+        for key in ("area", "emitter_lpm"):
+            if zone.get(key) is not None:
+                try:
+                    if not float(zone[key]) > 0:
+                        raise ValueError
+                except (TypeError, ValueError):
+                    raise ValueError(f"Zone {i + 1}: {key} must be a positive number")
+        if zone.get("kc_curve"):
+            try:
+                validate_curve(zone["kc_curve"]["stage_days"], zone["kc_curve"]["kc"])
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Zone {i + 1}: invalid kc_curve: {e}")
+
+
+def _liters(value):
+    """Non-negative liters rounded to 0.01; None, booleans and non-numbers count as 0."""
+    if isinstance(value, bool) or value is None:
+        return 0.0
+    try:
+        liters = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return max(0.0, round(liters, 2)) if liters == liters else 0.0
+
+
+def _number(value):
+    """float(value), or NaN for something that isn't a number (None stays None)."""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
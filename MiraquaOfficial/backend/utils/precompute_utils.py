@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from dateutil import tz
+from timezonefinder import TimezoneFinder
+
+# Nightly precompute of every plot's schedule, shortly after midnight in the
+# plot's own timezone (resolved from lat/lon). Each plot gets a fixed slot in
+# a window after midnight, derived from its id, so the night's LLM load is
+# spread out rather than arriving at once; at most NIGHTLY_CONCURRENCY plots
+# regenerate at a time. Users then open the app to a schedule that already
+# starts today.
+
+NIGHTLY_START_MIN = int(os.getenv("NIGHTLY_START_MIN", "10"))     # window opens this long after local midnight
+NIGHTLY_SPREAD_MIN = int(os.getenv("NIGHTLY_SPREAD_MIN", "240"))  # and is this wide
+NIGHTLY_CONCURRENCY = int(os.getenv("NIGHTLY_CONCURRENCY", "2"))
+TICK_SECONDS = 60
+PLOT_LIST_TTL = 15 * 60
+RETRY_AFTER = 30 * 60  # a failed plot waits this long before its next attempt
+
+_tf = TimezoneFinder()
+
+
+@lru_cache(maxsize=4096)
+def _zone_for(lat, lon):
+    name = _tf.timezone_at(lat=lat, lng=lon)
+    return tz.gettz(name) if name else tz.UTC
+
+
+def plot_timezone(plot):
+    """tzinfo for a plot's coordinates (UTC when unknown)."""
+    lat, lon = plot.get("lat"), plot.get("lon")
+    if lat is None or lon is None:
+        return tz.UTC
+    # ~1km grid is plenty for a timezone and keeps the cache small
+    return _zone_for(round(float(lat), 2), round(float(lon), 2))
+
+
+def plot_local_date(plot, now_utc=None):
+    """Today in the plot's timezone: the day its schedules are dated from."""
+    return (now_utc or datetime.now(tz.UTC)).astimezone(plot_timezone(plot)).date()
+
+
+def slot_offset(plot_id, start_min=NIGHTLY_START_MIN, spread_min=NIGHTLY_SPREAD_MIN):
+    """Fixed time after local midnight at which this plot is refreshed."""
+    return timedelta(minutes=start_min + zlib.crc32(str(plot_id).encode()) % max(spread_min, 1))
+
+
+class NightlyPrecompute:
+    def __init__(self, load_plots, refresh_plot, concurrency=NIGHTLY_CONCURRENCY):
+        """load_plots() -> list of plot rows; refresh_plot(plot, local_date) -> "refreshed" or "fresh"."""
+        self.load_plots = load_plots
+        self.refresh_plot = refresh_plot
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="miraqua-nightly")
+        self.concurrency = concurrency
+        self.lock = threading.Lock()
+        self.plots = []
+        self.plots_loaded_at = 0.0
+        self.done = {}      # plot_id -> local date handled
+        self.running = set()
+        self.retry_at = {}  # plot_id -> time.time() of the next attempt after a failure
+        self.thread = None
+        self.stats = {"refreshed": 0, "fresh": 0, "failed": 0}
+        self.durations = []  # seconds per refresh, last 500
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._loop, name="miraqua-nightly-scheduler", daemon=True)
+            self.thread.start()
+        print(f"🌙 Nightly schedule precompute started ({self.concurrency} at a time)")
+
+    def _loop(self):
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"⚠️ Nightly precompute tick failed: {e}")
+            time.sleep(TICK_SECONDS)
+
+    def _current_plots(self):
+        if time.time() - self.plots_loaded_at > PLOT_LIST_TTL:
+            self.plots = self.load_plots() or []
+            self.plots_loaded_at = time.time()
+        return self.plots
+
+    def due(self, now_utc=None):
+        """Plots whose slot for their current local day has passed and that haven't been done."""
+        now_utc = now_utc or datetime.now(tz.UTC)
+        now = time.time()
+        due = []
+        for plot in self._current_plots():
+            local_now = now_utc.astimezone(plot_timezone(plot))
+            local_date = local_now.date()
+            midnight = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+            if local_now < midnight + slot_offset(plot["id"]):
+                continue
+            with self.lock:
+                if self.done.get(plot["id"]) == local_date or plot["id"] in self.running:
+                    continue
+                if self.retry_at.get(plot["id"], 0) > now:
+                    continue
+            due.append((plot, local_date))
+        return due
+
+    def tick(self, now_utc=None):
+        for plot, local_date in self.due(now_utc):
+            with self.lock:
+                self.running.add(plot["id"])
+            self.executor.submit(self._run, plot, local_date)
+
+    def _run(self, plot, local_date):
+        start = time.perf_counter()
+        try:
+            outcome = self.refresh_plot(plot, local_date)
+            with self.lock:
+                self.stats[outcome] = self.stats.get(outcome, 0) + 1
+                self.done[plot["id"]] = local_date
+                self.retry_at.pop(plot["id"], None)
+        except Exception as e:
+            with self.lock:
+                self.stats["failed"] += 1
+                self.retry_at[plot["id"]] = time.time() + RETRY_AFTER
+            print(f"⚠️ Nightly refresh failed for plot {plot.get('id')}: {e}")
+        finally:
+            with self.lock:
+                self.running.discard(plot["id"])
+                self.durations = (self.durations + [time.perf_counter() - start])[-500:]
+
+    def snapshot(self):
+        now_utc = datetime.now(tz.UTC)
+        with self.lock:
+            plots = list(self.plots)
+            done_today = sum(
+                1 for p in plots if self.done.get(p["id"]) == now_utc.astimezone(plot_timezone(p)).date()
+            )
+            durations = sorted(self.durations)
+            return {
+                "running": self.thread is not None,
+                "plots": len(plots),
+                "done_today": done_today,
+                "progress": round(done_today / len(plots), 3) if plots else None,
+                "in_progress": len(self.running),
+                "concurrency": self.concurrency,
+                **self.stats,
+                "refresh_s": {
+                    "count": len(durations),
+                    "p50": round(durations[len(durations) // 2], 2) if durations else None,
+                    "max": round(durations[-1], 2) if durations else None
+                }
+            }
@@ -0,0 +1,262 @@
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from uuid import uuid4
+
+# Schedule version history stored as deltas. Every edit is a row in
+# schedule_changes holding a JSON Patch (RFC 6902) from the old schedule to the
+# new one plus both content hashes; full schedules are only written to
+# schedule_snapshots, keyed (and so deduplicated) by hash, when a chain of
+# patches starts. A chain starts on a plot's first edit, after KEYFRAME_EVERY
+# edits, or when the schedule changed outside the history (regeneration,
+# incremental recompute) since the last edit. Any version is its chain's
+# snapshot plus at most KEYFRAME_EVERY patches. A revert is stored as an edit
+# too, with "undoes" naming the version it took back, so repeated reverts keep
+# walking back instead of redoing the edit they just undid.
+
+KEYFRAME_EVERY = 20
+CACHE_SIZE = 512  # reconstructed schedules and known hashes kept in process
+VERSION_RETRIES = 5  # (plot_id, version) is unique; a concurrent edit that took ours means retry
+
+
+def schedule_hash(schedule):
+    """Content hash of a schedule (key order and whitespace don't matter)."""
+    canonical = json.dumps(schedule, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _escape(key):
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token):
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(old, new, path=""):
+    """JSON Patch ops turning old into new (add/remove/replace only)."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [{"op": "remove", "path": f"{path}/{_escape(k)}"} for k in old if k not in new]
+        for k, value in new.items():
+            if k not in old:
+                ops.append({"op": "add", "path": f"{path}/{_escape(k)}", "value": value})
+            else:
+                ops.extend(make_patch(old[k], value, f"{path}/{_escape(k)}"))
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        for i in range(min(len(old), len(new))):
+            ops.extend(make_patch(old[i], new[i], f"{path}/{i}"))
+        ops.extend({"op": "add", "path": f"{path}/{i}", "value": new[i]} for i in range(len(old), len(new)))
+        ops.extend({"op": "remove", "path": f"{path}/{i}"} for i in range(len(old) - 1, len(new) - 1, -1))
+        return ops
+    # 1 == 1.0 == True in Python, but they are different JSON
+    if type(old) is type(new) and old == new:
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(doc, patch, in_place=False):
+    """Document with the patch applied; doc is left untouched unless in_place."""
+    if not in_place:
+        doc = copy.deepcopy(doc)
+    for op in patch:
+        tokens = [_unescape(t) for t in op["path"].split("/")[1:]]
+        if not tokens:
+            doc = copy.deepcopy(op.get("value"))
+            continue
+        parent = doc
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            index = len(parent) if last == "-" else int(last)
+            if op["op"] == "add":
+                parent.insert(index, copy.deepcopy(op["value"]))
+            elif op["op"] == "remove":
+                del parent[index]
+            else:
+                parent[index] = copy.deepcopy(op["value"])
+        elif op["op"] == "remove":
+            del parent[last]
+        else:
+            parent[last] = copy.deepcopy(op["value"])
+    return doc
+
+
+def _is_duplicate(error):
+    """Unique-constraint violation from Postgres/PostgREST (SQLSTATE 23505)."""
+    text = f"{getattr(error, 'code', '')} {error}"
+    return "23505" in text or "duplicate key" in text
+
+
+def _size(value):
+    return len(json.dumps(value, separators=(",", ":")))
+
+
+class ScheduleHistory:
+    """Versioned schedules for every plot in schedule_changes / schedule_snapshots."""
+
+    def __init__(self, client, keyframe_every=KEYFRAME_EVERY):
+        self.client = client
+        self.keyframe_every = keyframe_every
+        self.lock = threading.Lock()
+        self.schedules = OrderedDict()  # hash -> schedule
+        self.snapshot_hashes = OrderedDict()  # hashes stored as full snapshots (shared by all plots)
+        self.known = OrderedDict()            # (plot_id, hash) that can be rebuilt from a plot's changes
+        self.counters = {"changes": 0, "snapshots_written": 0, "bytes_written": 0, "bytes_as_snapshots": 0,
+                         "reconstructions": 0, "reconstruct_cache_hits": 0}
+
+    def _remember(self, cache, key, value=True):
+        with self.lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > CACHE_SIZE:
+                cache.popitem(last=False)
+
+    def _count(self, **amounts):
+        with self.lock:
+            for k, v in amounts.items():
+                self.counters[k] += v
+
+    def _head(self, plot_id, before=None):
+        """Latest change row (below version before, when given), or None."""
+        query = self.client.table("schedule_changes") \
+            .select("version, chain_start, base_hash, parent_hash, new_hash, undoes") \
+            .eq("plot_id", plot_id)
+        if before is not None:
+            query = query.lt("version", before)
+        res = query.order("version", desc=True).limit(1).execute()
+        return res.data[0] if res.data else None
+
+    def _store_snapshot(self, digest, schedule):
+        """Write a snapshot unless one with this hash already exists."""
+        if digest in self.snapshot_hashes:
+            return
+        exists = self.client.table("schedule_snapshots").select("hash").eq("hash", digest).limit(1).execute()
+        if not exists.data:
+            try:
+                self.client.table("schedule_snapshots").insert({
+                    "hash": digest,
+                    "schedule": schedule,
+                    "created_at": datetime.utcnow().isoformat()
+                }).execute()
+                self._count(snapshots_written=1, bytes_written=_size(schedule))
+            except Exception as e:
+                # Another worker wrote the same content first
+                print(f"⚠️ Snapshot {digest[:12]} not written: {e}")
+        self._remember(self.snapshot_hashes, digest)
+
+    def record(self, plot_id, old, new, reason="", undoes=None):
+        """Store the edit old -> new; returns the change row, or None when nothing changed.
+
+        undoes is the version a revert took back (a revert is recorded even
+        when the schedule already matched, so the next one goes further back).
+        """
+        patch = make_patch(old or [], new or [])
+        if not patch and undoes is None:
+            return None
+        old_hash, new_hash = schedule_hash(old or []), schedule_hash(new or [])
+        for attempt in range(VERSION_RETRIES):
+            head = self._head(plot_id)
+            version = head["version"] + 1 if head else 1
+            if head and head["new_hash"] == old_hash and version - head["chain_start"] < self.keyframe_every:
+                base_hash, chain_start = head["base_hash"], head["chain_start"]
+            else:
+                self._store_snapshot(old_hash, old or [])
+                base_hash, chain_start = old_hash, version
+            row = {
+                "id": str(uuid4()),
+                "plot_id": plot_id,
+                "timestamp": datetime.utcnow().isoformat(),
+                "version": version,
+                "chain_start": chain_start,
+                "base_hash": base_hash,
+                "parent_hash": old_hash,
+                "new_hash": new_hash,
+                "patch": patch,
+                "reason": reason,
+                "undoes": undoes
+            }
+            try:
+                self.client.table("schedule_changes").insert(row).execute()
+                break
+            except Exception as e:
+                if not _is_duplicate(e) or attempt == VERSION_RETRIES - 1:
+                    raise
+                print(f"🔁 Version {version} for plot {plot_id} taken by a concurrent edit, retrying")
+        self._count(changes=1, bytes_written=_size(patch), bytes_as_snapshots=_size(old or []) + _size(new or []))
+        self._remember(self.known, (plot_id, new_hash))
+        self._remember(self.schedules, old_hash, copy.deepcopy(old or []))
+        self._remember(self.schedules, new_hash, copy.deepcopy(new or []))
+        return row
+
+    def remember(self, plot_id, schedule):
+        """Hash of schedule, making sure load() can rebuild it; writes a snapshot only for unseen content."""
+        digest = schedule_hash(schedule or [])
+        if digest in self.snapshot_hashes or (plot_id, digest) in self.known:
+            return digest
+        as_change = self.client.table("schedule_changes").select("version") \
+            .eq("plot_id", plot_id).eq("new_hash", digest).limit(1).execute()
+        if as_change.data:
+            self._remember(self.known, (plot_id, digest))
+        else:
+            self._store_snapshot(digest, schedule or [])
+        return digest
+
+    def load(self, plot_id, digest):
+        """The schedule with this hash, or None when the history doesn't have it."""
+        with self.lock:
+            cached = self.schedules.get(digest)
+        if cached is not None:
+            self._count(reconstruct_cache_hits=1)
+            return copy.deepcopy(cached)
+
+        snap = self.client.table("schedule_snapshots").select("schedule").eq("hash", digest).limit(1).execute()
+        if snap.data:
+            schedule = snap.data[0]["schedule"]
+        else:
+            target = self.client.table("schedule_changes").select("version, chain_start, base_hash") \
+                .eq("plot_id", plot_id).eq("new_hash", digest).order("version", desc=True).limit(1).execute()
+            if not target.data:
+                return None
+            target = target.data[0]
+            base = self.client.table("schedule_snapshots").select("schedule") \
+                .eq("hash", target["base_hash"]).limit(1).execute()
+            if not base.data:
+                print(f"⚠️ Missing base snapshot {target['base_hash'][:12]} for plot {plot_id}")
+                return None
+            chain = self.client.table("schedule_changes").select("version, patch").eq("plot_id", plot_id) \
+                .gte("version", target["chain_start"]).lte("version", target["version"]).order("version").execute()
+            schedule = copy.deepcopy(base.data[0]["schedule"])
+            for change in chain.data or []:
+                schedule = apply_patch(schedule, change["patch"], in_place=True)
+            if schedule_hash(schedule) != digest:
+                print(f"⚠️ Rebuilt schedule for plot {plot_id} doesn't match {digest[:12]}")
+                return None
+        self._count(reconstructions=1)
+        self._remember(self.schedules, digest, schedule)
+        return copy.deepcopy(schedule)
+
+    def undo_target(self, plot_id):
+        """The latest edit that hasn't been reverted yet (never a revert itself), or None."""
+        change = self._head(plot_id)
+        while change and change.get("undoes") is not None:
+            change = self._head(plot_id, before=change["undoes"])
+        return change
+
+    def previous(self, plot_id):
+        """The schedule before the plot's latest unreverted edit, or None."""
+        target = self.undo_target(plot_id)
+        return self.load(plot_id, target["parent_hash"]) if target else None
+
+    def snapshot(self):
+        with self.lock:
+            out = dict(self.counters)
+        # Bytes written against storing full old + new copies for every edit
+        out["bytes_ratio"] = round(out["bytes_written"] / out["bytes_as_snapshots"], 3) \
+            if out["bytes_as_snapshots"] else None
+        return out
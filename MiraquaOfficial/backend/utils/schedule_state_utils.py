@@ -0,0 +1,215 @@
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from utils.et0_utils import forecast_et0
+from utils.kc_utils import plot_kc
+from utils.schedule_utils import liters_to_mm, mm_to_liters
+from utils.water_balance_utils import RAIN_EFFICIENCY, irrigation_by_day, plot_water_balance, root_zone, simulate
+from utils.window_utils import FALLBACK_HOUR, best_windows, grid_from_timeline, window_label
+
+# Per-day schedule state, so a change only recomputes the days it affects.
+# Each stored day keeps its inputs (ET, rain, logged watering, best hour), the
+# root-zone depletion at its start and end, and the decision (planned mm).
+# Days are chained through depletion: a day is recomputed when its own inputs
+# changed or it now starts from a different depletion; otherwise the stored day
+# (and its schedule entry, usually from the LLM) is kept as is. A forecast
+# update for days 4-7 therefore touches days 4-7 only, and a watering log for
+# today stops at the first day whose depletion is back where it was. Days the
+# user edited (manual or chat) are pinned: they keep the user's liters and only
+# carry depletion forward. So do days past the end of the forecast, whose
+# inputs are only an extrapolation: their schedule entry is never rewritten.
+
+INPUT_KEYS = ("et0", "etc", "rain_mm", "logged_mm", "best_hour")
+CONVERGED_MM = 0.05  # depletion difference below which a day counts as unchanged
+# Plot settings that feed the schedule; edits to anything else keep it as is
+SCHEDULE_FIELDS = {"crop", "area", "planting_date", "age_at_entry", "lat", "lon", "zip_code", "soil_type", "flex_type",
+                   "horizon_days", "kc_curve", "zones"}
+
+
+def day_inputs(plot, daily, hourly, logs, age_months, days=7, today=None):
+    """Inputs for each of the next days days, or [] without a forecast.
+
+    Days past the end of the forecast reuse its last ET₀, with no rain and the
+    fallback watering hour, and are marked "forecast": False.
+    """
+    today = today or datetime.utcnow().date()
+    et0_by_date = {row["date"]: row["et0_pm"] for row in forecast_et0(daily, hourly, plot.get("lat"))}
+    if not et0_by_date:
+        return []
+    dates = [(today + timedelta(days=i)).isoformat() for i in range(days)]
+    last_et0 = list(et0_by_date.values())[-1]
+    rain_by_date = {d.get("date"): float(d.get("precipitation") or 0) for d in daily or []}
+    kc = plot_kc(plot, float(age_months or 0) + np.arange(days) / 30.44)
+    logged = irrigation_by_day(logs, dates, plot.get("area"))
+    hours = best_windows(grid_from_timeline([hourly or []], days=days))["start_hour"][0]
+
+    inputs = []
+    for i, date in enumerate(dates):
+        et0 = et0_by_date.get(date, last_et0)
+        inputs.append({
+            "date": date,
+            "et0": round(float(et0), 2),
+            "etc": round(float(kc[i] * et0), 2),
+            "rain_mm": round(rain_by_date.get(date, 0.0), 1),
+            "logged_mm": round(float(logged[i]), 1),
+            "best_hour": int(hours[i]) if hours[i] >= 0 else FALLBACK_HOUR,
+            "forecast": date in et0_by_date
+        })
+    return inputs
+
+
+def _step(inputs, depletion_start, zone, planned_mm=None, pinned=False):
+    """One day of the balance; planned_mm None lets the engine decide (refill once past RAW)."""
+    if planned_mm is None:
+        projected = depletion_start + inputs["etc"] - RAIN_EFFICIENCY * inputs["rain_mm"] - inputs["logged_mm"]
+        planned_mm = round(projected, 1) if projected > zone["raw"] else 0.0
+    result = simulate([[inputs["etc"]]], [[inputs["rain_mm"]]], [[inputs["logged_mm"] + planned_mm]],
+                      [zone["taw"]], [zone["raw"]], depletion0=depletion_start)
+    return {
+        **inputs,
+        "depletion_start": round(float(depletion_start), 2),
+        "depletion_end": round(float(result["depletion"][0, 0]), 2),
+        "planned_mm": float(planned_mm),
+        "decision": "water" if planned_mm > 0 else "skip",
+        "pinned": pinned
+    }
+
+
+def plot_zone(plot):
+    zone = root_zone([plot.get("crop", "default")], [plot.get("soil_type")])
+    return {"taw": float(zone["taw"][0]), "raw": float(zone["raw"][0])}
+
+
+def seed_state(plot, schedule, inputs, daily, logs, age_months):
+    """State mirroring an existing schedule: each day's planned mm is its liters over the area."""
+    if not inputs:
+        return None
+    zone = plot_zone(plot)
+    area = max(float(plot.get("area") or 1.0), 1e-6)
+    balance = plot_water_balance(plot, daily, logs, [{"date": d["date"], "et0_pm": d["et0"]} for d in inputs],
+                                 age_months, today=datetime.fromisoformat(inputs[0]["date"]).date())
+    depletion = balance["today"]["depletion_mm"] if balance else zone["raw"] / 2
+    days = []
+    for i, inp in enumerate(inputs):
+        liters = float((schedule[i] if i < len(schedule or []) else {}).get("liters") or 0)
+        day = _step(inp, depletion, zone, planned_mm=round(liters_to_mm(liters, area), 2))
+        days.append(day)
+        depletion = day["depletion_end"]
+    return {"zone": zone, "area": area, "days": days}
+
+
+def recompute(state, inputs):
+    """Recompute only the affected days of a stored state against fresh inputs.
+
+    Returns (new_state, recomputed day indexes), or (None, None) when the
+    state can't be reused (no state, no inputs, or a new day has started).
+    """
+    if not state or not inputs or not state.get("days") or state["days"][0]["date"] != inputs[0]["date"]:
+        return None, None
+    zone = state["zone"]
+    stored = {d["date"]: d for d in state["days"]}
+    depletion = state["days"][0]["depletion_start"]
+    days, recomputed = [], []
+    for i, inp in enumerate(inputs):
+        prev = stored.get(inp["date"])
+        unchanged = prev is not None and all(prev[k] == inp[k] for k in INPUT_KEYS) \
+            and abs(prev["depletion_start"] - depletion) <= CONVERGED_MM
+        if unchanged:
+            day = prev
+        elif prev is not None and (prev.get("pinned") or not inp.get("forecast", True)):
+            # The user's (or, past the forecast, the LLM's) liters stand; only the depletion they lead to changes
+            day = _step(inp, depletion, zone, planned_mm=prev["planned_mm"], pinned=prev.get("pinned", False))
+        else:
+            day = _step(inp, depletion, zone)
+            recomputed.append(i)
+        days.append(day)
+        depletion = day["depletion_end"]
+    return {**state, "days": days}, recomputed
+
+
+def pin_edits(state, old_schedule, new_schedule):
+    """State after a user edit: days whose entry changed are pinned to the new liters.
+
+    Depletion is re-chained through the edited schedule so later days start
+    from what the user's watering leaves. Returns None without a usable state
+    (the next update seeds a fresh one).
+    """
+    if not state or not state.get("days"):
+        return None
+    zone, area = state["zone"], state["area"]
+    depletion = state["days"][0]["depletion_start"]
+    days = []
+    for i, prev in enumerate(state["days"]):
+        new = new_schedule[i] if i < len(new_schedule or []) else None
+        old = old_schedule[i] if i < len(old_schedule or []) else None
+        pinned = prev.get("pinned", False)
+        planned = prev["planned_mm"]
+        if new is not None and new != old:
+            pinned, planned = True, round(liters_to_mm(float(new.get("liters") or 0), area), 2)
+        day = _step({k: prev[k] for k in ("date",) + INPUT_KEYS}, depletion, zone, planned_mm=planned, pinned=pinned)
+        days.append(day)
+        depletion = day["depletion_end"]
+    return {**state, "days": days}
+
+
+def apply_to_schedule(schedule, state, recomputed):
+    """Copy of schedule with the recomputed days replaced by the engine's decision."""
+    schedule = [dict(day) for day in schedule or []]
+    raw = state["zone"]["raw"]
+    for i in recomputed:
+        if i >= len(schedule):
+            continue
+        day = state["days"][i]
+        if day["decision"] == "water":
+            schedule[i]["liters"] = round(mm_to_liters(day["planned_mm"], state["area"]), 2)
+            schedule[i]["optimal_time"] = window_label(day["best_hour"])
+            schedule[i]["explanation"] = (f"Root zone would be {day['planned_mm']:.0f} mm dry, past the "
+                                          f"{raw:.0f} mm the crop can use without stress; refilled.")
+        else:
+            schedule[i]["liters"] = 0.0
+            schedule[i]["optimal_time"] = "Skipped"
+            schedule[i]["explanation"] = ("Already watered today." if day["logged_mm"] > 0 else
+                                          f"Soil still within the {raw:.0f} mm the crop can use without stress.")
+    return schedule
+
+
+class RecomputeMetrics:
+    """Days recomputed per schedule update, full (LLM) regenerations against incremental ones."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.kinds = {}  # "full" / "incremental" -> counters
+
+    def record(self, kind, trigger, recomputed, total, seconds):
+        with self.lock:
+            k = self.kinds.setdefault(kind, {"count": 0, "days_recomputed": 0, "days_total": 0,
+                                             "seconds": [], "by_trigger": {}})
+            k["count"] += 1
+            k["days_recomputed"] += recomputed
+            k["days_total"] += total
+            k["seconds"] = (k["seconds"] + [seconds])[-500:]
+            k["by_trigger"][trigger] = k["by_trigger"].get(trigger, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            out = {}
+            for kind, k in self.kinds.items():
+                seconds = sorted(k["seconds"])
+                out[kind] = {
+                    "count": k["count"],
+                    "days_recomputed": k["days_recomputed"],
+                    "days_reused": k["days_total"] - k["days_recomputed"],
+                    "recomputed_share": round(k["days_recomputed"] / k["days_total"], 3) if k["days_total"] else None,
+                    "p50_ms": round(seconds[len(seconds) // 2] * 1000, 2) if seconds else None,
+                    "by_trigger": dict(k["by_trigger"])
+                }
+            full, inc = out.get("full"), out.get("incremental")
+            if full and inc and full["p50_ms"] and inc["p50_ms"]:
+                # What one update costs each way
+                out["incremental_speedup"] = round(full["p50_ms"] / inc["p50_ms"], 1)
+            return out
+
+
+recompute_metrics = RecomputeMetrics()
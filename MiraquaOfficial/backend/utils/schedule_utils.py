@@ -1,8 +1,54 @@
 import os
 import json
+import re
 
 SCHEDULES_FILE = "plot_schedules.json"
 
+# Planning horizon: how many days a schedule covers (per plot via plots.horizon_days)
+DEFAULT_HORIZON_DAYS = int(os.getenv("PLAN_HORIZON_DAYS", "7"))
+MAX_HORIZON_DAYS = 16
+
+# Plot areas are m², and 1 mm of water over 1 m² is 1 liter. Every liters <-> mm
+# conversion (water balance, day state, zones, the schedule prompt) goes through these.
+LITERS_PER_MM_M2 = 1.0
+# The legacy moisture-threshold scheduler (calculate_schedule / fleet_utils) puts back
+# a tenth of the soil-moisture deficit per day, before its Kc and ET₀ scaling
+LEGACY_REFILL_SHARE = 0.1
+
+DEFAULT_TIME = "06:00 AM"
+TIME_RE = re.compile(r"^(\d{1,2})(?::(\d{2}))?\s*([ap])?\.?\s*m?\.?$")
+
+def horizon_days(value=None):
+    """A requested horizon (or the default) clamped to 1..MAX_HORIZON_DAYS."""
+    try:
+        days = int(value) if value not in (None, "") else DEFAULT_HORIZON_DAYS
+    except (TypeError, ValueError):
+        days = DEFAULT_HORIZON_DAYS
+    return max(1, min(days, MAX_HORIZON_DAYS))
+
+def normalize_time(value):
+    """Return value as "HH:MM AM/PM", or None if it isn't a recognisable time."""
+    if not isinstance(value, str):
+        return None
+    raw = value.strip().lower()
+    if raw == "skipped":
+        return "Skipped"
+    match = TIME_RE.match(raw)
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if minute > 59 or hour > 23 or (meridiem and not 1 <= hour <= 12):
+        return None
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem == "p" else 0)
+    return f"{hour % 12 or 12:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+def mm_to_liters(mm, area):
+    return mm * area * LITERS_PER_MM_M2
+
+def liters_to_mm(liters, area):
+    return liters / (area * LITERS_PER_MM_M2)
+
 def save_schedule(plot_id, schedule):
     try:
         if os.path.exists(SCHEDULES_FILE):
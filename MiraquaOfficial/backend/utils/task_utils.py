@@ -0,0 +1,91 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# In-process background work, deduplicated by key: while a task for a key is
+# queued or running, submitting the same key again returns the existing
+# future instead of starting a second copy. run_shared does the same for work
+# done on the request thread: later callers wait for the running call's result.
+
+BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", "4"))
+# Longest a caller waits on someone else's run_shared call (seconds)
+SHARED_WAIT_TIMEOUT = float(os.getenv("SHARED_WAIT_TIMEOUT", "180"))
+
+_executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="miraqua-bg")
+_inflight = {}
+_shared = {}
+_lock = threading.Lock()
+_stats = {"submitted": 0, "deduplicated": 0, "failed": 0, "shared_runs": 0, "shared_joins": 0}
+
+
+def _run(key, fn, args, kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except Exception as e:
+        _stats["failed"] += 1
+        print(f"⚠️ Background task {key} failed: {e}")
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+
+def submit_unique(key, fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) in the background unless key is already in flight.
+
+    Returns (future, started): started is False when an existing task was reused.
+    """
+    with _lock:
+        future = _inflight.get(key)
+        if future is not None:
+            _stats["deduplicated"] += 1
+            return future, False
+        future = _executor.submit(_run, key, fn, args, kwargs)
+        _inflight[key] = future
+        _stats["submitted"] += 1
+        return future, True
+
+
+def run_shared(key, fn, *args, **kwargs):
+    """Call fn(*args, **kwargs) here, unless a call for key is already running.
+
+    In that case wait for it and return its result (or raise its exception)
+    instead of starting another. Returns (result, joined): joined is True when
+    the result came from someone else's call.
+    """
+    with _lock:
+        future = _shared.get(key)
+        joined = future is not None
+        if joined:
+            _stats["shared_joins"] += 1
+        else:
+            future = _shared[key] = Future()
+            _stats["shared_runs"] += 1
+    if joined:
+        return future.result(timeout=SHARED_WAIT_TIMEOUT), True
+
+    try:
+        result = fn(*args, **kwargs)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+    finally:
+        with _lock:
+            _shared.pop(key, None)
+    return result, False
+
+
+def is_inflight(key):
+    with _lock:
+        return key in _inflight or key in _shared
+
+
+def snapshot():
+    with _lock:
+        kinds = {}
+        for key in list(_inflight) + list(_shared):
+            kind = key[0] if isinstance(key, tuple) else str(key)
+            kinds[kind] = kinds.get(kind, 0) + 1
+        return {"workers": BACKGROUND_WORKERS, "inflight": kinds, **_stats}
@@ -0,0 +1,184 @@
+import os
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+from utils.fleet_utils import CROPS, crop_codes
+from utils.kc_utils import plot_kc
+from utils.schedule_utils import liters_to_mm
+
+# Daily root-zone water balance (FAO-56 chapter 8). The root zone is a bucket
+# holding TAW mm between field capacity and wilting point; depletion Dr grows
+# with crop ET and shrinks with rain and irrigation, and water beyond field
+# capacity drains as deep percolation. Once Dr passes RAW the crop is water
+# stressed and ET is reduced by Ks. The loop runs over days; every step is
+# vectorized over plots, so a season for a whole fleet is a few hundred NumPy
+# calls.
+
+# θFC, θWP (m³/m³): mid-range values from FAO-56 Table 19
+SOILS = {
+    "sand": (0.12, 0.045),
+    "loamy sand": (0.15, 0.065),
+    "sandy loam": (0.23, 0.11),
+    "loam": (0.25, 0.12),
+    "silt loam": (0.29, 0.15),
+    "silt": (0.32, 0.17),
+    "silty clay loam": (0.335, 0.205),
+    "silty clay": (0.36, 0.23),
+    "clay": (0.36, 0.22)
+}
+SOIL_ALIASES = {"sandy": "sand", "loamy": "loam", "silty": "silt", "clayey": "clay"}
+DEFAULT_SOIL = "loam"
+SOIL_NAMES = list(SOILS)
+SOIL_INDEX = {name: i for i, name in enumerate(SOIL_NAMES)}
+SOIL_TABLE = np.array([SOILS[s] for s in SOIL_NAMES])
+
+# Max effective rooting depth Zr (m) and depletion fraction p: FAO-56 Table 22
+ROOTING = {
+    "tomato": (1.0, 0.40),
+    "corn": (1.2, 0.55),
+    "wheat": (1.5, 0.55),
+    "alfalfa": (1.5, 0.55),
+    "lettuce": (0.4, 0.30),
+    "almond": (1.4, 0.40),
+    "grass": (0.75, 0.50),
+    "default": (0.6, 0.50)
+}
+ROOTING_TABLE = np.array([ROOTING[c] for c in CROPS])  # rows follow fleet_utils crop codes
+DEFAULT_ROOTING = CROPS.index("default")  # for crops added to kc_utils.kc_table at runtime
+
+RAIN_EFFICIENCY = 0.8  # share of rainfall that reaches the root zone
+FLOW_RATE_LPM = float(os.getenv("WATER_FLOW_RATE_LPM", "10"))  # converts watering_log minutes to liters
+LOOKBACK_DAYS = 14
+
+
+@lru_cache(maxsize=1024)
+def _soil_code(soil):
+    name = str(soil or "").strip().lower().replace("_", " ")
+    return SOIL_INDEX.get(SOIL_ALIASES.get(name, name), SOIL_INDEX[DEFAULT_SOIL])
+
+
+def soil_codes(soils):
+    """Soil type names -> row indices into SOIL_TABLE (unknown or missing soils use loam)."""
+    return np.array([_soil_code(s) for s in soils], dtype=np.int64)
+
+
+def root_zone(crops, soils):
+    """Per-plot bucket size: {"fc", "wp", "zr", "taw", "raw"} (TAW/RAW in mm, FAO-56 eqs 82-83)."""
+    crops = np.asarray(crops) if np.issubdtype(np.asarray(crops).dtype, np.integer) else crop_codes(crops)
+    soils = np.asarray(soils) if np.issubdtype(np.asarray(soils).dtype, np.integer) else soil_codes(soils)
+    fc, wp = SOIL_TABLE[soils, 0], SOIL_TABLE[soils, 1]
+    crops = np.where(crops < len(ROOTING_TABLE), crops, DEFAULT_ROOTING)
+    zr, p = ROOTING_TABLE[crops, 0], ROOTING_TABLE[crops, 1]
+    taw = 1000 * (fc - wp) * zr
+    return {"fc": fc, "wp": wp, "zr": zr, "taw": taw, "raw": p * taw}
+
+
+def simulate(etc, rain, irrigation, taw, raw, depletion0=None, auto_irrigate=False):
+    """Run the daily bucket for many plots.
+
+    etc (crop ET without stress), rain and irrigation are mm/day of shape
+    (plots, days) or anything that broadcasts to it; taw/raw are per plot.
+    depletion0 is the depletion at the start of day 0 (RAW/2 when unknown).
+    With auto_irrigate, any day that starts with Dr > RAW is refilled to
+    field capacity on top of the given irrigation.
+
+    Returns (plots, days) arrays: "depletion" at the end of each day, "ks",
+    "eta" (actual ET), "irrigation" applied and "deep_percolation".
+    """
+    taw = np.asarray(taw, dtype=float)
+    raw = np.asarray(raw, dtype=float)
+    shape = np.broadcast_shapes(np.shape(etc), np.shape(rain), np.shape(irrigation), taw.shape + (1,))
+    etc, rain, irrigation = (np.broadcast_to(np.asarray(a, dtype=float), shape) for a in (etc, rain, irrigation))
+    dr = (raw / 2 if depletion0 is None else np.asarray(depletion0, dtype=float)) * np.ones(shape[0])
+
+    out = {k: np.zeros(shape) for k in ("depletion", "ks", "eta", "irrigation", "deep_percolation")}
+    stress_span = np.maximum(taw - raw, 1e-9)
+    for d in range(shape[1]):
+        applied = irrigation[:, d]
+        if auto_irrigate:
+            applied = applied + np.where(dr > raw, dr, 0.0)
+        # Water stress coefficient from the depletion at the start of the day (eq 84)
+        ks = np.where(dr > raw, np.clip((taw - dr) / stress_span, 0.0, 1.0), 1.0)
+        eta = ks * etc[:, d]
+        dr = dr - RAIN_EFFICIENCY * rain[:, d] - applied + eta
+        dp = np.maximum(-dr, 0.0)  # above field capacity drains below the roots (eq 88)
+        dr = np.minimum(np.maximum(dr, 0.0), taw)
+        out["depletion"][:, d] = dr
+        out["ks"][:, d] = ks
+        out["eta"][:, d] = eta
+        out["irrigation"][:, d] = applied
+        out["deep_percolation"][:, d] = dp
+    return out
+
+
+def soil_moisture(depletion, fc, zr):
+    """Volumetric root-zone moisture θ (m³/m³) for a depletion in mm."""
+    return np.asarray(fc) - np.asarray(depletion) / (1000 * np.asarray(zr))
+
+
+def irrigation_by_day(logs, dates, area, flow_rate_lpm=FLOW_RATE_LPM):
+    """mm of irrigation per date from watering_log rows (liters, or duration_minutes × flow rate)."""
+    index = {d: i for i, d in enumerate(dates)}
+    mm = np.zeros(len(dates))
+    area = max(float(area or 1.0), 1e-6)
+    for log in logs or []:
+        i = index.get(str(log.get("watered_at") or "")[:10])
+        if i is None:
+            continue
+        liters = log.get("liters")
+        if liters is None:
+            liters = float(log.get("duration_minutes") or 0) * flow_rate_lpm
+        mm[i] += liters_to_mm(float(liters), area)
+    return mm
+
+
+def plot_water_balance(plot, daily, logs, et0_table, age_months, today=None):
+    """Water balance for one plot from LOOKBACK_DAYS ago through the forecast.
+
+    et0_table is et0_utils.forecast_et0() output. There is no weather history,
+    so lookback days reuse the first forecast day's ET₀ with no rain; their
+    role is to carry the recent watering_log into today's depletion. Forecast
+    days get no irrigation, so they show when the root zone would pass RAW.
+    Returns {"taw_mm", "raw_mm", "today", "days"} or None without ET₀.
+    """
+    if not et0_table:
+        return None
+    today = today or datetime.utcnow().date()
+    past = [(today - timedelta(days=n)).isoformat() for n in range(LOOKBACK_DAYS, 0, -1)]
+    forecast_dates = [row["date"] for row in et0_table]
+    dates = past + forecast_dates
+    et0 = np.array([et0_table[0]["et0_pm"]] * len(past) + [row["et0_pm"] for row in et0_table])
+    rain_by_date = {d.get("date"): float(d.get("precipitation") or 0) for d in daily or []}
+    rain = np.array([0.0] * len(past) + [rain_by_date.get(d, 0.0) for d in forecast_dates])
+
+    zone = root_zone([plot.get("crop", "default")], [plot.get("soil_type")])
+    ages = float(age_months or 0) + (np.arange(len(dates)) - len(past)) / 30.44
+    kc = plot_kc(plot, np.maximum(ages, 0))
+    result = simulate((kc * et0)[None, :], rain[None, :], irrigation_by_day(logs, dates, plot.get("area"))[None, :],
+                      zone["taw"], zone["raw"])
+
+    taw, raw = float(zone["taw"][0]), float(zone["raw"][0])
+    depletion = result["depletion"][0]
+    moisture = soil_moisture(depletion, zone["fc"][0], zone["zr"][0])
+    days = [{
+        "date": date,
+        "et0": round(float(et0[i]), 2),
+        "etc": round(float(kc[i] * et0[i]), 2),
+        "rain_mm": round(float(rain[i]), 1),
+        "depletion_mm": round(float(depletion[i]), 1),
+        "moisture": round(float(moisture[i]), 3),
+        "needs_water": bool(depletion[i] > raw)
+    } for i, date in enumerate(dates) if i >= len(past)]
+    # Start of today = end of yesterday's balance
+    start = len(past) - 1
+    return {
+        "taw_mm": round(taw, 1),
+        "raw_mm": round(raw, 1),
+        "today": {
+            "depletion_mm": round(float(depletion[start]), 1),
+            "moisture": round(float(moisture[start]), 3)
+        },
+        "days": days
+    }
@@ -0,0 +1,201 @@
+from datetime import datetime
+
+import numpy as np
+
+# Array version of forecast_utils.find_optimal_time. A forecast is laid out on
+# a local-hour grid of shape (cells, days, 24) and every hour of every day is
+# scored in one pass; the best window of any length is then found per day with
+# a running sum, for all cells (and the plots that point at them) at once.
+
+DEFAULT_WEIGHTS = {"temp": 0.4, "wind": 0.3, "sunlight": 0.2}  # lower score = better hour
+MAX_POP = 0.2          # hours with a higher chance of rain are excluded
+MIN_TEMP = 34          # °F (get_forecast is imperial); colder hours risk frost on wet foliage and are excluded
+MORNING_HOURS = (4, 8)  # inclusive
+MORNING_FACTOR = 0.8
+FALLBACK_HOUR = 6
+
+HOUR_LABELS = [f"{h % 12 or 12:02d}:00 {'AM' if h < 12 else 'PM'}" for h in range(24)]
+
+
+def _local_offset(ts):
+    """Server-local UTC offset in seconds, matching datetime.fromtimestamp()."""
+    return int(datetime.fromtimestamp(ts).astimezone().utcoffset().total_seconds())
+
+
+def _fields(entry):
+    clouds = entry.get("clouds", 50)
+    return (
+        entry.get("main", {}).get("temp", 20),
+        entry.get("wind", {}).get("speed", 1.5),
+        clouds.get("all", 50) if isinstance(clouds, dict) else clouds,
+        entry.get("pop", 0)
+    )
+
+
+def _fill_grid(cell_idx, hour_idx, values, n_cells, days, hold):
+    """Scatter entries onto the (cells, days, 24) grid, each entry covering hold hours."""
+    shape = (n_cells, days * 24)
+    grid = {
+        "temp": np.full(shape, np.nan),
+        "wind": np.zeros(shape),
+        "clouds": np.zeros(shape),
+        "pop": np.zeros(shape),
+        "valid": np.zeros(shape, dtype=bool)
+    }
+    hold = np.broadcast_to(np.asarray(hold, dtype=np.int64), (n_cells,))
+    entry_hold = hold[cell_idx]
+    # Held copies first, furthest first, so real entries always win their own hour
+    for k in range(int(hold.max(initial=1)) - 1, -1, -1):
+        idx = hour_idx + k
+        keep = (idx >= 0) & (idx < days * 24) & (k < entry_hold)
+        for name, column in zip(("temp", "wind", "clouds", "pop"), values):
+            grid[name][cell_idx[keep], idx[keep]] = column[keep]
+        grid["valid"][cell_idx[keep], idx[keep]] = True
+    grid = {k: v.reshape(n_cells, days, 24) for k, v in grid.items()}
+    grid["hour"] = np.broadcast_to(np.arange(24), (n_cells, days, 24))
+    return grid
+
+
+def _flatten(cells, ts_default):
+    rows = [(c, e.get("dt"), *_fields(e)) for c, entries in enumerate(cells) for e in entries]
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0), [np.zeros(0)] * 4
+    cols = list(zip(*rows))
+    ts = np.array([t if t else ts_default for t in cols[1]], dtype=float)
+    return np.array(cols[0], dtype=np.int64), ts, [np.array(c, dtype=float) for c in cols[2:]]
+
+
+def grid_from_blocks(cells, days=7, hold_hours=1, tz_offset=None):
+    """Hour grid from per-day entry lists (calculate_schedule's hourly_blocks).
+
+    cells has one item per location cell, each a list of per-day lists of
+    OpenWeather hourly entries; the day comes from the list position and the
+    hour from the entry's timestamp (6 AM when missing). tz_offset is the UTC
+    offset in seconds, scalar or per cell; defaults to the server's, as
+    datetime.fromtimestamp() uses.
+    """
+    flat = [[(d, e) for d, day in enumerate(blocks[:days]) for e in day] for blocks in cells]
+    cell_idx, ts, values = _flatten([[e for _, e in entries] for entries in flat], 0)
+    day_idx = np.array([d for entries in flat for d, _ in entries], dtype=np.int64)
+    has_ts = ts > 0
+    if tz_offset is None:
+        tz_offset = _local_offset(ts[has_ts][0]) if has_ts.any() else 0
+    offset = np.broadcast_to(np.asarray(tz_offset, dtype=float), (len(cells),))[cell_idx]
+    hour = np.where(has_ts, (ts + offset) // 3600 % 24, FALLBACK_HOUR).astype(np.int64)
+    return _fill_grid(cell_idx, day_idx * 24 + hour, values, len(cells), days, hold_hours)
+
+
+def grid_from_timeline(cells, days=7, start=None, hold_hours=None, tz_offset=None):
+    """Hour grid from one chronological entry list per cell (e.g. get_forecast()["hourly"]).
+
+    Day 0 is the local date of start (unix seconds; each cell's first entry
+    when omitted). hold_hours is how many hours each entry stands for; by
+    default the cell's own spacing, so 3-hourly OpenWeather entries fill the
+    two hours after them as well.
+    """
+    cell_idx, ts, values = _flatten(cells, np.nan)
+    keep = ~np.isnan(ts)
+    cell_idx, ts, values = cell_idx[keep], ts[keep], [v[keep] for v in values]
+    n_cells = len(cells)
+    if tz_offset is None:
+        tz_offset = _local_offset(ts[0]) if len(ts) else 0
+    offset = np.broadcast_to(np.asarray(tz_offset, dtype=float), (n_cells,))
+    local_hours = ((ts + offset[cell_idx]) // 3600).astype(np.int64)
+
+    if start is None:
+        first = np.full(n_cells, np.iinfo(np.int64).max)
+        np.minimum.at(first, cell_idx, local_hours)
+        start_day = np.where(first < np.iinfo(np.int64).max, first // 24, 0)
+    else:
+        start_day = ((start + offset) // 86400).astype(np.int64)
+
+    if hold_hours is None:
+        hold_hours = np.ones(n_cells, dtype=np.int64)
+        for c in range(n_cells):
+            gaps = np.diff(np.sort(local_hours[cell_idx == c]))
+            if (gaps > 0).any():
+                hold_hours[c] = int(np.median(gaps[gaps > 0]))
+    return _fill_grid(cell_idx, local_hours - start_day[cell_idx] * 24, values, n_cells, days, hold_hours)
+
+
+def hour_scores(grid, weights=None, max_pop=MAX_POP, min_temp=MIN_TEMP,
+                morning_hours=MORNING_HOURS, morning_factor=MORNING_FACTOR):
+    """Score every slot (lower is better); excluded or empty slots are inf.
+
+    Works on any grid-shaped dict with temp, wind, clouds, pop, hour and valid
+    arrays, including fleet_utils.pack_hourly() output.
+    """
+    w = {**DEFAULT_WEIGHTS, **(weights or {})}
+    temp, hour = grid["temp"], grid["hour"]
+    score = temp * w["temp"] + grid["wind"] * w["wind"] + (100 - grid["clouds"]) * w["sunlight"]
+    morning = (hour >= morning_hours[0]) & (hour <= morning_hours[1])
+    score = np.where(morning, score * morning_factor, score)
+    # Rain and frost masks (NaN temps are empty slots and fail the comparison)
+    usable = grid["valid"] & (grid["pop"] <= max_pop) & (temp >= min_temp)
+    return np.where(usable, score, np.inf)
+
+
+def best_windows(grid, duration=1, scores=None, **score_opts):
+    """Best window of duration consecutive hours per (cell, day).
+
+    A window is ranked by its mean hourly score, must have every hour usable
+    and must end by midnight. Returns {"start_hour", "end_hour", "score"} of
+    shape (cells, days); start_hour is -1 and score inf where no window fits.
+    """
+    if scores is None:
+        scores = hour_scores(grid, **score_opts)
+    duration = int(duration)
+    if not 1 <= duration <= 24:
+        raise ValueError("duration must be between 1 and 24 hours")
+    if duration == 1:
+        mean = scores
+    else:
+        # Running sums over the hour axis; a window with any blocked hour is blocked
+        blocked = np.isinf(scores)
+        pad = [(0, 0)] * (scores.ndim - 1) + [(1, 0)]
+        total = np.pad(np.cumsum(np.where(blocked, 0.0, scores), axis=-1), pad)
+        bad = np.pad(np.cumsum(blocked, axis=-1), pad)
+        sums = total[..., duration:] - total[..., :-duration]
+        mean = np.where(bad[..., duration:] - bad[..., :-duration] > 0, np.inf, sums / duration)
+
+    start = mean.argmin(axis=-1)
+    best = np.take_along_axis(mean, start[..., None], axis=-1)[..., 0]
+    found = np.isfinite(best)
+    return {
+        "start_hour": np.where(found, start, -1),
+        "end_hour": np.where(found, start + duration, -1),
+        "score": best
+    }
+
+
+def plot_windows(grid, cells, durations, **score_opts):
+    """Best windows for many plots at once: plot i uses grid cell cells[i] and needs durations[i] hours.
+
+    Hours are scored once for the whole grid and each distinct duration is
+    searched once, then gathered per plot. Returns the best_windows() dict
+    with (plots, days) arrays.
+    """
+    cells = np.asarray(cells, dtype=np.int64)
+    durations = np.broadcast_to(np.clip(np.asarray(durations, dtype=np.int64), 1, 24), cells.shape)
+    scores = hour_scores(grid, **score_opts)
+    days = scores.shape[1]
+    out = {
+        "start_hour": np.full((len(cells), days), -1, dtype=np.int64),
+        "end_hour": np.full((len(cells), days), -1, dtype=np.int64),
+        "score": np.full((len(cells), days), np.inf)
+    }
+    for duration in np.unique(durations):
+        mask = durations == duration
+        found = best_windows(grid, duration, scores=scores)
+        for key in out:
+            out[key][mask] = found[key][cells[mask]]
+    return out
+
+
+def window_label(start_hour, end_hour=None):
+    """"06:00 AM", or "06:00 AM - 09:00 AM" for multi-hour windows; "Skipped" when none."""
+    if start_hour is None or start_hour < 0:
+        return "Skipped"
+    if end_hour is None or end_hour - start_hour <= 1:
+        return HOUR_LABELS[start_hour]
+    return f"{HOUR_LABELS[start_hour]} - {HOUR_LABELS[end_hour % 24]}"
@@ -0,0 +1,232 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+from utils.et0_utils import forecast_et0
+from utils.kc_utils import build_curve, kc_table, months_to_days
+from utils.schedule_utils import liters_to_mm, mm_to_liters
+from utils.water_balance_utils import FLOW_RATE_LPM, LOOKBACK_DAYS, root_zone, simulate
+from utils.window_utils import grid_from_timeline, hour_scores, window_label
+
+# Sub-plot irrigation zones. A plot may carry "zones", a list of
+# {"id", "name", "area", "soil_type", "crop", "kc_curve", "emitter_lpm"}; any
+# field a zone leaves out comes from the plot (areas split what the zones with
+# an area leave over); model_utils.validate_zones checks them on the way in.
+# What depends only on the plot's location (ET₀, rain, the hour scores) is
+# worked out once; each zone is then one row of the same vectorized water
+# balance and window search, so a farm of 1,000 zones costs about what a
+# single plot does.
+
+MAX_WINDOW_HOURS = 12
+DATE_FORMAT = "%m/%d/%y"
+# window_label() for every (start_hour, end_hour), so zone_rows can look labels up as arrays
+WINDOW_LABELS = np.array([[window_label(s, e) for e in range(25)] for s in range(24)], dtype=object)
+
+
+@lru_cache(maxsize=256)
+def _curve(stage_days, kc):
+    return build_curve(stage_days, kc)
+
+
+def zone_table(plot):
+    """The plot's zones as per-zone arrays (a plot without zones is one zone)."""
+    zones = plot.get("zones") or [{}]
+    plot_area = float(plot.get("area") or 0) or None
+    plot_crop = plot.get("crop") or "default"
+    plot_soil = plot.get("soil_type")
+    flow = float(plot.get("emitter_lpm") or FLOW_RATE_LPM)
+    ids, area, crops, soils, curves, emitters = [], [], [], [], [], []
+    # One pass over the zones; with a thousand of them this is most of the per-zone Python work
+    for i, z in enumerate(zones):
+        ids.append(z.get("id", i + 1))
+        area.append(float(z.get("area") or np.nan))
+        crop = z.get("crop")
+        crops.append(crop or plot_crop)
+        soils.append(z.get("soil_type") or plot_soil)
+        # The plot's own curve only applies to zones growing the plot's crop
+        curves.append(z.get("kc_curve") or (None if crop else plot.get("kc_curve")))
+        emitters.append(float(z.get("emitter_lpm") or flow))
+
+    area = np.array(area)
+    missing = np.isnan(area)
+    if missing.any():
+        left = (plot_area or 0) - np.nansum(area)
+        area[missing] = left / missing.sum() if left > 0 else (plot_area or 1.0) / len(zones)
+    if plot_area and area.sum() > plot_area:
+        # Zones never cover more than the plot (validation rejects it; older rows are scaled down)
+        area *= plot_area / area.sum()
+    return {
+        "ids": ids,
+        "zones": zones,
+        "area": area,
+        "crops": crops,
+        "codes": kc_table.codes(crops),
+        "soils": soils,
+        "curves": curves,
+        "emitter_lpm": np.array(emitters)
+    }
+
+
+def zone_kc(table, day_index):
+    """(zones, days) Kc at the given days since planting."""
+    kc = kc_table.lookup(table["codes"][:, None], day_index[None, :])
+    # Zones with their own curve, grouped so each distinct curve is looked up once
+    custom = {}
+    for i, curve in enumerate(table["curves"]):
+        if curve:
+            try:
+                key = (tuple(curve["stage_days"]), tuple(curve["kc"]))
+            except (KeyError, TypeError) as e:
+                print(f"⚠️ Ignoring invalid kc_curve for zone {table['ids'][i]}: {e}")
+                continue
+            custom.setdefault(key, []).append(i)
+    days = np.clip(day_index, 0, None)
+    for (stage_days, values), rows in custom.items():
+        try:
+            kc[rows] = _curve(stage_days, values)[days]
+        except ValueError as e:
+            print(f"⚠️ Ignoring invalid kc_curve for zones {rows[:5]}: {e}")
+    return kc
+
+
+def zone_irrigation(logs, dates, table):
+    """(zones, dates) mm applied from watering_log rows.
+
+    A log with a zone_id waters that zone (duration_minutes at its emitter
+    flow); one without waters the whole plot to an even depth.
+    """
+    index = {d: i for i, d in enumerate(dates)}
+    zone_index = None
+    mm = np.zeros((len(table["ids"]), len(dates)))
+    total_area = max(float(table["area"].sum()), 1e-6)
+    for log in logs or []:
+        day = index.get(str(log.get("watered_at") or "")[:10])
+        if day is None:
+            continue
+        zone = None
+        if log.get("zone_id") is not None:
+            zone_index = zone_index or {str(z): i for i, z in enumerate(table["ids"])}
+            zone = zone_index.get(str(log["zone_id"]))
+        liters = log.get("liters")
+        if zone is not None:
+            if liters is None:
+                liters = float(log.get("duration_minutes") or 0) * table["emitter_lpm"][zone]
+            mm[zone, day] += liters_to_mm(float(liters), max(table["area"][zone], 1e-6))
+        else:
+            if liters is None:
+                liters = float(log.get("duration_minutes") or 0) * FLOW_RATE_LPM
+            mm[:, day] += liters_to_mm(float(liters), total_area)
+    return mm
+
+
+def zone_windows(grid, hours):
+    """Best window per (zone, day) on a one-cell grid; zone i needs hours[i] consecutive hours.
+
+    Same ranking as window_utils.best_windows, but every distinct length is
+    read off one set of running sums instead of a search per length.
+    """
+    scores = hour_scores(grid)[0]
+    blocked = np.isinf(scores)
+    total = np.pad(np.cumsum(np.where(blocked, 0.0, scores), axis=-1), [(0, 0), (1, 0)])
+    bad = np.pad(np.cumsum(blocked, axis=-1), [(0, 0), (1, 0)])
+    lengths, inverse = np.unique(hours, return_inverse=True)
+    starts = np.arange(scores.shape[-1])
+    ends = starts + lengths[:, None]                       # (lengths, hours)
+    fits = ends <= scores.shape[-1]
+    ends = np.minimum(ends, scores.shape[-1])
+    sums = total[:, ends] - total[:, None, starts]         # (days, lengths, hours)
+    usable = fits & (bad[:, ends] - bad[:, None, starts] == 0)
+    mean = np.where(usable, sums / lengths[:, None], np.inf)
+    mean[:, lengths == 1] = scores[:, None, :]             # as best_windows, without round-off
+    start = mean.argmin(axis=-1)
+    found = np.isfinite(np.take_along_axis(mean, start[..., None], axis=-1)[..., 0])
+    start_hour = np.where(found, start, -1).T              # (lengths, days)
+    end_hour = np.where(found, start + lengths, -1).T
+    return {"start_hour": start_hour[inverse], "end_hour": end_hour[inverse]}
+
+
+def plan_zones(plot, daily, hourly, logs, age_months, days=7, today=None):
+    """Schedule every zone of a plot for the next days days, or None without a forecast.
+
+    Each zone's root zone runs from LOOKBACK_DAYS ago (carrying its watering
+    log into today's depletion), then through the forecast, refilled to field
+    capacity on any day that starts past its RAW. Liters are the refill times
+    the zone's area, runtime is liters over the emitter flow, and each zone
+    waters in the best window long enough for its longest run that day.
+    Returns per-zone arrays; zone_rows() turns them into JSON-ready rows.
+    """
+    today = today or datetime.utcnow().date()
+    et0_by_date = {row["date"]: row["et0_pm"] for row in forecast_et0(daily, hourly, plot.get("lat"))}
+    if not et0_by_date:
+        return None
+    past = [(today - timedelta(days=n)).isoformat() for n in range(LOOKBACK_DAYS, 0, -1)]
+    ahead = [(today + timedelta(days=i)).isoformat() for i in range(days)]
+    first_et0, last_et0 = list(et0_by_date.values())[0], list(et0_by_date.values())[-1]
+    et0 = np.array([first_et0] * len(past) + [et0_by_date.get(d, last_et0) for d in ahead])
+    rain_by_date = {d.get("date"): float(d.get("precipitation") or 0) for d in daily or []}
+    rain = np.array([0.0] * len(past) + [rain_by_date.get(d, 0.0) for d in ahead])
+
+    table = zone_table(plot)
+    day_index = months_to_days(age_months or 0) + np.arange(-len(past), days)
+    etc = zone_kc(table, day_index) * et0
+    logged = zone_irrigation(logs, past + ahead, table)
+    bucket = root_zone(table["codes"], table["soils"])
+
+    n = len(past)
+    history = simulate(etc[:, :n], rain[:n], logged[:, :n], bucket["taw"], bucket["raw"])
+    plan = simulate(etc[:, n:], rain[n:], logged[:, n:], bucket["taw"], bucket["raw"],
+                    depletion0=history["depletion"][:, -1], auto_irrigate=True)
+
+    area = table["area"][:, None]
+    liters = np.round(mm_to_liters(plan["irrigation"] - logged[:, n:], area), 2)
+    runtime = np.round(liters / table["emitter_lpm"][:, None], 1)
+    hours = np.clip(np.ceil(runtime.max(axis=1) / 60), 1, MAX_WINDOW_HOURS).astype(np.int64)
+    windows = zone_windows(grid_from_timeline([hourly or []], days=days), hours)
+    return {
+        "table": table,
+        "dates": ahead,
+        "taw": bucket["taw"],
+        "raw": bucket["raw"],
+        "depletion": plan["depletion"],
+        "liters": liters,
+        "runtime_minutes": runtime,
+        "start_hour": windows["start_hour"],
+        "end_hour": windows["end_hour"]
+    }
+
+
+def zone_rows(plan):
+    """JSON-ready per-zone schedules and plot totals from plan_zones().
+
+    {"dates": [...], "zones": [{..., "liters": [...], "runtime_minutes": [...],
+    "optimal_time": [...]}], "days": [{"date", "liters"}]}: each zone's days
+    are lists in date order, built from the plan's arrays in one pass.
+    """
+    table = plan["table"]
+    labels = [datetime.fromisoformat(d).strftime(DATE_FORMAT) for d in plan["dates"]]
+    start, end = plan["start_hour"], plan["end_hour"]
+    times = np.where(plan["liters"] > 0, WINDOW_LABELS[np.maximum(start, 0), np.maximum(end, 0)], "Skipped")
+    times[start < 0] = "Skipped"
+    liters, runtime, times = plan["liters"].tolist(), plan["runtime_minutes"].tolist(), times.tolist()
+    area = np.round(table["area"], 2).tolist()
+    emitters = table["emitter_lpm"].tolist()
+    taw, raw = np.round(plan["taw"], 1).tolist(), np.round(plan["raw"], 1).tolist()
+    zones = table["zones"]
+    totals = plan["liters"].sum(axis=0)
+    return {
+        "dates": labels,
+        "zones": [{
+            "id": zone_id,
+            "name": zones[i].get("name") or f"Zone {i + 1}",
+            "area": area[i],
+            "crop": table["crops"][i],
+            "emitter_lpm": emitters[i],
+            "taw_mm": taw[i],
+            "raw_mm": raw[i],
+            "liters": liters[i],
+            "runtime_minutes": runtime[i],
+            "optimal_time": times[i]
+        } for i, zone_id in enumerate(table["ids"])],
+        "days": [{"date": labels[d], "liters": round(float(totals[d]), 2)} for d in range(len(labels))]
+    }
@@ -19,7 +19,11 @@ cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
 retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
 openmeteo = openmeteo_requests.Client(session=retry_session)
 
-# Expanded crop coefficients (FAO-style)
+# Expanded crop coefficients (FAO-style), one season-average value per crop.
+# Deliberately not the backend's day-by-day curves (MiraquaOfficial/backend
+# utils/kc_utils.py): the website deploys on its own without the backend
+# package, and the optimizer's net-ET math is tuned to these flat values
+# (crop_age only feeds the prompt's root-depth hint). Keep the crop list in step.
 CROP_KC = {
     "corn": 1.15,
     "wheat": 1.0,
@@ -39,7 +43,9 @@ def get_lat_lon(zip_code):
         return lat, lon
     return None, None
 
-def get_forecast(lat, lon):
+MAX_DAYS = 16  # Open-Meteo forecast range
+
+def get_forecast(lat, lon, days=5):
     url = "https://api.open-meteo.com/v1/forecast"
     params = {
         "latitude": lat,
@@ -47,6 +53,7 @@ def get_forecast(lat, lon):
         "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"],
         "hourly": ["soil_moisture_0_to_1cm"],
         "temperature_unit": "celsius",
+        "forecast_days": days,
         "timezone": "auto"
     }
     responses = openmeteo.weather_api(url, params=params)
@@ -65,7 +72,7 @@ def get_forecast(lat, lon):
 
     hourly = response.Hourly()
     soil = hourly.Variables(0).ValuesAsNumpy()
-    soil_avg_per_day = [round(float(soil[i*24:(i+1)*24].mean()), 3) for i in range(min(7, len(dates)))]
+    soil_avg_per_day = [round(float(soil[i*24:(i+1)*24].mean()), 3) for i in range(min(days, len(dates)))]
 
     return {
         "dates": dates,
@@ -98,12 +105,18 @@ def get_plan():
     manual_rain = float(data.get("rain", 0))
     know_moisture = data.get("know_moisture")
     manual_moisture = float(data.get("soil_moisture", 0.2 if know_moisture == "no" else 0.25))
+    try:
+        days = int(data.get("days", 5))
+    except (TypeError, ValueError):
+        return jsonify({"error": f"Days must be a whole number (1–{MAX_DAYS})."}), 400
+    if not 1 <= days <= MAX_DAYS:
+        return jsonify({"error": f"Please choose between 1 and {MAX_DAYS} days."}), 400
 
     lat, lon = get_lat_lon(zip_code)
     if not lat:
         return jsonify({"error": "Invalid ZIP code or location"}), 400
 
-    forecast = get_forecast(lat, lon)
+    forecast = get_forecast(lat, lon, days)
     if not forecast:
         return jsonify({"error": "Could not fetch forecast"}), 500
 
@@ -111,7 +124,10 @@ def get_plan():
     total_liters_used = 0
     kc = CROP_KC.get(crop, CROP_KC["default"])
 
-    for i in range(5):
+    days = min(days, len(forecast["dates"]), len(forecast["soils"]))
+    if days == 0:
+        return jsonify({"error": "Could not fetch forecast"}), 500
+    for i in range(days):
         tmax = float(forecast["tmax"][i])
         tmin = float(forecast["tmin"][i])
         tmean = float(forecast["tmean"][i])
@@ -149,10 +165,10 @@ def get_plan():
         })
 
     predicted_aw = round(total_liters_used / 1233480, 2)
-    avg_liters = round(total_liters_used / 5, 2)
+    avg_liters = round(total_liters_used / days, 2)
 
     summary = (
-    f"Based on your crop ({crop}) and ZIP code ({zip_code}), your estimated 5-day water need is "
+    f"Based on your crop ({crop}) and ZIP code ({zip_code}), your estimated {days}-day water need is "
     f"{int(total_liters_used)} liters total.\n"
     f"Apply about {int(avg_liters)} liters per day.\n\n"
     f"We used your "